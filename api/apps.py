@@ -1,6 +1,16 @@
+import sys
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Revisión de índices solo en procesos de servicio (daphne / celery),
+        # no en comandos de manage.py como migrate o ensure_indexes.
+        if not settings.MONGO_INDEX_CHECK or sys.argv[0].endswith('manage.py'):
+            return
+        from api.utils.index_utils import start_index_check
+        start_index_check()
@@ -2,6 +2,8 @@ from dateutil.relativedelta import relativedelta
 
 
 DEFAULT_PAGE_SIZE = 10
+# Sufijo del campo donde un $lookup deja el documento relacionado (ej. supplier_id_ref)
+LOOKUP_SUFFIX = '_ref'
 USER_STATUS = (
     (0, 'pending'),
     (1, 'active'),
@@ -0,0 +1,74 @@
+import functools
+import hashlib
+import logging
+from typing import Optional
+from api.helpers.http_responses import not_modified
+from api.utils.cache_utils import cache_tag, cache_version, stale_served
+
+logger = logging.getLogger(__name__)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(',')]
+    # Comparación débil (RFC 9110): W/"x" equivale a "x"
+    return '*' in candidates or any(c.removeprefix('W/') == etag for c in candidates)
+
+
+def conditional_get(*scopes):
+    """
+    Decorador para GET de APIView: ETag a partir de las generaciones de
+    cache de los prefijos de los que depende la respuesta (ver
+    cache_version). Si el cliente manda If-None-Match vigente se responde
+    304 sin ejecutar el caso de uso (sin Mongo ni serializers).
+
+    Cada scope es 'prefix' o ('prefix', ['campo', ...]); los campos del tag
+    se toman de los kwargs de la URL y después de los query params.
+    Ejemplo:
+        @conditional_get(('lots', ['home_production_id']))
+
+    Los scopes deben cubrir todo lo que lee la respuesta y cada cache que
+    lee debe invalidarse con esos mismos prefijos; si no, un cuerpo viejo
+    queda guardado en el cliente con un ETag nuevo. Por eso los datos de
+    otras colecciones se resuelven en el serializer (BatchLoader con su
+    propio prefijo) y no se cachean dentro de la lista. Si alguna lectura
+    sirvió una copia stale (ver cache_result) la respuesta va sin ETag.
+    """
+    def resolve(request, kwargs) -> list[tuple[str, Optional[str]]]:
+        resolved = []
+        for scope in scopes:
+            prefix, fields = (scope, None) if isinstance(scope, str) else scope
+            values = {f: kwargs.get(f, request.GET.get(f)) for f in fields or []}
+            resolved.append((prefix, cache_tag(values, fields)))
+        return resolved
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            try:
+                version = cache_version(resolve(request, kwargs))
+            except Exception as e:
+                # Sin Redis no hay validador: respuesta normal
+                logger.warning(f"[conditional_get] Sin validador para {request.path}: {e}")
+                return func(view, request, *args, **kwargs)
+
+            digest = hashlib.md5(
+                f"{request.get_full_path()}|{version}".encode()).hexdigest()
+            etag = f'"{digest}"'
+            if _etag_matches(request.headers.get('If-None-Match'), etag):
+                return not_modified(etag)
+
+            token = stale_served.set(False)
+            try:
+                response = func(view, request, *args, **kwargs)
+                stale = stale_served.get()
+            finally:
+                stale_served.reset(token)
+            if response.status_code == 200 and not stale:
+                response['ETag'] = etag
+                # El navegador guarda la respuesta pero revalida siempre
+                response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -4,7 +4,7 @@ from typing import Any, Dict
 from celery import shared_task
 from celery.utils.log import get_task_logger
 
-from api.utils.cache_utils import invalidate_cache
+from api.utils.cache_utils import invalidate_cache, cache_tag
 from api.helpers.unique_colors import unique_colors
 from api.repositories.explosion_repository import ExplosionRepository
 from api.repositories.trend_repository import TrendRepository
@@ -78,4 +78,4 @@ def assignments(self, trend_data: Dict[str, Any], exp_data: Dict[str, Any]):
     colors = unique_colors(trend_type)
     if len(colors) == len(assigned_to_type):
         exp_repo.update(str(exp.get('_id')), {'status': 1})
-        invalidate_cache('explosion')
+        invalidate_cache('explosion', [cache_tag(exp, ['home_production_id'])])
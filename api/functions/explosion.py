@@ -1,205 +1,137 @@
-from typing import Any, Dict, List
-from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional
 from copy import deepcopy
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from api.utils.cache_utils import invalidate_cache
-from api.helpers.formats import to_float
+from api.utils.cache_utils import invalidate_cache, cache_tag
+from api.utils.task_coalescing import KeyBusy, claim, schedule
+from api.functions.explosion_matrix import (
+    ExplosionKey, Entries, FIELDS, VolumetryMatrix, cents, from_cents, scale_documents)
 from api.repositories.home_production_repository import HomeProductionRepository
 from api.repositories.volumetry_repository import VolumetryRepository
 from api.repositories.explosion_repository import ExplosionRepository
+from api.services.po_requirement_service import PORequirementService
 
 logger = get_task_logger(__name__)
 
+VOLUMETRY_PROJECTION = {
+    "material_id": 1,
+    "supplier_id": 1,
+    "prototype": 1,
+    "volumetry": 1,
+}
 
-def r2(x: Any) -> float:
-    return round(float(x or 0), 2)
+# Clave natural de un documento de explosión (además de home_production_id)
+KEY_FIELDS = ["home_production_id", "material_id", "supplier_id"]
+
+
+def explosion_key(doc: Dict[str, Any]) -> ExplosionKey:
+    return (doc.get("material_id"), doc.get("supplier_id"))
 
 
 def total_from_prototypes(prototypes: List[Dict[str, Any]]) -> float:
     """Suma factory + installation + delivery de todos los prototypes (YA multiplicados)."""
-    total = 0.0
-    for p in prototypes or []:
-        q = p.get("quantities") or {}
-        total += to_float(q.get("factory", 0)) + \
-            to_float(q.get("installation", 0)) + to_float(q.get("delivery", 0))
-    return r2(total)
-
-
-def upsert_prototype(area: Dict[str, Any], prototype: str, quantities: Dict[str, Any]) -> Dict[str, Any]:
-    prototypes = area.setdefault("prototypes", [])
-
-    for item in prototypes:
-        if item.get("prototype") == prototype:
-            item["quantities"] = quantities
-            area["total"] = total_from_prototypes(prototypes)
-            return area
-
-    prototypes.append({
-        "prototype": prototype,
-        "quantities": quantities,
-    })
-    area["total"] = total_from_prototypes(prototypes)
-    return area
-
-
-def create_amounts(item: Dict[str, Any], hp: Dict[str, Any]) -> List[Dict[str, Any]]:
-    lots_prototypes = (hp.get("lots") or {}).get("prototypes") or {}
-    prototype = item.get("prototype")
-
-    # Si el prototype no está contemplado en lots, no hay nada que mover
-    if not prototype or prototype not in lots_prototypes:
-        return []
-
-    multiplier = to_float(lots_prototypes.get(
-        prototype, 0), 0.0, min_value=0.0)
-
-    areas_out: List[Dict[str, Any]] = []
-    for v in (item.get("volumetry") or []):
-        area = v.get("area")
-        if not area:
-            continue
-
-        factory = r2(to_float(v.get("factory", 0),
-                     0.0, min_value=0.0) * multiplier)
-        installation = r2(to_float(v.get("installation", 0),
-                          0.0, min_value=0.0) * multiplier)
-        delivery = r2(to_float(v.get("delivery", 0),
-                      0.0, min_value=0.0) * multiplier)
-        total = r2(factory + installation + delivery)
-
-        if total > 0:
-            prototypes = [{
-                "prototype": prototype,
-                "quantities": {
-                    "factory": factory,
-                    "installation": installation,
-                    "delivery": delivery,
-                },
-            }]
-            areas_out.append({
-                "area": area,
-                "prototypes": prototypes,
-                "total": total_from_prototypes(prototypes),  # consistente
-            })
-
-    return areas_out
-
-
-def get_area_data(data: List[Dict[str, Any]], area_name: str) -> Dict[str, Any]:
-    for item in data:
-        if item.get("area") == area_name:
-            return {
-                "area": area_name,
-                "prototypes": item.get("prototypes", []),
-                "total": item.get("total", 0)
-            }
-    return {
-        "area": area_name,
-        "prototypes": [],
-        "total": 0
-    }
+    return from_cents(sum(
+        cents((p.get("quantities") or {}).get(field, 0))
+        for p in prototypes or [] for field in FIELDS))
+
+
+def compute_explosion(hp: Dict[str, Any], volumetry: Iterable[Dict[str, Any]],
+                      current_explosion: List[Dict[str, Any]],
+                      prev_lots: int) -> Dict[ExplosionKey, Dict[str, Any]]:
+    """
+    Paso puro (sin I/O): regresa {(material_id, supplier_id): {explosion,
+    gran_total}} con el estado final de cada documento a escribir.
+    - Los materiales que ya tienen explosión se escalan por total de lotes.
+    - Los que no, se calculan desde la volumetría (VolumetryMatrix).
+    """
+    lots = hp.get("lots") or {}
+    result: Dict[ExplosionKey, Dict[str, Any]] = {}
+
+    if current_explosion:
+        current_total = int(lots.get("total", 0))
+        if not prev_lots:
+            raise ValueError("prev no puede ser 0")
+        if current_total < 0 or prev_lots < 0:
+            raise ValueError("prev y current deben ser >= 0")
+        scaled = scale_documents(current_explosion, current_total / prev_lots)
+        result = {explosion_key(doc): data for doc, data in zip(current_explosion, scaled)}
+
+    existing = set(result)
+    matrix = VolumetryMatrix(
+        item for item in volumetry if explosion_key(item) not in existing)
+    result.update(matrix.documents(matrix.explode(lots.get("prototypes") or {})))
+    return result
 
 
-def update_amounts(current_exp: Dict[str, Any], item: Dict[str, Any], hp: Dict[str, Any]) -> List[Dict[str, Any]]:
-    exp = current_exp.get('explosion', [])
-    areas = {e["area"]: e for e in exp}
-    lots_prototypes = (hp.get("lots") or {}).get("prototypes") or {}
-    prototype = item.get("prototype")
-
-    if not prototype or prototype not in lots_prototypes:
-        return exp
-
-    multiplier = to_float(lots_prototypes.get(
-        prototype, 0), 0.0, min_value=0.0)
-
-    for v in (item.get("volumetry") or []):
-        factory = r2(to_float(v.get("factory", 0),
-                     0.0, min_value=0.0) * multiplier)
-        installation = r2(to_float(v.get("installation", 0),
-                          0.0, min_value=0.0) * multiplier)
-        delivery = r2(to_float(v.get("delivery", 0),
-                      0.0, min_value=0.0) * multiplier)
-        total = r2(factory + installation + delivery)
-        if total > 0:
-            area = v.get("area")
-            if not area:
-                continue
-
-            result = get_area_data(exp, area)
-            result = upsert_prototype(result, prototype, {
-                "factory": factory,
-                "installation": installation,
-                "delivery": delivery,
-            })
-            areas[result["area"]] = result
-    return list(areas.values())
-
-
-def merge_explosion(current_explosion: list, volumetry: list) -> list:
-    merged = list(current_explosion)
-
-    existing_keys = {
-        (item.get("material_id"), item.get("supplier_id"))
-        for item in current_explosion
+def apply_prototypes(doc: Optional[Dict[str, Any]], fresh: Entries,
+                     affected: Iterable[str]) -> Dict[str, Any]:
+    """
+    Reemplaza solo los prototypes `affected` de un material por las
+    cantidades recalculadas (`fresh`, {(área, prototype): cantidades}).
+    El resto de prototypes y áreas no se tocan.
+    """
+    affected = set(affected)
+    fresh = dict(fresh)
+
+    # Reemplazo en su lugar (conserva el orden); lo que ya no aplica se quita
+    areas: Dict[str, Dict[str, Any]] = {}
+    for area in deepcopy((doc or {}).get("explosion") or []):
+        prototypes = []
+        for p in area.get("prototypes") or []:
+            if p.get("prototype") not in affected:
+                prototypes.append(p)
+            elif (area.get("area"), p.get("prototype")) in fresh:
+                p["quantities"] = fresh.pop((area.get("area"), p.get("prototype")))
+                prototypes.append(p)
+        area["prototypes"] = prototypes
+        areas[area.get("area")] = area
+    for (name, prototype), quantities in fresh.items():
+        areas.setdefault(name, {"area": name, "prototypes": []})["prototypes"].append({
+            "prototype": prototype,
+            "quantities": quantities,
+        })
+
+    amounts = []
+    for area in areas.values():
+        if area["prototypes"]:
+            area["total"] = total_from_prototypes(area["prototypes"])
+            amounts.append(area)
+    return {
+        "explosion": amounts,
+        "gran_total": from_cents(sum(cents(a["total"]) for a in amounts)),
     }
 
-    for item in volumetry:
-        material_id = item.get("material_id")
-        supplier_id = item.get("supplier_id")
-
-        if not material_id or not supplier_id:
-            continue  # ignora registros mal formados
-
-        key = (material_id, supplier_id)
-
-        if key not in existing_keys:
-            merged.append(item)
-            existing_keys.add(key)
-
-    return merged
-
-
-def scale_explosion(data: Dict[str, Any], prev: float, current: float) -> Dict[str, Any]:
-    if prev == 0:
-        raise ValueError("prev no puede ser 0")
-    if current < 0 or prev < 0:
-        raise ValueError("prev y current deben ser >= 0")
-
-    result = deepcopy(data)
-
-    factor = Decimal(str(current)) / Decimal(str(prev))
-
-    def scale(value):
-        return float(
-            (Decimal(str(value)) * factor).quantize(Decimal("0.01"),
-                                                    rounding=ROUND_HALF_UP)
-        )
-
-    new_gran_total = Decimal("0")
-
-    for area in result.get("explosion", []):
-        new_area_total = Decimal("0")
-
-        for proto in area.get("prototypes", []):
-            quantities = proto.get("quantities", {})
-            for key in ("factory", "installation", "delivery"):
-                if key in quantities and quantities[key] is not None:
-                    new_value = scale(quantities[key])
-                    quantities[key] = new_value
-                    new_area_total += Decimal(str(new_value))
 
-        area["total"] = float(new_area_total.quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP))
-        new_gran_total += new_area_total
+def compute_delta_explosion(hp: Dict[str, Any], volumetry: Iterable[Dict[str, Any]],
+                            current_explosion: List[Dict[str, Any]],
+                            affected: Iterable[str]) -> Dict[ExplosionKey, Dict[str, Any]]:
+    """
+    Paso puro para un cambio de lotes: solo regresa los materiales que tienen
+    volumetría en algún prototype afectado, recalculados con el conteo de
+    lotes vigente.
+    """
+    affected = set(affected)
+    matrix = VolumetryMatrix(
+        item for item in volumetry if item.get("prototype") in affected)
+    fresh = matrix.entries(matrix.explode((hp.get("lots") or {}).get("prototypes") or {}))
+
+    docs = {explosion_key(doc): doc for doc in current_explosion}
+    return {
+        key: apply_prototypes(docs.get(key), entries, affected)
+        for key, entries in fresh.items()
+    }
 
-    result["gran_total"] = float(new_gran_total.quantize(
-        Decimal("0.01"), rounding=ROUND_HALF_UP))
-    return result
 
+def run_explosion(home_production_id: str, prev_lots: int,
+                  delta: Optional[Dict[str, int]] = None) -> bool:
+    """
+    Un viaje por colección: HP, explosión actual (prefetch por material /
+    proveedor) y volumetría; el cálculo es en memoria y todas las escrituras
+    salen en un solo bulk_write (upsert, idempotente ante reintentos).
 
-@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
-def explosion(self, home_production_id: str, prev_lots: int):
+    `delta` ({prototype: cambio en número de lotes}) limita el recálculo a
+    esos prototypes; sin él se recalcula toda la explosión.
+    """
     hp_repo = HomeProductionRepository()
     v_repo = VolumetryRepository()
     exp_repo = ExplosionRepository()
@@ -208,90 +140,72 @@ def explosion(self, home_production_id: str, prev_lots: int):
     if not hp:
         return False
 
-    current_lots = hp.get('lots', {})
-
-    current_explosion = exp_repo.find_all({
-        'home_production_id': home_production_id,
-    }) or []
-
-    volumetry = v_repo.find_all({
+    volumetry_query = {
         "client_id": hp.get("client_id"),
         "front": hp.get("front"),
-    }) or []
-
-    if len(current_explosion) == 0:
-        for v in volumetry:
-            material_id = v.get("material_id")
-            supplier_id = v.get("supplier_id")
-            current_exp = exp_repo.find_one({
-                "home_production_id": home_production_id,
-                "material_id": material_id,
-                "supplier_id": supplier_id,
-            })
-            if current_exp:
-                amounts = update_amounts(current_exp, v, hp)
-                gran_total = r2(sum(to_float(a.get("total", 0))
-                                    for a in (amounts or [])))
-                exp_repo.update(str(current_exp.get('_id')), {
-                    "explosion": amounts,
-                    "gran_total": gran_total,
-                })
-            else:
-                amounts = create_amounts(v, hp)
-                gran_total = r2(sum(to_float(a.get("total", 0))
-                                for a in (amounts or [])))
-                exp_repo.insert({
-                    "home_production_id": home_production_id,
-                    "material_id": material_id,
-                    "supplier_id": supplier_id,
-                    "explosion": amounts,
-                    "gran_total": gran_total,
-                    "status": 0,
-                })
-        invalidate_cache('explosion')
-        return True
-
-    merged = merge_explosion(current_explosion, volumetry)
-    for e in merged:
-        volumetry = e.get('volumetry')
-        if volumetry:
-            current_exp = exp_repo.find_one({
-                "home_production_id": home_production_id,
-                "material_id": e.get("material_id"),
-                "supplier_id": e.get("supplier_id"),
-            })
-            if current_exp:
-                amounts = update_amounts(current_exp, e, hp)
-                gran_total = r2(sum(to_float(a.get("total", 0))
-                                    for a in (amounts or [])))
-                exp_repo.update(str(current_exp.get('_id')), {
-                    "explosion": amounts,
-                    "gran_total": gran_total,
-                })
-            else:
-                amounts = create_amounts(e, hp)
-                gran_total = r2(sum(to_float(a.get("total", 0))
-                                for a in (amounts or [])))
-                exp_repo.insert({
-                    "home_production_id": home_production_id,
-                    "material_id": e.get("material_id"),
-                    "supplier_id": e.get("supplier_id"),
-                    "explosion": amounts,
-                    "gran_total": gran_total,
-                    "status": 0,
-                })
-        else:
-            new_exp = scale_explosion(
-                e, prev_lots, int(current_lots.get('total', 0)))
-            query_upsert = {
-                "home_production_id": home_production_id,
-                "material_id": e.get("material_id"),
-                "supplier_id": e.get("supplier_id"),
-            }
-            set_data = {
-                "explosion": new_exp.get('explosion', []),
-                "gran_total": new_exp.get('gran_total', 0),
-            }
-            exp_repo.upsert_one(query_upsert, set_data)
-    invalidate_cache('explosion')
+    }
+
+    if delta is not None:
+        affected = sorted(p for p, n in delta.items() if n)
+        if not affected:
+            return True
+        volumetry = v_repo.find_all(
+            {**volumetry_query, "prototype": {"$in": affected}},
+            projection=VOLUMETRY_PROJECTION) or []
+        current_explosion = exp_repo.find_all({
+            'home_production_id': home_production_id,
+            'material_id': {'$in': sorted({v.get("material_id") for v in volumetry})},
+        }) or []
+        computed = compute_delta_explosion(hp, volumetry, current_explosion, affected)
+    else:
+        current_explosion = exp_repo.find_all({
+            'home_production_id': home_production_id,
+        }) or []
+        volumetry = v_repo.iter_all(volumetry_query, projection=VOLUMETRY_PROJECTION)
+        computed = compute_explosion(hp, volumetry, current_explosion, prev_lots)
+
+    exp_repo.bulk_upsert(KEY_FIELDS, [
+        {
+            "home_production_id": home_production_id,
+            "material_id": material_id,
+            "supplier_id": supplier_id,
+            **data,
+        }
+        for (material_id, supplier_id), data in computed.items()
+    ], on_insert={"status": 0})
+
+    invalidate_cache('explosion', [cache_tag(
+        {'home_production_id': home_production_id}, ['home_production_id'])])
+    PORequirementService().refresh(home_production_id)
     return True
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def explosion(self, home_production_id: str, prev_lots: int,
+              delta: Optional[Dict[str, int]] = None):
+    return run_explosion(home_production_id, prev_lots, delta)
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def coalesced_explosion(self, home_production_id: str):
+    """Aplica los prototypes acumulados por schedule_explosion (una a la vez por OD)."""
+    try:
+        with claim(self, 'explosion', home_production_id, (home_production_id,)) as prototypes:
+            if not prototypes:
+                return True
+            return run_explosion(home_production_id, 0, dict.fromkeys(prototypes, 1))
+    except KeyBusy:
+        # La ejecución en curso la vuelve a encolar al liberar el lock
+        return False
+
+
+def schedule_explosion(home_production_id: str, delta: Optional[Dict[str, int]]) -> bool:
+    """
+    Encola (con debounce) el recálculo de los prototypes con cambios; una
+    ráfaga de ediciones de lotes de la misma OD termina en una sola tarea.
+    """
+    prototypes = [prototype for prototype, n in (delta or {}).items() if n]
+    if not prototypes:
+        return False
+    return schedule(coalesced_explosion, 'explosion', home_production_id,
+                    (home_production_id,), prototypes)
@@ -0,0 +1,204 @@
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from api.helpers.formats import to_float
+
+FIELDS = ("factory", "installation", "delivery")
+
+ExplosionKey = Tuple[str, str]
+# (área, prototype) -> {factory, installation, delivery}
+Entries = Dict[Tuple[str, str], Dict[str, float]]
+
+# Tolerancia para que x.xx5 redondee hacia arriba pese al error de float
+_EPSILON = 1e-6
+
+
+def to_cents(values: np.ndarray) -> np.ndarray:
+    """Redondeo a centavos (half-up, valores >= 0) como enteros."""
+    return np.floor(np.asarray(values, dtype=np.float64) * 100 + 0.5 + _EPSILON).astype(np.int64)
+
+
+def cents(value: Any) -> int:
+    return int(to_cents(to_float(value, 0.0, min_value=0.0)))
+
+
+def from_cents(value: int) -> float:
+    return int(value) / 100
+
+
+class VolumetryMatrix:
+    """
+    Volumetría de varios materiales como arreglo denso
+    (material, prototype, área, campo) con las cantidades por lote.
+    La explosión es un solo producto con el vector de lotes por prototype;
+    los dicts solo se arman al construir y al regresar el resultado.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.keys: List[ExplosionKey] = []
+        self.prototypes: List[str] = []
+        self.areas: List[str] = []
+        key_idx: Dict[ExplosionKey, int] = {}
+        proto_idx: Dict[str, int] = {}
+        area_idx: Dict[str, int] = {}
+        # Orden de aparición por material (el de los documentos existentes)
+        self._area_order: List[List[int]] = []
+        self._proto_order: List[List[int]] = []
+        cells: List[Tuple[int, int, int, Tuple[float, ...]]] = []
+
+        for row in rows:
+            key = (row.get("material_id"), row.get("supplier_id"))
+            prototype = row.get("prototype")
+            if not all(key) or not prototype:
+                continue
+            m = key_idx.get(key)
+            if m is None:
+                m = key_idx[key] = len(self.keys)
+                self.keys.append(key)
+                self._area_order.append([])
+                self._proto_order.append([])
+            p = proto_idx.setdefault(prototype, len(proto_idx))
+            if p == len(self.prototypes):
+                self.prototypes.append(prototype)
+            if p not in self._proto_order[m]:
+                self._proto_order[m].append(p)
+
+            for v in (row.get("volumetry") or []):
+                area = v.get("area")
+                if not area:
+                    continue
+                a = area_idx.setdefault(area, len(area_idx))
+                if a == len(self.areas):
+                    self.areas.append(area)
+                if a not in self._area_order[m]:
+                    self._area_order[m].append(a)
+                cells.append((m, p, a, tuple(
+                    to_float(v.get(field, 0), 0.0, min_value=0.0) for field in FIELDS)))
+
+        self.per_lot = np.zeros(
+            (len(self.keys), len(self.prototypes), len(self.areas), len(FIELDS)))
+        if cells:
+            m, p, a, values = zip(*cells)
+            # Filas repetidas: gana la última, como el upsert anterior
+            self.per_lot[list(m), list(p), list(a)] = values
+
+    def to_state(self) -> Dict[str, Any]:
+        """Forma serializable (BSON) para guardarla en cache."""
+        return {
+            "keys": [list(key) for key in self.keys],
+            "prototypes": self.prototypes,
+            "areas": self.areas,
+            "area_order": self._area_order,
+            "proto_order": self._proto_order,
+            "shape": list(self.per_lot.shape),
+            "per_lot": self.per_lot.tobytes(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "VolumetryMatrix":
+        matrix = cls.__new__(cls)
+        matrix.keys = [tuple(key) for key in state["keys"]]
+        matrix.prototypes = list(state["prototypes"])
+        matrix.areas = list(state["areas"])
+        matrix._area_order = state["area_order"]
+        matrix._proto_order = state["proto_order"]
+        matrix.per_lot = np.frombuffer(
+            state["per_lot"], dtype=np.float64).reshape(state["shape"])
+        return matrix
+
+    def lots_vector(self, lots_prototypes: Dict[str, Any]) -> np.ndarray:
+        return np.array([
+            to_float(lots_prototypes.get(prototype, 0), 0.0, min_value=0.0)
+            for prototype in self.prototypes
+        ], dtype=np.float64)
+
+    def explode(self, lots_prototypes: Dict[str, Any]) -> np.ndarray:
+        """Centavos (material, prototype, área, campo) para el conteo de lotes dado."""
+        return to_cents(self.per_lot * self.lots_vector(lots_prototypes)[None, :, None, None])
+
+    def gran_totals(self, exploded: np.ndarray) -> np.ndarray:
+        """Centavos totales por material, sin armar documentos."""
+        return exploded.sum(axis=(1, 2, 3))
+
+    def entries(self, exploded: np.ndarray) -> Dict[ExplosionKey, Entries]:
+        """Cantidades con total > 0 por material, en el orden de la volumetría."""
+        present = exploded.sum(axis=3) > 0
+        result: Dict[ExplosionKey, Entries] = {}
+        for m, key in enumerate(self.keys):
+            entries: Entries = {}
+            for a in self._area_order[m]:
+                for p in self._proto_order[m]:
+                    if present[m, p, a]:
+                        entries[(self.areas[a], self.prototypes[p])] = {
+                            field: from_cents(c)
+                            for field, c in zip(FIELDS, exploded[m, p, a])
+                        }
+            result[key] = entries
+        return result
+
+    def documents(self, exploded: np.ndarray) -> Dict[ExplosionKey, Dict[str, Any]]:
+        """{explosion, gran_total} de cada material, totales sumados en centavos."""
+        area_totals = exploded.sum(axis=(1, 3))
+        gran_totals = area_totals.sum(axis=1)
+        present = exploded.sum(axis=3) > 0
+        result: Dict[ExplosionKey, Dict[str, Any]] = {}
+        for m, key in enumerate(self.keys):
+            amounts = []
+            for a in self._area_order[m]:
+                prototypes = [
+                    {
+                        "prototype": self.prototypes[p],
+                        "quantities": {
+                            field: from_cents(c)
+                            for field, c in zip(FIELDS, exploded[m, p, a])
+                        },
+                    }
+                    for p in self._proto_order[m] if present[m, p, a]
+                ]
+                if prototypes:
+                    amounts.append({
+                        "area": self.areas[a],
+                        "prototypes": prototypes,
+                        "total": from_cents(area_totals[m, a]),
+                    })
+            result[key] = {
+                "explosion": amounts,
+                "gran_total": from_cents(gran_totals[m]),
+            }
+        return result
+
+
+def scale_documents(docs: List[Dict[str, Any]], factor: float) -> List[Dict[str, Any]]:
+    """
+    Escala las cantidades de varios documentos de explosión por `factor`
+    en una sola operación; regresa {explosion, gran_total} en el mismo orden.
+    """
+    values: List[float] = []
+    for doc in docs:
+        for area in doc.get("explosion") or []:
+            for proto in area.get("prototypes") or []:
+                quantities = proto.get("quantities") or {}
+                values.extend(
+                    to_float(quantities[field])
+                    for field in FIELDS if quantities.get(field) is not None)
+
+    scaled = iter(to_cents(np.array(values, dtype=np.float64) * factor).tolist())
+
+    result = []
+    for doc in docs:
+        gran_total = 0
+        amounts = []
+        for area in doc.get("explosion") or []:
+            area_total = 0
+            prototypes = []
+            for proto in area.get("prototypes") or []:
+                quantities = dict(proto.get("quantities") or {})
+                for field in FIELDS:
+                    if quantities.get(field) is not None:
+                        c = next(scaled)
+                        quantities[field] = from_cents(c)
+                        area_total += c
+                prototypes.append({**proto, "quantities": quantities})
+            amounts.append({**area, "prototypes": prototypes, "total": from_cents(area_total)})
+            gran_total += area_total
+        result.append({"explosion": amounts, "gran_total": from_cents(gran_total)})
+    return result
@@ -5,6 +5,7 @@ from api.constants import EQUIPMENTS, CARPENTRY, CATS
 from api.repositories.volumetry_repository import VolumetryRepository
 from api.repositories.material_repository import MaterialRepository
 from api.repositories.quantification_repository import QuantificationRepository
+from api.utils.task_coalescing import KeyBusy, claim, schedule
 
 
 EQUIPMENTS_NORM = {normalize_strict(e) for e in EQUIPMENTS}
@@ -15,8 +16,7 @@ def r2(x: float) -> float:
     return round(float(x or 0), 2)
 
 
-@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
-def quantify(self, client_id: str, front: str, prototype: str) -> bool:
+def run_quantify(client_id: str, front: str, prototype: str) -> bool:
     v_repo = VolumetryRepository()
     m_repo = MaterialRepository()
     q_repo = QuantificationRepository()
@@ -144,3 +144,31 @@ def quantify(self, client_id: str, front: str, prototype: str) -> bool:
     q_repo.upsert_one(query, set_data)
 
     return True
+
+
+def _quantify_key(client_id: str, front: str, prototype: str) -> str:
+    return f"{client_id}:{front}:{prototype}"
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def quantify(self, client_id: str, front: str, prototype: str) -> bool:
+    return run_quantify(client_id, front, prototype)
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def coalesced_quantify(self, client_id: str, front: str, prototype: str) -> bool:
+    """Una cuantificación a la vez por cliente/front/prototype, con la volumetría más nueva."""
+    try:
+        with claim(self, 'quantify', _quantify_key(client_id, front, prototype),
+                   (client_id, front, prototype)):
+            return run_quantify(client_id, front, prototype)
+    except KeyBusy:
+        # La ejecución en curso la vuelve a encolar al liberar el lock
+        return False
+
+
+def schedule_quantify(client_id: str, front: str, prototype: str) -> bool:
+    """Encola (con debounce) la cuantificación; ediciones en ráfaga se juntan en una."""
+    return schedule(coalesced_quantify, 'quantify',
+                    _quantify_key(client_id, front, prototype),
+                    (client_id, front, prototype))
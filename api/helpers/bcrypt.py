@@ -1,9 +1,69 @@
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from django.conf import settings
+
+# bcrypt libera el GIL: varios hashes corren en paralelo fuera del event loop
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'BCRYPT_MAX_WORKERS', 4),
+    thread_name_prefix='bcrypt')
+
+# Verificaciones en curso por cuenta; solo se toca desde el event loop
+_in_flight: dict[str, int] = {}
+
+
+class TooManyAttemptsError(Exception):
+    pass
+
+
+def _rounds() -> int:
+    return getattr(settings, 'BCRYPT_ROUNDS', 12)
+
+
+def _as_bytes(value) -> bytes:
+    return value.encode('utf-8') if isinstance(value, str) else bytes(value)
 
 
 def encrypt_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=_rounds()))
 
 
 def verify_password(password, hash_password):
     return bcrypt.checkpw(password.encode('utf-8'), hash_password)
+
+
+def needs_rehash(hash_password) -> bool:
+    """El hash guardado usa un costo distinto a BCRYPT_ROUNDS."""
+    try:
+        return int(_as_bytes(hash_password).split(b'$')[2]) != _rounds()
+    except (IndexError, ValueError):
+        return False
+
+
+async def encrypt_password_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, encrypt_password, password)
+
+
+async def verify_password_async(password, hash_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, password, hash_password)
+
+
+@asynccontextmanager
+async def account_slot(account: str):
+    """
+    Limita las verificaciones simultáneas de una misma cuenta
+    (BCRYPT_PER_ACCOUNT) para que una ráfaga no acapare el pool.
+    """
+    key = (account or '').lower()
+    if _in_flight.get(key, 0) >= getattr(settings, 'BCRYPT_PER_ACCOUNT', 1):
+        raise TooManyAttemptsError
+    _in_flight[key] = _in_flight.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        _in_flight[key] -= 1
+        if not _in_flight[key]:
+            del _in_flight[key]
@@ -0,0 +1,17 @@
+import json
+
+
+def get_body_data(request):
+    """
+    Cuerpo del request para vistas Django async (sin request.data de DRF).
+    - JSON si el content-type lo indica; si no, datos de formulario.
+    - Cuerpo vacío o inválido regresa {} (las validaciones de campos
+      requeridos responden el error).
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST.dict()
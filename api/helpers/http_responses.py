@@ -1,4 +1,4 @@
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified
 from rest_framework.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
@@ -35,6 +35,9 @@ def build_response_with_pagination(paginator, page, data):
         "page": page.number,
         "data": data
     }
+    # Modo cursor (keyset): el cliente pide la siguiente página con ?after=
+    if hasattr(page, "next_cursor"):
+        payload["next_cursor"] = page.next_cursor
     return JsonResponse(payload, safe=False)
 
 
@@ -56,6 +59,12 @@ def created(data):
     return response
 
 
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
 def not_content():
     return HttpResponse(status=HTTP_204_NO_CONTENT)
 
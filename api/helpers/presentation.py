@@ -0,0 +1,62 @@
+import math
+import re
+from functools import lru_cache
+from typing import Any, Optional
+from api.constants import FIXED_PRESENTATIONS
+from api.helpers.formats import to_float
+
+_NUMBERS = re.compile(r'\d+(?:\.\d+)?')
+
+
+@lru_cache(maxsize=1024)
+def _parse_presentation(presentation: str) -> tuple:
+    """Cantidades de la presentación (ya en mayúsculas), ordenadas."""
+    results = [value for key, value in FIXED_PRESENTATIONS.items() if key == presentation]
+    results.extend(
+        float(n) if '.' in n else int(n)
+        for n in _NUMBERS.findall(presentation))
+    return tuple(sorted(set(results), key=lambda x: float(x)))
+
+
+def presentation_amount(presentation: Optional[str]):
+    """
+    Unidades por presentación: 'CAJA 12 PZAS' -> 12, 'PAR' -> 2.
+    Con varias cantidades regresa la lista ordenada; sin ninguna, 1.
+    El parseo se memoiza: el catálogo repite pocas presentaciones.
+    """
+    if not presentation or presentation.strip() == "":
+        return None
+
+    results = _parse_presentation(presentation.upper())
+
+    if not results:
+        return 1
+    elif len(results) == 1:
+        return results[0]
+    else:
+        # Copia: el resultado cacheado no debe mutarse
+        return list(results)
+
+
+def estimate_purchase(total: Any, material: dict) -> dict:
+    """
+    Cantidad a comprar y costo (inventory_price) para `total` unidades, con
+    el mismo criterio de la orden de compra: si el material se surte por
+    presentación (automation) se redondea hacia arriba a presentaciones.
+    """
+    total = to_float(total, 0.0, min_value=0.0)
+    price = to_float(material.get('inventory_price'), 0.0)
+    quantity = None
+    total_quantity = total
+
+    if material.get('presentation') and material.get('automation'):
+        amount = presentation_amount(material['presentation'])
+        quantity = amount[0] if isinstance(amount, list) else amount
+        if quantity:
+            total_quantity = math.ceil(total / float(quantity))
+
+    return {
+        'quantity': quantity,
+        'total_quantity': total_quantity,
+        'total': round(float(total_quantity) * price, 2),
+    }
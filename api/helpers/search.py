@@ -0,0 +1,139 @@
+import re
+import unicodedata
+from typing import Any, Iterable, Optional
+
+# Campo donde se guardan los tokens normalizados de búsqueda
+SEARCH_TOKENS_FIELD = "search_tokens"
+
+# Campos que alimentan los tokens de búsqueda por colección.
+# MongoDBHandler los mantiene en cada escritura sobre estas colecciones.
+SEARCH_FIELDS = {
+    "materials": (
+        "concept", "measurement", "supplier_code",
+        "sku", "presentation", "reference",
+    ),
+    "inventory": (
+        "material.concept", "material.measurement", "material.supplier_code",
+        "material.sku", "material.presentation", "material.reference",
+    ),
+    "purchase_orders": ("project", "subject", "number"),
+    # Catálogos pequeños: usan los mismos tokens aunque no declaren índice
+    "clients": ("name", "email"),
+    "employees": ("number", "name", "activity"),
+    "prototypes": ("client_name", "name", "front"),
+    "companies": ("name", "rfc", "address", "city", "state", "email"),
+    "home_production": ("front", "od"),
+    "sections": ("parent", "level_1", "value"),
+    "suppliers": ("name", "address", "email"),
+    "users": ("name", "lastname", "email"),
+}
+
+# Máximo de términos que se toman de `q` (evita queries enormes)
+MAX_QUERY_TOKENS = 8
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Partes de un token que mezcla letras y números: 'tubo500mm' -> tubo, 500, mm
+_PART_RE = re.compile(r"[a-z]+|[0-9]+")
+
+# Filtro que no coincide con ningún documento (q sin términos buscables)
+MATCH_NOTHING = {SEARCH_TOKENS_FIELD: {"$in": []}}
+
+
+def fold(value: Any) -> str:
+    """Quita acentos y pasa a minúsculas: 'Válvula Ñ' -> 'valvula n'."""
+    if value is None:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value))
+    s = s.encode("ascii", "ignore").decode()
+    return s.casefold()
+
+
+def _terms(value: Any) -> list[str]:
+    return list(dict.fromkeys(_TOKEN_RE.findall(fold(value))))
+
+
+def tokenize(value: Any) -> list[str]:
+    """
+    Separa un texto normalizado en tokens alfanuméricos (sin repetir). Los
+    que mezclan letras y números también se parten: 'AB123' -> ab123, ab,
+    123, así buscar '123' encuentra el sku.
+    """
+    tokens = {}
+    for term in _terms(value):
+        tokens[term] = None
+        parts = _PART_RE.findall(term)
+        if len(parts) > 1:
+            tokens.update(dict.fromkeys(parts))
+    return list(tokens)
+
+
+def _get_path(doc: dict, path: str):
+    current = doc
+    for part in path.split("."):
+        if not isinstance(current, dict):
+            return None
+        current = current.get(part)
+    return current
+
+
+def build_search_tokens(doc: dict, fields: Iterable[str]) -> list[str]:
+    """Tokens ordenados a partir de los campos (admite rutas 'a.b') del documento."""
+    tokens = set()
+    for field in fields:
+        value = _get_path(doc, field)
+        if isinstance(value, (list, tuple)):
+            for v in value:
+                tokens.update(tokenize(v))
+        elif value is not None:
+            tokens.update(tokenize(value))
+    return sorted(tokens)
+
+
+def touches_fields(update_ops: dict, fields: Iterable[str]) -> bool:
+    """
+    Indica si un update (con operadores o doc simple) modifica alguno
+    de los campos indexados para búsqueda.
+    """
+    if any(k.startswith("$") for k in update_ops.keys()):
+        keys = [k for op in update_ops.values() if isinstance(op, dict)
+                for k in op.keys()]
+    else:
+        keys = list(update_ops.keys())
+
+    for key in keys:
+        for field in fields:
+            if key == field or field.startswith(f"{key}.") or key.startswith(f"{field}."):
+                return True
+    return False
+
+
+def search_filter(q: Any) -> Optional[dict]:
+    """
+    Filtro por prefijo sobre `search_tokens`: cada término de `q` debe ser
+    prefijo de algún token. Las regex ancladas (^) sin opciones usan el
+    índice del campo en lugar de recorrer la colección.
+    Sin `q` regresa None; si `q` no trae términos buscables (solo
+    puntuación) regresa un filtro que no coincide con nada.
+    """
+    if q is None or not str(q).strip():
+        return None
+    # Los términos van completos: las partes ya están en los tokens guardados
+    terms = _terms(q)[:MAX_QUERY_TOKENS]
+    if not terms:
+        return dict(MATCH_NOTHING)
+    clauses = [{SEARCH_TOKENS_FIELD: {"$regex": f"^{re.escape(t)}"}}
+               for t in terms]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def apply_search(filters: dict, q: Any) -> dict:
+    """Agrega el filtro de búsqueda de `q` a `filters` (in-place)."""
+    condition = search_filter(q)
+    if not condition:
+        return filters
+    if "$and" in filters or "$and" in condition:
+        filters["$and"] = filters.get("$and", []) + \
+            condition.get("$and", [condition])
+    else:
+        filters.update(condition)
+    return filters
@@ -0,0 +1,25 @@
+import json
+from django.core.management.base import BaseCommand
+from api.utils.cache_metrics import metrics, print_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Muestra (o reinicia) las métricas de cache por prefijo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", help="Solo este prefijo.")
+        parser.add_argument("--json", action="store_true",
+                            help="Imprime el detalle completo en JSON.")
+        parser.add_argument("--reset", action="store_true",
+                            help="Borra las métricas acumuladas.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["reset"]:
+            metrics.reset(prefix)
+            self.stdout.write(self.style.SUCCESS("✅ Métricas de cache reiniciadas"))
+            return
+        if options["json"]:
+            self.stdout.write(json.dumps(metrics.snapshot(prefix), indent=2))
+            return
+        print_cache_stats(prefix, stream=self.stdout)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.index_utils import ensure_indexes, find_missing_indexes
+
+
+class Command(BaseCommand):
+    help = "Crea los índices MongoDB declarados en INDEXES de cada repositorio."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Solo reporta los índices faltantes, sin crearlos.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            missing = find_missing_indexes()
+            if not missing:
+                self.stdout.write(self.style.SUCCESS(
+                    "Todos los índices declarados existen."))
+                return
+            for collection, names in missing.items():
+                self.stdout.write(self.style.WARNING(
+                    f"{collection}: {', '.join(names)}"))
+            return
+
+        failed = False
+        for collection, result in ensure_indexes().items():
+            if isinstance(result, Exception):
+                failed = True
+                self.stdout.write(self.style.ERROR(f"{collection}: {result}"))
+            else:
+                self.stdout.write(f"{collection}: {', '.join(result)}")
+
+        if failed:
+            # Código de salida != 0 para que el deploy no siga sin índices
+            raise CommandError("Algunos índices no se pudieron crear.")
+        else:
+            self.stdout.write(self.style.SUCCESS("Índices verificados."))
@@ -0,0 +1,43 @@
+from django.conf import settings
+from pymongo import UpdateOne
+from django.core.management.base import BaseCommand
+from api_sataiga.handlers.mongo_client import get_mongo_client
+from api.helpers.search import SEARCH_FIELDS, SEARCH_TOKENS_FIELD, build_search_tokens
+
+
+class Command(BaseCommand):
+    help = "Recalcula los tokens de búsqueda (search_tokens) de las colecciones indexadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Documentos por bulk_write.",
+        )
+
+    def handle(self, *args, **options):
+        db = get_mongo_client()[settings.MONGO_DB['NAME']]
+        batch_size = max(options["batch_size"], 1)
+
+        for collection_name, fields in SEARCH_FIELDS.items():
+            collection = db[collection_name]
+            projection = {f: 1 for f in fields}
+            projection[SEARCH_TOKENS_FIELD] = 1
+
+            ops, updated = [], 0
+            for doc in collection.find({}, projection, batch_size=batch_size):
+                tokens = build_search_tokens(doc, fields)
+                if doc.get(SEARCH_TOKENS_FIELD) == tokens:
+                    continue
+                ops.append(UpdateOne({'_id': doc['_id']},
+                                     {'$set': {SEARCH_TOKENS_FIELD: tokens}}))
+                if len(ops) >= batch_size:
+                    updated += collection.bulk_write(ops, ordered=False).modified_count
+                    ops = []
+            if ops:
+                updated += collection.bulk_write(ops, ordered=False).modified_count
+
+            self.stdout.write(f"{collection_name}: {updated} documento(s) actualizado(s)")
+
+        self.stdout.write(self.style.SUCCESS("Tokens de búsqueda actualizados."))
@@ -1,2 +1,3 @@
 from .authentication import BellartiAuthenticationMiddleware
 from .exception import ExceptionMiddleware
+from .mongo_queries import MongoQueryMiddleware
@@ -1,13 +1,57 @@
+from bson import ObjectId
+from django.conf import settings
 from rest_framework import exceptions
 from api_sataiga.functions import decode_user
 from rest_framework import authentication
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
+from api.helpers.validations import objectid_validation
+from api.utils.cache_utils import cache_result, cache_tag, invalidate_cache
+
+# Prefijo de cache de los usuarios autenticados (token -> usuario)
+AUTH_CACHE_PREFIX = "auth_users"
+ACTIVE_STATUS = 1
 
 
 class InvalidAccessTokenError(Exception):
     pass
 
 
+def _user_tag(user_id) -> str:
+    return cache_tag({'user_id': str(user_id)}, ['user_id'])
+
+
+def invalidate_auth_user(user_id=None):
+    """
+    Descarta el usuario cacheado (o todos si no se indica), ej. al cambiar
+    su estatus, rol o permisos, o los permisos de un rol.
+    """
+    invalidate_cache(AUTH_CACHE_PREFIX, [_user_tag(user_id)] if user_id else None)
+
+
+class AuthenticatedUser:
+    """Usuario del request con sus permisos ya resueltos."""
+
+    is_authenticated = True
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.id = data['_id']
+        self.role = data.get('role')
+        self.permissions = data.get('permissions') or {}
+        self._abilities = set(data.get('abilities') or [])
+
+    def can(self, subject: str, action: str = 'read') -> bool:
+        if 'all' in self.permissions:
+            return True
+        return f'{subject}:{action}' in self._abilities
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+
 class BellartiAuthenticationMiddleware(authentication.BaseAuthentication):
     def authenticate(self, request):
         token = request.headers.get("authorization", None)
@@ -26,10 +70,50 @@ class BellartiAuthenticationMiddleware(authentication.BaseAuthentication):
 
     def get_user_from_token(self, token: str):
         payload = decode_user(token)
-        with MongoDBHandler('user') as db:
-            user = db.extract({'_id': payload['_id'], })
+        user_id = payload.get('_id')
+        if not objectid_validation(user_id):
+            raise InvalidAccessTokenError
+
+        user = self._load_user(user_id)
+        if user is None:
+            raise InvalidAccessTokenError
+        if user.get('status') != ACTIVE_STATUS:
+            raise exceptions.AuthenticationFailed('El usuario no está activo.')
+
+        return AuthenticatedUser(user)
 
-            if user is None:
-                raise InvalidAccessTokenError
+    @cache_result(
+        prefix=AUTH_CACHE_PREFIX,
+        ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 60),
+        tag=lambda self, user_id: _user_tag(user_id),
+        local_ttl=getattr(settings, 'AUTH_USER_LOCAL_TTL', 15),
+    )
+    def _load_user(self, user_id: str):
+        """Usuario + rol + permisos resueltos; un solo query por TTL."""
+        with MongoDBHandler('users') as db:
+            users = db.extract(
+                {'_id': ObjectId(user_id)},
+                projection={'password': 0, 'search_tokens': 0})
+            if not users:
+                return None
+            user = users[0]
+            roles = MongoDBHandler.find(
+                db, 'roles', {'_id': ObjectId(user['role_id'])},
+                projection={'value': 1}) \
+                if objectid_validation(user.get('role_id')) else None
 
-            return user
+        permissions = user.get('permissions') or {}
+        return {
+            '_id': str(user['_id']),
+            'name': user.get('name'),
+            'lastname': user.get('lastname'),
+            'email': user.get('email'),
+            'status': user.get('status'),
+            'role_id': user.get('role_id'),
+            'role': roles[0].get('value') if roles else None,
+            'permissions': permissions,
+            'abilities': sorted(
+                f'{subject}:{action}'
+                for subject, actions in permissions.items()
+                for action in (actions or [])),
+        }
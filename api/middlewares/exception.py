@@ -1,18 +1,30 @@
 import logging
 import traceback
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse
 
 log = logging.getLogger(__name__)
 
 
 class ExceptionMiddleware:
+    # Compatible con vistas async (login) sin forzar el modo síncrono
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
         return response
 
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
     def process_exception(self, request, exception):
         log.error("Ocurrió una excepción: %s", exception)
         log.error("Detalles del traceback:\n%s", traceback.format_exc())
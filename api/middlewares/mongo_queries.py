@@ -0,0 +1,36 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from api_sataiga.handlers.mongo_monitor import track
+
+
+class MongoQueryMiddleware:
+    """
+    Atribuye al request los comandos Mongo que ejecuta y los reporta en
+    los headers X-Mongo-Queries y X-Mongo-Time-ms.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with track(f"{request.method} {request.path}") as stats:
+            response = self.get_response(request)
+        return self._report(response, stats)
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto: los queries del hilo se suman aquí
+        with track(f"{request.method} {request.path}") as stats:
+            response = await self.get_response(request)
+        return self._report(response, stats)
+
+    @staticmethod
+    def _report(response, stats):
+        response['X-Mongo-Queries'] = str(stats.count)
+        response['X-Mongo-Time-ms'] = f"{stats.duration_ms:.1f}"
+        return response
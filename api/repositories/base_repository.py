@@ -1,6 +1,9 @@
 from bson import ObjectId
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from api.helpers.validations import objectid_validation
+from api.constants import LOOKUP_SUFFIX
 
 
 class BaseRepository:
@@ -10,6 +13,11 @@ class BaseRepository:
     """
 
     COLLECTION: str = None
+    CURSOR_SORT = [("created_at", -1), ("_id", -1)]
+    # Índices declarados por la subclase; se construyen con `manage.py ensure_indexes`
+    INDEXES: list[IndexModel] = []
+    # Etapas ($lookup) del read model de listados; ver find_joined_page
+    JOIN_STAGES: list[dict] = []
 
     def __init__(self):
         if not self.COLLECTION:
@@ -21,6 +29,188 @@ class BaseRepository:
         with self.db_handler as db:
             return db.extract(query=query, order_field=order_field, order=order, projection=projection)
 
+    def iter_all(self, query=None, projection=None, sort=None, batch_size=500):
+        """
+        Recorre los documentos como generador (exportaciones y tareas en lote).
+        `sort` es una lista de tuplas (campo, orden).
+        """
+        with self.db_handler as db:
+            yield from db.iter_extract(
+                query=query, projection=projection, sort=sort, batch_size=batch_size)
+
+    def find_page(self, query=None, sort=None, page=1, page_size=10, projection=None):
+        """
+        Obtiene una sola página de documentos aplicando skip/limit en MongoDB.
+        `sort` es una lista de tuplas (campo, orden), ej. [('concept', 1), ('_id', 1)].
+        """
+        page = max(int(page or 1), 1)
+        page_size = max(int(page_size or 1), 1)
+        with self.db_handler as db:
+            return db.extract_page(
+                query=query,
+                sort=sort,
+                skip=(page - 1) * page_size,
+                limit=page_size,
+                projection=projection,
+            )
+
+    @classmethod
+    def cursor_index(cls) -> IndexModel:
+        """Índice compuesto que respalda find_after (declararlo en INDEXES)."""
+        return IndexModel(cls.CURSOR_SORT)
+
+    # Opciones que distinguen un índice además de sus llaves
+    INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+    @classmethod
+    def _index_spec(cls, info: dict) -> tuple:
+        """Llaves + opciones comparables de un índice (declarado o existente)."""
+        return (
+            tuple((field, order) for field, order in dict(info["key"]).items()),
+            tuple((option, info[option]) for option in cls.INDEX_OPTIONS
+                  if info.get(option) not in (None, False)),
+        )
+
+    def ensure_indexes(self) -> list[str]:
+        """
+        Crea los índices declarados en INDEXES (idempotente). Se crean uno
+        por uno para que un conflicto no impida los demás; si alguno falla
+        se relanza el primer error después de intentar todos.
+        """
+        if not self.INDEXES:
+            return []
+        created, errors = [], []
+        with self.db_handler as db:
+            for index in self.INDEXES:
+                try:
+                    created.extend(db.create_indexes([index]))
+                except PyMongoError as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return created
+
+    def missing_indexes(self) -> list[str]:
+        """
+        Nombres de los índices declarados que no existen en MongoDB con las
+        mismas llaves y opciones (unique, partialFilterExpression, ...).
+        """
+        if not self.INDEXES:
+            return []
+        with self.db_handler as db:
+            existing = [self._index_spec(info) for info in db.index_information().values()]
+        return [
+            index.document["name"] for index in self.INDEXES
+            if self._index_spec(index.document) not in existing
+        ]
+
+    def find_after(self, query=None, after=None, limit=10, projection=None):
+        """
+        Paginación por cursor (keyset), del más reciente al más antiguo.
+        `after` es el cursor decodificado {'created_at', '_id'} del último
+        documento entregado; si es None regresa la primera página.
+        """
+        conditions = [query] if query else []
+        if after:
+            created_at, last_id = after.get("created_at"), after.get("_id")
+            if created_at is None:
+                conditions.append({"created_at": None, "_id": {"$lt": last_id}})
+            else:
+                conditions.append({"$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": last_id}},
+                    {"created_at": None},
+                ]})
+
+        if not conditions:
+            final_query = {}
+        elif len(conditions) == 1:
+            final_query = conditions[0]
+        else:
+            final_query = {"$and": conditions}
+
+        with self.db_handler as db:
+            return db.extract_page(
+                query=final_query,
+                sort=self.CURSOR_SORT,
+                limit=limit,
+                projection=projection,
+            )
+
+    @staticmethod
+    def lookup_one(from_collection: str, local_field: str, projection: dict = None, as_field: str = None):
+        """
+        Etapas $lookup para traer un documento relacionado por _id cuando el
+        campo local guarda el ObjectId como string. El documento queda en
+        `<local_field>_ref` (None si no existe).
+        """
+        as_field = as_field or f"{local_field}{LOOKUP_SUFFIX}"
+        pipeline = [{"$match": {"$expr": {"$eq": ["$_id", "$$ref_id"]}}}]
+        if projection:
+            pipeline.append({"$project": projection})
+        pipeline.append({"$limit": 1})
+        return [
+            {"$lookup": {
+                "from": from_collection,
+                "let": {"ref_id": {"$convert": {
+                    "input": f"${local_field}", "to": "objectId",
+                    "onError": None, "onNull": None}}},
+                "pipeline": pipeline,
+                "as": as_field,
+            }},
+            {"$set": {as_field: {"$ifNull": [
+                {"$arrayElemAt": [f"${as_field}", 0]}, None]}}},
+        ]
+
+    def aggregate(self, pipeline: list[dict]):
+        with self.db_handler as db:
+            return db.aggregate(pipeline)
+
+    def find_joined(self, query=None, sort=None, joined_match=None):
+        """
+        Todos los documentos del filtro con las relaciones de JOIN_STAGES.
+        `joined_match` filtra en MongoDB por campos de los documentos
+        relacionados (ej. {'material_id_ref.division': {'$in': [...]}}).
+        """
+        pipeline = [{"$match": query or {}}]
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+        pipeline += self.JOIN_STAGES
+        if joined_match:
+            pipeline.append({"$match": joined_match})
+        return self.aggregate(pipeline)
+
+    def find_joined_page(self, query=None, sort=None, page=1, page_size=10):
+        """
+        Read model paginado en un solo viaje: $match (índice) y $sort, luego
+        $facet con la página (las etapas de JOIN_STAGES solo corren sobre
+        esas filas) y el total. Retorna (rows, total).
+        """
+        page = max(int(page or 1), 1)
+        page_size = max(int(page_size or 1), 1)
+
+        pipeline = [{"$match": query or {}}]
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+        pipeline.append({"$facet": {
+            "results": [
+                {"$skip": (page - 1) * page_size},
+                {"$limit": page_size},
+                *self.JOIN_STAGES,
+            ],
+            "total": [{"$count": "count"}],
+        }})
+
+        result = self.aggregate(pipeline)
+        facet = result[0] if result else {}
+        total = facet.get("total") or []
+        return facet.get("results", []), (total[0]["count"] if total else 0)
+
+    def count(self, query=None):
+        """Cuenta los documentos que cumplen el filtro (count_documents)."""
+        with self.db_handler as db:
+            return db.count(query)
+
     def find_by_id(self, _id: str, filters: dict = None):
         if not objectid_validation(_id):
             return None
@@ -53,6 +243,47 @@ class BaseRepository:
         with self.db_handler as db:
             return db.insert(data)
 
+    def insert_many(self, docs: list[dict], ordered: bool = False):
+        """
+        Inserta varios documentos en un solo viaje a MongoDB.
+        Retorna {'inserted', 'updated', 'matched', 'inserted_ids'}.
+        """
+        with self.db_handler as db:
+            return db.insert_many(docs, ordered=ordered)
+
+    def bulk_upsert(self, key_fields: list[str], docs: list[dict], ordered: bool = False,
+                    on_insert: dict = None):
+        """
+        Upsert en lote por clave natural. `on_insert` son campos que solo se
+        escriben al crear el documento (ej. {"status": 0}).
+        Ejemplo:
+            repo.bulk_upsert(["client_id", "front", "prototype", "material_id"], docs)
+        Retorna {'inserted', 'updated', 'matched'}.
+        """
+        if not key_fields:
+            raise ValueError("key_fields no puede estar vacío.")
+        with self.db_handler as db:
+            return db.bulk_upsert(key_fields, docs, ordered=ordered, on_insert=on_insert)
+
+    def bulk_update(self, updates: list[tuple], ordered: bool = False):
+        """
+        Actualiza en lote. `updates` es una lista de (query, update_data);
+        si query es un str se toma como _id.
+        Retorna {'inserted', 'updated', 'matched'}.
+        """
+        normalized = []
+        for query, update_data in updates:
+            if isinstance(query, str):
+                if not objectid_validation(query):
+                    continue
+                query = {'_id': ObjectId(query)}
+            if not isinstance(query, dict) or not query:
+                raise ValueError("query debe ser un dict no vacío.")
+            normalized.append((query, update_data))
+
+        with self.db_handler as db:
+            return db.bulk_update(normalized, ordered=ordered)
+
     def update(self, _id: str, update_data: dict, upsert: bool = False):
         """
         Realiza una actualización de documento en MongoDB.
@@ -1,6 +1,11 @@
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class ExplosionRepository(BaseRepository):
     """Acceso a la colección 'explosion' en MongoDB."""
     COLLECTION = 'explosion'
+    INDEXES = [
+        IndexModel([("home_production_id", 1), ("material_id", 1), ("supplier_id", 1)]),
+        IndexModel([("home_production_id", 1), ("supplier_id", 1)]),
+    ]
@@ -0,0 +1,11 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class InboundRepository(BaseRepository):
+    """Acceso a la colección 'inbounds' en MongoDB."""
+    COLLECTION = 'inbounds'
+    INDEXES = [
+        BaseRepository.cursor_index(),
+        IndexModel([("items.material_id", 1), ("status", 1)]),
+    ]
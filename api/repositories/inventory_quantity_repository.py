@@ -0,0 +1,11 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class InventoryQuantityRepository(BaseRepository):
+    """Acceso a la colección 'inventory_quantity' en MongoDB."""
+    COLLECTION = 'inventory_quantity'
+    INDEXES = [
+        IndexModel([("material_id", 1), ("status", 1)]),
+        IndexModel([("inventory_id", 1)]),
+    ]
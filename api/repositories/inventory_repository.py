@@ -0,0 +1,60 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class InventoryRepository(BaseRepository):
+    """Acceso a la colección 'inventory' en MongoDB."""
+    COLLECTION = 'inventory'
+    INDEXES = [
+        IndexModel([("material.id", 1)]),
+        IndexModel([("material.supplier_id", 1)]),
+        IndexModel([("search_tokens", 1)]),
+        IndexModel([("material.concept", 1), ("_id", 1)]),
+    ]
+    JOIN_STAGES = [
+        # Disponibilidad (antes: InventoryUseCase.get_material_availability por fila)
+        {"$lookup": {
+            "from": "inventory_quantity",
+            "localField": "material.id",
+            "foreignField": "material_id",
+            "pipeline": [{"$match": {"status": {"$lt": 2}}}],
+            "as": "availability_ref",
+        }},
+        # Última entrada con el material (solo sus partidas)
+        {"$lookup": {
+            "from": "inbounds",
+            "localField": "material.id",
+            "foreignField": "items.material_id",
+            "let": {"material_id": "$material.id"},
+            "pipeline": [
+                {"$match": {"status": 1}},
+                {"$sort": {"updated_at": -1}},
+                {"$limit": 1},
+                {"$set": {"items": {"$filter": {
+                    "input": "$items",
+                    "cond": {"$eq": ["$$this.material_id", "$$material_id"]},
+                }}}},
+                *BaseRepository.lookup_one("suppliers", "supplier_id", {"name": 1}),
+                *BaseRepository.lookup_one(
+                    "purchase_orders", "purchase_order_id", {"number": 1}),
+            ],
+            "as": "last_inbound_ref",
+        }},
+        # Última salida con el material y el nombre del cliente
+        {"$lookup": {
+            "from": "outputs",
+            "localField": "material.id",
+            "foreignField": "items.id",
+            "pipeline": [
+                {"$match": {"status": {"$in": [1, 3]}}},
+                {"$sort": {"updated_at": -1}},
+                {"$limit": 1},
+                *BaseRepository.lookup_one("clients", "client_id", {"name": 1}),
+            ],
+            "as": "last_output_ref",
+        }},
+        {"$set": {
+            "last_inbound_ref": {"$ifNull": [{"$arrayElemAt": ["$last_inbound_ref", 0]}, None]},
+            "last_output_ref": {"$ifNull": [{"$arrayElemAt": ["$last_output_ref", 0]}, None]},
+        }},
+    ]
@@ -1,6 +1,10 @@
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class LotRepository(BaseRepository):
     """Acceso a la colección 'lots' en MongoDB."""
     COLLECTION = 'lots'
+    INDEXES = [
+        IndexModel([("home_production_id", 1)]),
+    ]
@@ -1,5 +1,6 @@
 from typing import Any, Iterable, Optional
 from bson import ObjectId
+from pymongo import IndexModel
 
 from api.repositories.base_repository import BaseRepository
 from api.helpers.validations import objectid_validation
@@ -8,6 +9,13 @@ from api.helpers.validations import objectid_validation
 class MaterialRepository(BaseRepository):
     """Acceso a la colección 'materials' en MongoDB."""
     COLLECTION = "materials"
+    INDEXES = [
+        # Mismas opciones que el índice único existente del que depende
+        # with_unique_sku; redeclararlo distinto choca con IndexOptionsConflict
+        IndexModel([("sku", 1)], unique=True, name="sku_1"),
+        IndexModel([("supplier_id", 1), ("division", 1)]),
+        IndexModel([("search_tokens", 1)]),
+    ]
 
     def find_many_by_ids(
         self,
@@ -1,6 +1,12 @@
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class NotificationRepository(BaseRepository):
     """Acceso a la colección 'notifications' en MongoDB."""
     COLLECTION = 'notifications'
+    INDEXES = [
+        BaseRepository.cursor_index(),
+        IndexModel([("user_id", 1)]),
+        IndexModel([("roles", 1)]),
+    ]
@@ -0,0 +1,11 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class OutputRepository(BaseRepository):
+    """Acceso a la colección 'outputs' en MongoDB."""
+    COLLECTION = 'outputs'
+    INDEXES = [
+        BaseRepository.cursor_index(),
+        IndexModel([("items.id", 1), ("status", 1)]),
+    ]
@@ -0,0 +1,24 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class PORequirementRepository(BaseRepository):
+    """
+    Read model 'po_requirements': por OD, proveedor y material, lo requerido
+    por la explosión, lo ya ordenado y lo pendiente por ordenar.
+    """
+    COLLECTION = 'po_requirements'
+    MATERIAL_PROJECTION = {
+        "concept": 1, "measurement": 1, "supplier_code": 1, "unit_price": 1,
+        "inventory_price": 1, "market_price": 1, "price_difference": 1,
+        "automation": 1, "images": 1, "sku": 1, "presentation": 1,
+        "reference": 1, "division": 1,
+    }
+    INDEXES = [
+        IndexModel([("home_production_id", 1), ("supplier_id", 1), ("material_id", 1)],
+                   unique=True),
+        IndexModel([("home_production_id", 1), ("supplier_id", 1), ("position", 1)]),
+    ]
+    JOIN_STAGES = [
+        *BaseRepository.lookup_one("materials", "material_id", MATERIAL_PROJECTION),
+    ]
@@ -1,6 +1,10 @@
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class PrototypeRepository(BaseRepository):
     """Acceso a la colección 'prototypes' en MongoDB."""
     COLLECTION = 'prototypes'
+    INDEXES = [
+        IndexModel([("client_id", 1), ("front", 1)]),
+    ]
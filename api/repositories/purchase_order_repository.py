@@ -1,7 +1,18 @@
 from bson import ObjectId
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class PurchaseOrderRepository(BaseRepository):
     """Acceso a la colección 'purchase_orders' en MongoDB."""
     COLLECTION = 'purchase_orders'
+    INDEXES = [
+        BaseRepository.cursor_index(),
+        IndexModel([("home_production_id", 1), ("supplier_id", 1), ("status", 1)]),
+        IndexModel([("search_tokens", 1)]),
+    ]
+    JOIN_STAGES = [
+        *BaseRepository.lookup_one("suppliers", "supplier_id"),
+        *BaseRepository.lookup_one("users", "request_by", {"name": 1, "lastname": 1}),
+        *BaseRepository.lookup_one("users", "approved_by", {"name": 1, "lastname": 1}),
+    ]
@@ -1,6 +1,10 @@
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class QuantificationRepository(BaseRepository):
     """Acceso a la colección 'quantification' en MongoDB."""
     COLLECTION = 'quantification'
+    INDEXES = [
+        IndexModel([("client_id", 1), ("front", 1), ("prototype", 1)]),
+    ]
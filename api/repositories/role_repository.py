@@ -0,0 +1,10 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class RoleRepository(BaseRepository):
+    """Acceso a la colección 'roles' en MongoDB."""
+    COLLECTION = 'roles'
+    INDEXES = [
+        IndexModel([("value", 1)], unique=True),
+    ]
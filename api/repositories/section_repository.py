@@ -0,0 +1,10 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class SectionRepository(BaseRepository):
+    """Acceso a la colección 'sections' en MongoDB."""
+    COLLECTION = 'sections'
+    INDEXES = [
+        IndexModel([("value", 1)], unique=True),
+    ]
@@ -0,0 +1,10 @@
+from pymongo import IndexModel
+from api.repositories.base_repository import BaseRepository
+
+
+class UserRepository(BaseRepository):
+    """Acceso a la colección 'users' en MongoDB."""
+    COLLECTION = 'users'
+    INDEXES = [
+        IndexModel([("email", 1)], unique=True),
+    ]
@@ -1,6 +1,10 @@
+from pymongo import IndexModel
 from api.repositories.base_repository import BaseRepository
 
 
 class VolumetryRepository(BaseRepository):
     """Acceso a la colección 'volumetries' en MongoDB."""
     COLLECTION = 'volumetries'
+    INDEXES = [
+        IndexModel([("client_id", 1), ("front", 1), ("prototype", 1), ("material_id", 1)]),
+    ]
@@ -1,10 +1,18 @@
 from rest_framework import serializers
 from api.models import Explosion
-from api_sataiga.handlers.mongodb_handler import MongoDBHandler
-from bson import ObjectId
+from api.serializers.loaders import BatchLoader, BatchListSerializer, BatchResolveMixin
 
 
-class ExplosionSerializer(serializers.ModelSerializer):
+class ExplosionSerializer(BatchResolveMixin, serializers.ModelSerializer):
+    loaders = {
+        'home_production': BatchLoader(
+            'home_production', 'home_production_id',
+            projection={'front': 1, 'od': 1}),
+        'materials': BatchLoader(
+            'materials', 'material_id',
+            projection={'concept': 1, 'measurement': 1, 'sku': 1}),
+    }
+
     id = serializers.SerializerMethodField(
         "get_id"
     )
@@ -21,23 +29,19 @@ class ExplosionSerializer(serializers.ModelSerializer):
         return str(data['_id'])
 
     def get_home_production(self, data):
-        with MongoDBHandler('home_production') as db:
-            home_production = db.extract(
-                {'_id': ObjectId(data['home_production_id'])})
-            if home_production:
-                return f"{home_production[0]['front']} - {home_production[0]['od']}"
-            return None
+        home_production = self.load(
+            'home_production', data.get('home_production_id'))
+        if home_production:
+            return f"{home_production['front']} - {home_production['od']}"
+        return None
 
     def get_material(self, data):
-        with MongoDBHandler('materials') as db:
-            material = db.extract({'_id': ObjectId(data['material_id'])})
-            if material:
-                sku = ''
-                if 'sku' in material[0] and material[0]['sku']:
-                    sku = material[0]['sku']
-                return {'concept': material[0]['concept'], 'measurement': material[0]['measurement'], 'sku': sku}
-            return None
+        material = self.load('materials', data.get('material_id'))
+        if material:
+            return {'concept': material['concept'], 'measurement': material['measurement'], 'sku': material.get('sku') or ''}
+        return None
 
     class Meta:
         model = Explosion
         fields = '__all__'
+        list_serializer_class = BatchListSerializer
@@ -1,21 +1,23 @@
 from rest_framework import serializers
 from api.models import HomeProduction
-from bson import ObjectId
-from api_sataiga.handlers.mongodb_handler import MongoDBHandler
+from api.serializers.loaders import BatchLoader, BatchListSerializer, BatchResolveMixin
 
 
-class HomeProductionSerializer(serializers.ModelSerializer):
+class HomeProductionSerializer(BatchResolveMixin, serializers.ModelSerializer):
+    loaders = {
+        'clients': BatchLoader(
+            'clients', 'client_id', projection={'name': 1}),
+    }
+
     client = serializers.SerializerMethodField(
         "get_client"
     )
 
     def get_client(self, data):
-        with MongoDBHandler('clients') as db:
-            client = db.extract({'_id': ObjectId(data['client_id'])})
-            if client:
-                return client[0]['name']
-            return None
+        client = self.load('clients', data.get('client_id'))
+        return client['name'] if client else None
 
     class Meta:
         model = HomeProduction
         fields = '__all__'
+        list_serializer_class = BatchListSerializer
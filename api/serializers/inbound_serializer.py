@@ -1,10 +1,18 @@
 from rest_framework import serializers
 from api.models import Inbound
-from api_sataiga.handlers.mongodb_handler import MongoDBHandler
-from bson import ObjectId
+from api.serializers.loaders import BatchLoader, BatchListSerializer, BatchResolveMixin
 
 
-class InboundSerializer(serializers.ModelSerializer):
+class InboundSerializer(BatchResolveMixin, serializers.ModelSerializer):
+    loaders = {
+        'suppliers': BatchLoader(
+            'suppliers', 'supplier_id', projection={'name': 1},
+            cache_prefix='suppliers'),
+        'purchase_orders': BatchLoader(
+            'purchase_orders', 'purchase_order_id',
+            projection={'number': 1}),
+    }
+
     purchase_order = serializers.SerializerMethodField(
         "get_purchase_order"
     )
@@ -18,20 +26,13 @@ class InboundSerializer(serializers.ModelSerializer):
     )
 
     def get_supplier_name(self, data):
-        with MongoDBHandler('suppliers') as db:
-            supplier = db.extract({'_id': ObjectId(data['supplier_id'])})
-            if supplier:
-                return supplier[0]['name']
-            return None
+        supplier = self.load('suppliers', data.get('supplier_id'))
+        return supplier['name'] if supplier else None
 
     def get_purchase_order(self, data):
-        if 'purchase_order_id' in data:
-            with MongoDBHandler('purchase_orders') as db:
-                purchase_order = db.extract(
-                    {'_id': ObjectId(data['purchase_order_id'])})
-                if purchase_order:
-                    return purchase_order[0]['number']
-                return None
+        purchase_order = self.load(
+            'purchase_orders', data.get('purchase_order_id'))
+        return purchase_order['number'] if purchase_order else None
 
     def get_total_items(self, data):
         return len(data['items']) if 'items' in data else 0
@@ -39,3 +40,4 @@ class InboundSerializer(serializers.ModelSerializer):
     class Meta:
         model = Inbound
         fields = '__all__'
+        list_serializer_class = BatchListSerializer
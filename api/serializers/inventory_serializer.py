@@ -3,6 +3,8 @@ from api.models import Inventory
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from api.use_cases.output_use_case import OutputUseCase
 from api.use_cases.inbound_use_case import InboundUseCase
+from api.serializers.inbound_serializer import InboundSerializer
+from api.serializers.output_serializer import OutputSerializer
 from bson import ObjectId
 
 
@@ -32,6 +34,11 @@ class InventorySerializer(serializers.ModelSerializer):
         return str(data['_id'])
 
     def get_last_inbound(self, data):
+        # Fila del read model (InventoryRepository.find_joined_page)
+        if 'last_inbound_ref' in data:
+            inbound = data['last_inbound_ref']
+            return InboundSerializer(inbound).data if inbound else None
+
         inbounds = InboundUseCase.get_by_external(
             data['material']['id'], {'status': 1})
         if len(inbounds) > 0:
@@ -39,6 +46,13 @@ class InventorySerializer(serializers.ModelSerializer):
         return None
 
     def get_last_output(self, data):
+        if 'last_output_ref' in data:
+            output = data['last_output_ref']
+            client = output.get('client_id_ref') if output else None
+            if not client:
+                return None
+            return {**OutputSerializer(output).data, 'client_name': client['name']}
+
         outputs = OutputUseCase.get_by_external(
             data['material']['id'], {'status': {'$in': [1, 3]}})
         if len(outputs) > 0:
@@ -0,0 +1,166 @@
+from typing import Any, Callable, Iterable, Optional
+from bson import ObjectId
+from rest_framework import serializers
+from api_sataiga.handlers.mongodb_handler import MongoDBHandler
+from api.helpers.validations import objectid_validation
+from api.constants import LOOKUP_SUFFIX
+from api.utils.cache_utils import cache_result
+
+
+def _get_path(doc: dict, path: str):
+    current = doc
+    for part in path.split('.'):
+        if not isinstance(current, dict):
+            return None
+        current = current.get(part)
+    return current
+
+
+class BatchLoader:
+    """
+    Describe una relación que se resuelve por lotes (estilo DataLoader).
+
+    - collection: colección relacionada
+    - key_fields: campo(s) del documento serializado con la llave que se
+      busca en `field`
+    - field: campo de la colección relacionada ('_id' por defecto)
+    - projection: campos mínimos a traer
+    - cache_prefix: para colecciones de referencia pequeñas (roles,
+      proveedores, catálogos) se trae la colección completa una vez y se
+      guarda en Redis + memoria del proceso; invalidate_cache(cache_prefix)
+      la descarta
+
+    Si la fila viene de un read model (repo.find_joined_page) y ya trae
+    `<key_field>_ref`, se usa ese documento y no se consulta nada.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        key_fields: str | tuple[str, ...],
+        field: str = '_id',
+        projection: Optional[dict] = None,
+        cache_prefix: Optional[str] = None,
+        ttl: int = 300,
+        local_ttl: int = 30,
+    ):
+        self.collection = collection
+        self.key_fields = (key_fields,) if isinstance(key_fields, str) else tuple(key_fields)
+        self.field = field
+        self.projection = projection
+        self.cache_prefix = cache_prefix
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+
+    def _projection(self) -> Optional[dict]:
+        if self.projection and self.field != '_id':
+            return {**self.projection, self.field: 1}
+        return self.projection
+
+    def _index(self, docs: Iterable[dict]) -> dict[str, dict]:
+        # Si hay varios documentos por llave se conserva el primero
+        result = {}
+        for doc in docs:
+            result.setdefault(str(_get_path(doc, self.field)), doc)
+        return result
+
+    def _fetch_reference(self, keys: Iterable[str]) -> dict[str, dict]:
+        @cache_result(prefix=self.cache_prefix, ttl=self.ttl, local_ttl=self.local_ttl)
+        def _cached(loader_ref, collection_ref, projection_ref, kind):
+            with MongoDBHandler(collection_ref) as db:
+                return db.extract({}, projection=projection_ref)
+
+        indexed = self._index(_cached(self, self.collection, self._projection(), "reference"))
+        return {k: indexed[k] for k in keys if k in indexed}
+
+    def joined(self, items: Iterable[dict]) -> dict[str, Optional[dict]]:
+        """Documentos ya resueltos por $lookup en las filas."""
+        found = {}
+        for item in items:
+            for key_field in self.key_fields:
+                ref = f'{key_field}{LOOKUP_SUFFIX}'
+                if item.get(key_field) and ref in item:
+                    found[str(item[key_field])] = item[ref]
+        return found
+
+    def collect(self, items: Iterable[dict]) -> set[str]:
+        return {str(item[k]) for item in items for k in self.key_fields if item.get(k)}
+
+    def fetch(self, keys: Iterable[str]) -> dict[str, dict]:
+        """Un solo query con $in; regresa {llave: documento}."""
+        if self.cache_prefix:
+            return self._fetch_reference(keys)
+
+        if self.field == '_id':
+            values = [ObjectId(k) for k in keys if objectid_validation(k)]
+        else:
+            values = list(keys)
+        if not values:
+            return {}
+
+        with MongoDBHandler(self.collection) as db:
+            docs = db.extract({self.field: {'$in': values}}, projection=self._projection())
+        return self._index(docs)
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """ListSerializer que precarga las relaciones antes de serializar las filas."""
+
+    def to_representation(self, data):
+        items = list(data)
+        self.child.prime(items)
+        return super().to_representation(items)
+
+
+class BatchResolveMixin:
+    """
+    Mixin para serializers con SerializerMethodField que consultan otras
+    colecciones. Con many=True (Meta.list_serializer_class = BatchListSerializer)
+    las llaves de toda la página se juntan y cada relación se trae una vez;
+    en serialización individual `load` consulta solo lo que falta.
+    """
+
+    loaders: dict[str, BatchLoader] = {}
+
+    def _batch_cache(self) -> dict:
+        if not hasattr(self, '_loaded'):
+            self._loaded = {}
+        return self._loaded
+
+    def prime(self, items: list[dict]):
+        cache = self._batch_cache()
+        for name, loader in self.loaders.items():
+            loaded = cache.setdefault(name, {})
+            loaded.update(loader.joined(items))
+            missing = loader.collect(items) - loaded.keys()
+            if not missing:
+                continue
+            found = loader.fetch(missing)
+            for key in missing:
+                loaded[key] = found.get(key)
+
+    def to_representation(self, instance):
+        # Una sola fila del read model también trae sus relaciones resueltas
+        if isinstance(instance, dict):
+            cache = self._batch_cache()
+            for name, loader in self.loaders.items():
+                cache.setdefault(name, {}).update(loader.joined([instance]))
+        return super().to_representation(instance)
+
+    def load(self, name: str, key: Any) -> Optional[dict]:
+        """Documento relacionado para `key` (None si no existe)."""
+        if not key:
+            return None
+        key = str(key)
+        loaded = self._batch_cache().setdefault(name, {})
+        if key not in loaded:
+            loaded[key] = self.loaders[name].fetch([key]).get(key)
+        return loaded[key]
+
+    def memo(self, name: str, fn: Callable[[], Any]):
+        """Valor constante por serialización (ej. un catálogo)."""
+        cache = self._batch_cache()
+        key = f'__memo__{name}'
+        if key not in cache:
+            cache[key] = fn()
+        return cache[key]
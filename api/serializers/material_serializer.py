@@ -1,11 +1,22 @@
 from rest_framework import serializers
 from api.serializers.fields import SafeDecimalField
 from api.models import Material
-from api_sataiga.handlers.mongodb_handler import MongoDBHandler
-from bson import ObjectId
+from api.serializers.loaders import BatchLoader, BatchListSerializer, BatchResolveMixin
 
 
-class MaterialSerializer(serializers.ModelSerializer):
+class MaterialSerializer(BatchResolveMixin, serializers.ModelSerializer):
+    loaders = {
+        'suppliers': BatchLoader(
+            'suppliers', 'supplier_id', projection={'name': 1},
+            cache_prefix='suppliers'),
+        'catalogs': BatchLoader(
+            'catalogs', (), field='name', projection={'values': 1},
+            cache_prefix='catalogs'),
+        'inventory': BatchLoader(
+            'inventory', '_id', field='material.id',
+            projection={'_id': 1}),
+    }
+
     minimum = SafeDecimalField(
         max_digits=10, decimal_places=2, required=False, allow_null=True)
     maximum = SafeDecimalField(
@@ -42,27 +53,22 @@ class MaterialSerializer(serializers.ModelSerializer):
     def get_id(self, data):
         return str(data['_id'])
 
+    def __equipment_divisions(self):
+        equipment = self.load('catalogs', 'Equipos y/o accesorios')
+        return equipment['values'] if equipment else []
+
     def get_supplier(self, data):
-        with MongoDBHandler('suppliers') as db:
-            supplier = db.extract({'_id': ObjectId(data['supplier_id'])})
-            if supplier:
-                return supplier[0]['name']
-            return None
+        supplier = self.load('suppliers', data.get('supplier_id'))
+        return supplier['name'] if supplier else None
 
     def get_inventory_id(self, data):
-        with MongoDBHandler('inventory') as db:
-            inventory = db.extract({'material.id': str(data['_id'])})
-            if inventory:
-                return str(inventory[0]['_id'])
-            return None
+        inventory = self.load('inventory', data['_id'])
+        return str(inventory['_id']) if inventory else None
 
     def get_group(self, data):
-        with MongoDBHandler('catalogs') as db:
-            equipment = db.extract({'name': 'Equipos y/o accesorios'})
-            if equipment:
-                if data['division'] in equipment[0]['values']:
-                    return 'EQUIPMENT_GROUP'
-            return 'MATERIALS_GROUP'
+        if data['division'] in self.memo('equipment', self.__equipment_divisions):
+            return 'EQUIPMENT_GROUP'
+        return 'MATERIALS_GROUP'
 
     def get_json(self, data):
         return {
@@ -78,3 +84,4 @@ class MaterialSerializer(serializers.ModelSerializer):
     class Meta:
         model = Material
         fields = '__all__'
+        list_serializer_class = BatchListSerializer
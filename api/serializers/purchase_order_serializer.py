@@ -1,10 +1,16 @@
 from rest_framework import serializers
 from api.models import PurchaseOrder
-from api_sataiga.handlers.mongodb_handler import MongoDBHandler
-from bson import ObjectId
+from api.serializers.loaders import BatchLoader, BatchListSerializer, BatchResolveMixin
 
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(BatchResolveMixin, serializers.ModelSerializer):
+    loaders = {
+        'suppliers': BatchLoader('suppliers', 'supplier_id'),
+        'users': BatchLoader(
+            'users', ('request_by', 'approved_by'),
+            projection={'name': 1, 'lastname': 1}),
+    }
+
     id = serializers.SerializerMethodField(
         "get_id"
     )
@@ -26,13 +32,11 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     )
 
     def __get_user(self, user_id):
-        if user_id:
-            with MongoDBHandler('users') as db:
-                user = db.extract({'_id': ObjectId(user_id)})
-                if user:
-                    if 'lastname' in user[0] and user[0]['lastname'] != '':
-                        return f"{user[0]['name']} {user[0]['lastname']}"
-                    return user[0]['name']
+        user = self.load('users', user_id)
+        if user:
+            if 'lastname' in user and user['lastname'] != '':
+                return f"{user['name']} {user['lastname']}"
+            return user['name']
         return ''
 
     def get_id(self, data):
@@ -44,12 +48,11 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         return ''
 
     def get_supplier(self, data):
-        with MongoDBHandler('suppliers') as db:
-            supplier = db.extract({'_id': ObjectId(data['supplier_id'])})
-            if supplier:
-                supplier[0].pop('_id', None)
-                return supplier[0]
-            return None
+        supplier = self.load('suppliers', data.get('supplier_id'))
+        if supplier:
+            # Copia: el mismo proveedor se comparte entre filas
+            return {k: v for k, v in supplier.items() if k != '_id'}
+        return None
 
     def get_request_by_name(self, data):
         return self.__get_user(data.get('request_by', None))
@@ -60,3 +63,4 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = '__all__'
+        list_serializer_class = BatchListSerializer
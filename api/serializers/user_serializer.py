@@ -1,11 +1,17 @@
 from rest_framework import serializers
 from api.models import User
-from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from api.constants import USER_STATUS
-from bson import ObjectId
+from api.serializers.loaders import BatchLoader, BatchListSerializer, BatchResolveMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(BatchResolveMixin, serializers.ModelSerializer):
+    loaders = {
+        'roles': BatchLoader(
+            'roles', 'role_id',
+            projection={'name': 1, 'value': 1, 'icon': 1},
+            cache_prefix='roles'),
+    }
+
     full_name = serializers.SerializerMethodField(
         "get_full_name"
     )
@@ -22,12 +28,13 @@ class UserSerializer(serializers.ModelSerializer):
         return data['name']
 
     def get_role(self, data):
-        with MongoDBHandler('roles') as db:
-            role = db.extract({'_id': ObjectId(data['role_id'])})
-            return {
-                'name': role[0]['name'],
-                'value': role[0]['value'],
-                'icon': role[0]['icon'] if 'icon' in role[0] else 'user'}
+        role = self.load('roles', data.get('role_id'))
+        if not role:
+            return None
+        return {
+            'name': role['name'],
+            'value': role['value'],
+            'icon': role['icon'] if 'icon' in role else 'user'}
 
     def get_user_status(self, data):
         return next((v for k, v in USER_STATUS if k == data['status']), None)
@@ -35,3 +42,4 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        list_serializer_class = BatchListSerializer
@@ -1,6 +1,6 @@
+import math
 from typing import Any, Dict, List, Optional, Callable
-from django.core.paginator import Paginator
-from api.utils.cache_utils import invalidate_cache, cache_result
+from api.utils.cache_utils import invalidate_cache, cache_result, cache_tag
 
 
 class BaseService:
@@ -30,13 +30,14 @@ class BaseService:
         cache_prefix: Optional[str] = None,
         preprocess: Optional[Callable[[
             Dict[str, Any]], Dict[str, Any]]] = None,
+        cache_tags: Optional[List[str]] = None,
     ) -> Any:
         """
         Crea un documento genéricamente:
         - Valida campos requeridos.
         - Aplica preprocesamiento opcional.
         - Inserta en el repositorio.
-        - Invalida cache si se especifica.
+        - Invalida cache si se especifica (solo `cache_tags` si se indican).
         """
         if required_fields:
             self._validate_fields(data, required_fields)
@@ -47,7 +48,7 @@ class BaseService:
         result = repo.insert(data)
 
         if cache_prefix:
-            invalidate_cache(cache_prefix)
+            invalidate_cache(cache_prefix, cache_tags)
 
         return result
 
@@ -57,6 +58,7 @@ class BaseService:
         _id: str,
         data: Dict[str, Any],
         cache_prefix: Optional[str] = None,
+        cache_tags: Optional[List[str]] = None,
     ) -> None:
         """
         Actualiza un documento genéricamente.
@@ -69,7 +71,7 @@ class BaseService:
         repo.update(_id, data)
 
         if cache_prefix:
-            invalidate_cache(cache_prefix)
+            invalidate_cache(cache_prefix, cache_tags)
 
     def _delete(
         self,
@@ -77,11 +79,13 @@ class BaseService:
         _id: str,
         cache_prefix: Optional[str] = None,
         existing: Optional[dict] = None,
+        tag_fields: Optional[List[str]] = None,
     ) -> dict:
         """
         Elimina un documento genéricamente.
         - Si no existe, lanza LookupError.
         - Retorna el documento existente (útil para disparar procesos post-delete).
+        - tag_fields: invalida solo el tag del documento eliminado.
         """
         if existing is None:
             existing = repo.find_by_id(_id)
@@ -91,7 +95,8 @@ class BaseService:
         repo.delete(_id)
 
         if cache_prefix:
-            invalidate_cache(cache_prefix)
+            tags = [cache_tag(existing, tag_fields)] if tag_fields else None
+            invalidate_cache(cache_prefix, tags)
 
         return existing
 
@@ -99,12 +104,18 @@ class BaseService:
         self,
         repo: Any,
         query: dict,
+        cache_prefix: Optional[str] = None,
+        cache_tags: Optional[List[str]] = None,
     ) -> None:
         """
         Elimina un documento usando un filtro/query personalizado.
+        Invalida cache si se especifica (solo `cache_tags` si se indican).
         """
         repo.delete_by_query(query)
 
+        if cache_prefix:
+            invalidate_cache(cache_prefix, cache_tags)
+
     # ----------------------------------------------------------
     # LECTURAS Y CACHE
     # ----------------------------------------------------------
@@ -115,15 +126,25 @@ class BaseService:
         prefix="",
         ttl=300,
         order_field=None,
-        order=1
+        order=1,
+        tag_fields=None,
+        local_ttl=None,
+        stale_ttl=0,
+        early_refresh=0
     ):
         """
         Obtiene una lista cacheada de documentos según filtros y orden.
         ✅ Cada combinación única de filtros/orden genera una clave distinta.
         ✅ Compatible con el decorador cache_result(prefix, ttl).
+        ✅ tag_fields: si los filtros fijan esos campos, la entrada queda
+           bajo ese tag y solo se invalida cuando cambia ese tag.
+        ✅ local_ttl: copia en memoria del proceso para datos de referencia.
+        ✅ stale_ttl / early_refresh: protección contra estampidas (ver cache_result).
         """
 
-        @cache_result(prefix=prefix, ttl=ttl)
+        @cache_result(prefix=prefix, ttl=ttl, tag=cache_tag(filters, tag_fields),
+                      local_ttl=local_ttl, stale_ttl=stale_ttl,
+                      early_refresh=early_refresh)
         def _cached(repo_ref, filters_ref, order_field_ref, order_ref):
             data = repo_ref.find_all(
                 filters_ref or {}, order_field_ref, order_ref)
@@ -144,16 +165,105 @@ class BaseService:
     # ----------------------------------------------------------
     # PAGINACIÓN GENÉRICA
     # ----------------------------------------------------------
-    def _paginate(self, items: List[Dict[str, Any]], page: int, page_size: int, serializer: Optional[Callable] = None):
-        """Aplica paginación con Django Paginator y opcionalmente serializa."""
-        paginator = Paginator(items, per_page=page_size)
-        page_obj = paginator.get_page(page)
-        data = serializer(page_obj.object_list,
-                          many=True).data if serializer else page_obj.object_list
+    @staticmethod
+    def _build_sort(order_field: Optional[str], order: int = 1) -> List[tuple]:
+        """
+        Orden estable para skip/limit: agrega `_id` como desempate para que
+        ningún documento se repita o se pierda entre páginas.
+        """
+        if not order_field:
+            return [("_id", 1)]
+        if order_field == "_id":
+            return [("_id", order)]
+        return [(order_field, order), ("_id", order)]
+
+    def _count_cached(self, repo, filters=None, prefix="", ttl=300) -> int:
+        """Total de documentos para el filtro, cacheado por separado de las páginas."""
+
+        @cache_result(prefix=prefix, ttl=ttl)
+        def _cached(repo_ref, filters_ref, kind):
+            return repo_ref.count(filters_ref or {})
+
+        return _cached(repo, filters, "count")
+
+    def _get_page_cached(
+        self,
+        repo,
+        filters=None,
+        page=1,
+        page_size=10,
+        prefix="",
+        ttl=300,
+        order_field=None,
+        order=1
+    ):
+        """
+        Obtiene una sola página cacheada (skip/limit en MongoDB).
+        ✅ Cada combinación de filtros/orden/página genera una clave distinta.
+        """
+        sort = self._build_sort(order_field, order)
+
+        @cache_result(prefix=prefix, ttl=ttl)
+        def _cached(repo_ref, filters_ref, sort_ref, page_ref, page_size_ref, kind):
+            return repo_ref.find_page(
+                filters_ref or {}, sort_ref, page_ref, page_size_ref)
+
+        return _cached(repo, filters, sort, page, page_size, "page")
+
+    def _paginate(
+        self,
+        repo,
+        filters: Optional[Dict[str, Any]],
+        page: int,
+        page_size: int,
+        serializer: Optional[Callable] = None,
+        prefix: str = "",
+        ttl: int = 300,
+        order_field: Optional[str] = None,
+        order: int = 1,
+        preprocess: Optional[Callable[[
+            List[Dict[str, Any]]], List[Dict[str, Any]]]] = None,
+    ):
+        """
+        Pagina directamente en MongoDB (count_documents + skip/limit) y
+        opcionalmente serializa. Conserva la semántica de Paginator.get_page:
+        una página inválida regresa la primera y una fuera de rango la última.
+        - preprocess: enriquece únicamente los documentos de la página.
+        """
+        try:
+            page_size = max(int(page_size), 1)
+        except (TypeError, ValueError):
+            page_size = 10
+
+        count = self._count_cached(repo, filters, prefix=prefix, ttl=ttl)
+        total_pages = max(math.ceil(count / page_size), 1)
+
+        try:
+            page = int(page)
+        except (TypeError, ValueError):
+            page = 1
+        if page < 1 or page > total_pages:
+            page = total_pages
+
+        items = self._get_page_cached(
+            repo,
+            filters,
+            page,
+            page_size,
+            prefix=prefix,
+            ttl=ttl,
+            order_field=order_field,
+            order=order,
+        ) if count else []
+
+        if preprocess:
+            items = preprocess(items)
+
+        data = serializer(items, many=True).data if serializer else items
 
         return {
-            "count": paginator.count,
-            "total_pages": paginator.num_pages,
-            "current_page": page_obj.number,
+            "count": count,
+            "total_pages": total_pages,
+            "current_page": page,
             "results": data,
         }
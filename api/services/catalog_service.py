@@ -25,7 +25,8 @@ class CatalogService(BaseService):
         docs = self._get_all_cached(
             self.catalog_repo,
             {'name': name},
-            prefix='catalog'
+            prefix='catalog',
+            local_ttl=30,
         )
         if not docs:
             raise LookupError(f"El catálogo '{name}' no existe.")
@@ -37,7 +38,8 @@ class CatalogService(BaseService):
     def get_all(self, order_by: str = "asc"):
         catalogs = self._get_all_cached(
             repo=self.catalog_repo,
-            prefix=self.CACHE_PREFIX
+            prefix=self.CACHE_PREFIX,
+            local_ttl=30,
         )
         if not catalogs:
             return []
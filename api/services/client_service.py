@@ -3,6 +3,7 @@ from api.helpers.clean_payload import clean_payload
 from api.services.base_service import BaseService
 from api.repositories.client_repository import ClientRepository
 from api.serializers.client_serializer import ClientSerializer
+from api.helpers.search import apply_search
 
 
 class ClientService(BaseService):
@@ -30,16 +31,13 @@ class ClientService(BaseService):
     def get_paginated(self, client_type: str, q: Optional[str], page: int, page_size: int, sort_by: str = None, order_by: int = 1):
         filters = {"type": client_type, "status": 1}
         if q:
-            filters["$or"] = [
-                {"name": {"$regex": q, "$options": "i"}},
-                {"email": {"$regex": q, "$options": "i"}},
-            ]
-        items = self._get_all_cached(
-            self.client_repo, filters,
+            apply_search(filters, q)
+        return self._paginate(
+            self.client_repo, filters, page, page_size,
+            serializer=ClientSerializer,
             prefix=self.CACHE_PREFIX,
             order_field=sort_by,
             order=order_by)
-        return self._paginate(items, page, page_size, serializer=ClientSerializer)
 
     def get_by_id(self, client_id: str):
         return self._get_by_id(self.client_repo, client_id, serializer=ClientSerializer)
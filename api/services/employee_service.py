@@ -2,6 +2,7 @@ from typing import Optional, Dict, Any
 from api.repositories.employee_repository import EmployeeRepository
 from api.serializers.employee_serializer import EmployeeSerializer
 from api.services.base_service import BaseService
+from api.helpers.search import apply_search
 
 
 class EmployeeService(BaseService):
@@ -48,15 +49,11 @@ class EmployeeService(BaseService):
         if status is not None:
             filters["status"] = status
         if q:
-            filters["$or"] = [
-                {"number": {"$regex": q, "$options": "i"}},
-                {"name": {"$regex": q, "$options": "i"}},
-                {"activity": {"$regex": q, "$options": "i"}},
-            ]
+            apply_search(filters, q)
 
-        items = self._get_all_cached(
-            self.employee_repo, filters, prefix=self.CACHE_PREFIX)
-        return self._paginate(items, page, page_size, serializer=EmployeeSerializer)
+        return self._paginate(
+            self.employee_repo, filters, page, page_size,
+            serializer=EmployeeSerializer, prefix=self.CACHE_PREFIX)
 
     # ----------------------------------------------------------
     # OBTENER POR ID
@@ -1,20 +1,39 @@
 from typing import Any, Dict, Optional
 from copy import deepcopy
-from api.utils.cache_utils import invalidate_cache
+from api.functions.explosion_matrix import VolumetryMatrix, from_cents
+from api.helpers.presentation import estimate_purchase
+from api.utils.cache_utils import invalidate_cache, cache_result, cache_tag
 from rest_framework.exceptions import ValidationError
 from api.services.base_service import BaseService
 from api.helpers.review_required_fields import review_required_fields
 from api.repositories.explosion_repository import ExplosionRepository
 from api.repositories.trend_repository import TrendRepository
+from api.repositories.home_production_repository import HomeProductionRepository
+from api.repositories.material_repository import MaterialRepository
+from api.repositories.volumetry_repository import VolumetryRepository
+from api.serializers.loaders import BatchLoader
+from api.services.po_requirement_service import PORequirementService
 from api.serializers.explosion_serializer import ExplosionSerializer
 
 
 class ExplosionService(BaseService):
     CACHE_PREFIX = "explosion"
+    # La explosión siempre se escribe y se consulta por OD
+    TAG_FIELDS = ["home_production_id"]
+
+    SIMULATION_MATERIAL_PROJECTION = {
+        "concept": 1, "sku": 1, "measurement": 1, "division": 1,
+        "inventory_price": 1, "presentation": 1, "automation": 1,
+    }
+    suppliers = BatchLoader(
+        'suppliers', 'supplier_id', projection={'name': 1}, cache_prefix='suppliers')
 
     def __init__(self):
         self.exp_repo = ExplosionRepository()
         self.trend_repo = TrendRepository()
+        self.hp_repo = HomeProductionRepository()
+        self.material_repo = MaterialRepository()
+        self.volumetry_repo = VolumetryRepository()
 
     def get(self, home_production_id: str, supplier_id: Optional[str] = None, status: Optional[int] = None):
         """
@@ -28,13 +47,132 @@ class ExplosionService(BaseService):
         if status is not None:
             filters['status'] = int(status)
 
+        # Solo se cachean los documentos crudos de la explosión; material y
+        # od los resuelve el serializer por lotes en cada request, así un
+        # cambio en ellos (otro prefijo de cache) nunca deja etiquetas viejas.
         explosion = self._get_all_cached(
             repo=self.exp_repo,
             filters=filters,
             prefix=self.CACHE_PREFIX,
+            tag_fields=self.TAG_FIELDS,
         )
         return ExplosionSerializer(explosion, many=True).data
 
+    @staticmethod
+    def _simulated_prototypes(current: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, int]:
+        """Conteo actual de lotes por prototype con los hipotéticos encima."""
+        lots = (data or {}).get("lots")
+        prototypes = lots.get("prototypes") if isinstance(lots, dict) else None
+        if not isinstance(prototypes, dict) or not prototypes:
+            raise ValueError("El valor lots.prototypes es requerido.")
+
+        result = {k: int(v or 0) for k, v in (current or {}).items()}
+        for prototype, count in prototypes.items():
+            try:
+                count = int(count)
+            except (TypeError, ValueError):
+                raise ValueError(f"El número de lotes de '{prototype}' no es válido.")
+            if count < 0:
+                raise ValueError(f"El número de lotes de '{prototype}' no puede ser negativo.")
+            result[prototype] = count
+        return result
+
+    def _volumetry_matrix(self, client_id: str, front: str) -> VolumetryMatrix:
+        """
+        Volumetría del cliente/front ya convertida a matriz; se cachea bajo el
+        prefijo de la volumetría, así cualquier cambio en ella la descarta.
+        """
+        @cache_result(prefix="volumetries", ttl=300, local_ttl=60)
+        def _cached(repo_ref, client_ref, front_ref, kind):
+            volumetry = repo_ref.find_all(
+                {"client_id": client_ref, "front": front_ref},
+                projection={"material_id": 1, "supplier_id": 1,
+                            "prototype": 1, "volumetry": 1}) or []
+            return VolumetryMatrix(volumetry).to_state()
+
+        return VolumetryMatrix.from_state(
+            _cached(self.volumetry_repo, client_id, front, "matrix"))
+
+    def simulate(self, home_production_id: str, data: Dict[str, Any]):
+        """
+        ¿Qué pasa si la OD tuviera estos lotes? Calcula en memoria (sin
+        escribir) la explosión con los conteos actuales y con los hipotéticos
+        y regresa totales y costo estimado de compra por material y proveedor.
+        """
+        hp = self.hp_repo.find_by_id(home_production_id)
+        if not hp:
+            raise LookupError("La OD no existe.")
+
+        current = (hp.get("lots") or {}).get("prototypes") or {}
+        simulated = self._simulated_prototypes(current, data)
+
+        matrix = self._volumetry_matrix(hp.get("client_id"), hp.get("front"))
+        current_totals = matrix.gran_totals(matrix.explode(current)).tolist()
+        simulated_totals = matrix.gran_totals(matrix.explode(simulated)).tolist()
+
+        materials = {
+            str(m["_id"]): m for m in self.material_repo.find_many_by_ids(
+                [material_id for material_id, _ in matrix.keys],
+                projection=self.SIMULATION_MATERIAL_PROJECTION,
+            ) or []
+        }
+        suppliers = self.suppliers.fetch({supplier_id for _, supplier_id in matrix.keys})
+
+        rows = []
+        by_supplier: Dict[str, Dict[str, Any]] = {}
+        for (material_id, supplier_id), before, after in zip(
+                matrix.keys, current_totals, simulated_totals):
+            if not before and not after:
+                continue
+            material = materials.get(material_id, {})
+            current_cost = estimate_purchase(from_cents(before), material)["total"]
+            purchase = estimate_purchase(from_cents(after), material)
+            rows.append({
+                "material_id": material_id,
+                "supplier_id": supplier_id,
+                "concept": material.get("concept"),
+                "sku": material.get("sku"),
+                "measurement": material.get("measurement"),
+                "division": material.get("division"),
+                "current_total": from_cents(before),
+                "simulated_total": from_cents(after),
+                "difference": from_cents(after - before),
+                "total_quantity": purchase["total_quantity"],
+                "current_cost": current_cost,
+                "estimated_cost": purchase["total"],
+            })
+
+            supplier = by_supplier.setdefault(supplier_id, {
+                "supplier_id": supplier_id,
+                "name": (suppliers.get(supplier_id) or {}).get("name"),
+                "materials": 0,
+                "current_total": 0.0,
+                "simulated_total": 0.0,
+                "current_cost": 0.0,
+                "estimated_cost": 0.0,
+            })
+            supplier["materials"] += 1
+            for field in ("current_total", "simulated_total", "current_cost", "estimated_cost"):
+                supplier[field] = round(supplier[field] + rows[-1][field], 2)
+
+        current_cost = round(sum(s["current_cost"] for s in by_supplier.values()), 2)
+        estimated_cost = round(sum(s["estimated_cost"] for s in by_supplier.values()), 2)
+        return {
+            "home_production_id": home_production_id,
+            "lots": {
+                "current": {"total": sum(current.values()), "prototypes": current},
+                "simulated": {"total": sum(simulated.values()), "prototypes": simulated},
+            },
+            "materials": sorted(rows, key=lambda r: (r["concept"] or "", r["supplier_id"])),
+            "suppliers": sorted(
+                by_supplier.values(), key=lambda s: s["estimated_cost"], reverse=True),
+            "totals": {
+                "current_cost": current_cost,
+                "estimated_cost": estimated_cost,
+                "difference": round(estimated_cost - current_cost, 2),
+            },
+        }
+
     def _delete_existing_assignment(self, hp_id: str, prev: Dict[str, Any], trend: Dict[str, Any]) -> None:
         if not hp_id or not isinstance(prev, dict) or not isinstance(trend, dict):
             return
@@ -86,7 +224,9 @@ class ExplosionService(BaseService):
         self._delete(
             self.exp_repo,
             _id=str(exp.get("_id")),
-            cache_prefix=self.CACHE_PREFIX
+            cache_prefix=self.CACHE_PREFIX,
+            existing=exp,
+            tag_fields=self.TAG_FIELDS,
         )
 
     def assign(self, data: Dict[str, Any]):
@@ -162,5 +302,7 @@ class ExplosionService(BaseService):
         new_set_data = {k: v for k, v in data.items() if k not in {
             "assigned_to", "trend", "prev"}}
         self.exp_repo.upsert_one(new_query, {**new_set_data, 'status': 0})
-        invalidate_cache(self.CACHE_PREFIX)
+        invalidate_cache(self.CACHE_PREFIX, [cache_tag(new_query, self.TAG_FIELDS)])
+        # La asignación mueve material entre proveedores de la OD
+        PORequirementService().refresh(data["home_production_id"])
         return True
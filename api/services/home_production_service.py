@@ -5,7 +5,9 @@ from api.repositories.client_repository import ClientRepository
 from api.repositories.home_production_repository import HomeProductionRepository
 from api.repositories.lot_repository import LotRepository
 from api.repositories.explosion_repository import ExplosionRepository
+from api.repositories.po_requirement_repository import PORequirementRepository
 from api.serializers.home_production_serializer import HomeProductionSerializer
+from api.utils.cache_utils import cache_tag
 
 
 class HomeProductionService(BaseService):
@@ -36,14 +38,16 @@ class HomeProductionService(BaseService):
         )
 
     def get_paginated(self, filters: dict, page: int, page_size: int, sort_by: str = None, order_by: int = 1):
-        items = self._get_all_cached(
+        return self._paginate(
             self.hp_repo,
             filters,
+            page,
+            page_size,
+            serializer=HomeProductionSerializer,
             prefix=self.CACHE_PREFIX,
             order_field=sort_by,
             order=order_by
         )
-        return self._paginate(items, page, page_size, serializer=HomeProductionSerializer)
 
     def get_by_id(self, hp_id: str):
         return self._get_by_id(self.hp_repo, hp_id, serializer=HomeProductionSerializer)
@@ -74,6 +78,10 @@ class HomeProductionService(BaseService):
             cache_prefix=self.CACHE_PREFIX
         )
         hp_query = {'home_production_id': hp_id}
-        self._delete_by_query(self.lot_repo, hp_query)
-        self._delete_by_query(self.exp_repo, hp_query)
+        hp_tags = [cache_tag(hp_query, ['home_production_id'])]
+        self._delete_by_query(self.lot_repo, hp_query,
+                              cache_prefix='lots', cache_tags=hp_tags)
+        self._delete_by_query(self.exp_repo, hp_query,
+                              cache_prefix='explosion', cache_tags=hp_tags)
+        self._delete_by_query(PORequirementRepository(), hp_query)
         return 'OD eliminada correctamente.'
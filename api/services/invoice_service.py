@@ -49,15 +49,7 @@ class InvoiceService(BaseService):
 
         return f"F{year}{next_number:06d}"
 
-    def get_paginated(self, filters: dict, page: int, page_size: int, sort_by: str = 'created_at', order_by: int = 1):
-        items = self._get_all_cached(
-            self.invoice_repo,
-            filters,
-            prefix=self.CACHE_PREFIX,
-            order_field=sort_by,
-            order=order_by
-        )
-
+    def _enrich_with_purchase_orders(self, items: list) -> list:
         purchase_order_ids = list({
             item.get('purchase_order_id')
             for item in items
@@ -91,7 +83,21 @@ class InvoiceService(BaseService):
 
             enriched_items.append(item_copy)
 
-        return self._paginate(enriched_items, page, page_size, serializer=InvoiceSerializer)
+        return enriched_items
+
+    def get_paginated(self, filters: dict, page: int, page_size: int, sort_by: str = 'created_at', order_by: int = 1):
+        # Solo se enriquecen las facturas de la página solicitada
+        return self._paginate(
+            self.invoice_repo,
+            filters,
+            page,
+            page_size,
+            serializer=InvoiceSerializer,
+            prefix=self.CACHE_PREFIX,
+            order_field=sort_by,
+            order=order_by,
+            preprocess=self._enrich_with_purchase_orders,
+        )
 
     def get_by_id(self, invoice_id: str):
         invoice = self.invoice_repo.find_by_id(invoice_id)
@@ -7,15 +7,17 @@ from api.serializers.file_serializer import FileUploadSerializer
 from api.helpers.formats import norm
 from api.constants import ALLOWED_LAID
 from api.services.base_service import BaseService
+from api.utils.cache_utils import invalidate_cache, cache_tag
 from api.repositories.lot_repository import LotRepository
 from api.repositories.home_production_repository import HomeProductionRepository
 from api.repositories.prototype_repository import PrototypeRepository
 from api.serializers.lot_serializer import LotSerializer
-from api.functions.explosion import explosion
+from api.functions.explosion import schedule_explosion
 
 
 class LotService(BaseService):
     CACHE_PREFIX = "lots"
+    TAG_FIELDS = ["home_production_id"]
 
     def __init__(self):
         self.lot_repo = LotRepository()
@@ -68,6 +70,14 @@ class LotService(BaseService):
         valid_rows: List[Dict[str, str]] = []
         errors: List[Dict[str, Any]] = []
 
+        # Lotes existentes de la OD en 1 query (antes: 1 find_one por fila)
+        existing_keys = {
+            (l.get("block"), l.get("lot"), l.get("laid"), l.get("prototype"))
+            for l in self.lot_repo.find_all(
+                {"home_production_id": hp_id},
+                projection={"block": 1, "lot": 1, "laid": 1, "prototype": 1})
+        }
+
         for row_idx in range(2, ws.max_row + 1):
             block = ws.cell(row=row_idx, column=1).value
             lot = ws.cell(row=row_idx, column=2).value
@@ -136,14 +146,8 @@ class LotService(BaseService):
                 )
                 continue
 
-            existing_lot = self.lot_repo.find_one({
-                'home_production_id': hp_id,
-                'block': block_s,
-                'lot': lot_s,
-                'laid': laid_s,
-                'prototype': prototype_s,
-            })
-            if not existing_lot:
+            key = (block_s, lot_s, laid_s, prototype_s)
+            if key not in existing_keys:
                 valid_rows.append(
                     {"block": block_s, "lot": lot_s,
                         "laid": laid_s, "prototype": prototype_s}
@@ -151,26 +155,39 @@ class LotService(BaseService):
 
         return valid_rows, errors
 
-    def _update_hp_lots(self, home_production_id: str, lots: List[Dict[str, Any]]):
-        if home_production_id and lots:
-            prototype_counter = Counter()
-            for lot in lots:
-                prototype_counter[lot['prototype']] += 1
+    def _cache_tag(self, home_production_id: str) -> Optional[str]:
+        return cache_tag({"home_production_id": home_production_id}, self.TAG_FIELDS)
 
-            result = {
-                'total': len(lots),
-                'prototypes': dict(prototype_counter),
-            }
+    def _update_hp_lots(self, home_production_id: str, lots: List[Dict[str, Any]],
+                        prev_prototypes: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        Actualiza el resumen de lotes de la OD y regresa el cambio por
+        prototype respecto a `prev_prototypes` ({prototype: +/-n}).
+        Sin lotes el resumen queda en ceros y el cambio es -prev_prototypes.
+        """
+        if not home_production_id:
+            return {}
+
+        lots = lots or []
+        prototype_counter = Counter(lot['prototype'] for lot in lots)
+        result = {
+            'total': len(lots),
+            'prototypes': dict(prototype_counter),
+        }
+        total_sum = sum(float(l["percentage"]) for l in lots)
+        self._update(
+            repo=self.hp_repo,
+            _id=home_production_id,
+            data={
+                'lots': result,
+                'progress': round(total_sum / len(lots), 2) if lots else 0},
+            cache_prefix='home_production'
+        )
+
+        delta = Counter(prototype_counter)
+        delta.subtract(prev_prototypes or {})
+        return {prototype: n for prototype, n in delta.items() if n}
 
-            total_sum = sum(float(l["percentage"]) for l in lots)
-            self._update(
-                repo=self.hp_repo,
-                _id=home_production_id,
-                data={
-                    'lots': result,
-                    'progress': round(total_sum / len(lots), 2)},
-                cache_prefix='home_production'
-            )
 
     def create(self, home_production_id: str, data: Dict[str, Any]):
         if not home_production_id:
@@ -186,30 +203,31 @@ class LotService(BaseService):
 
         errors: List[Dict[str, Any]] = []
 
-        # -------- Updates --------
+        # -------- Updates (un solo bulk_write) --------
+        existing_ids = {
+            str(doc["_id"]) for doc in self.lot_repo.find_by_ids(
+                [lot.get("_id") for lot in updates], projection={"_id": 1})
+        }
+        bulk_updates = []
         for lot in updates:
             _id = lot.get("_id")
             if not _id:
                 errors.append(
                     {"lot": lot, "error": "Falta _id para actualizar."})
                 continue
+            if _id not in existing_ids:
+                errors.append(lot)
+                continue
 
             # no mutar input
             payload = {k: v for k, v in lot.items() if k != "_id"}
 
             # fuerza relación (evita que alguien cambie HP)
             payload["home_production_id"] = home_production_id
+            bulk_updates.append((_id, payload))
 
-            try:
-                self._update(
-                    repo=self.lot_repo,
-                    _id=_id,
-                    data=payload,
-                    cache_prefix=self.CACHE_PREFIX,
-                )
-            except Exception as e:
-                errors.append(lot)
-
+        # -------- Inserciones (un solo insert_many) --------
+        new_lots = []
         for lot in insertions:
             payload = {
                 "home_production_id": home_production_id,
@@ -217,21 +235,23 @@ class LotService(BaseService):
                 "percentage": 0,
                 "progress": self._default_progress(),
             }
-
             try:
-                self._create(
-                    repo=self.lot_repo,
-                    data=payload,
-                    required_fields=["prototype", "block", "lot", "laid"],
-                    cache_prefix=self.CACHE_PREFIX,
-                )
-            except Exception as e:
+                self._validate_fields(
+                    payload, ["prototype", "block", "lot", "laid"])
+            except ValueError:
                 errors.append(lot)
+                continue
+            new_lots.append(payload)
+
+        self.lot_repo.bulk_update(bulk_updates)
+        self.lot_repo.insert_many(new_lots)
+        invalidate_cache(self.CACHE_PREFIX, [self._cache_tag(home_production_id)])
 
         updated_lots = self.lot_repo.find_all(
             {"home_production_id": home_production_id})
-        self._update_hp_lots(home_production_id, updated_lots)
-        explosion.delay(home_production_id, int(prev_lots.get('total', 0)))
+        delta = self._update_hp_lots(
+            home_production_id, updated_lots, prev_lots.get('prototypes'))
+        schedule_explosion(home_production_id, delta)
         return {
             "success": LotSerializer(updated_lots, many=True).data,
             "errors": errors,
@@ -275,23 +295,22 @@ class LotService(BaseService):
             raise ValidationError(
                 {"detail": "No hay filas válidas.", "errors": errors})
 
-        for row in valid_rows:
-            self._create(
-                repo=self.lot_repo,
-                data={
-                    "home_production_id": home_production_id,
-                    **row,
-                    "percentage": 0,
-                    "progress": self._default_progress(),
-                },
-                required_fields=["prototype", "block", "lot", "laid"],
-                cache_prefix=self.CACHE_PREFIX,
-            )
+        self.lot_repo.insert_many([
+            {
+                "home_production_id": home_production_id,
+                **row,
+                "percentage": 0,
+                "progress": self._default_progress(),
+            }
+            for row in valid_rows
+        ])
+        invalidate_cache(self.CACHE_PREFIX, [self._cache_tag(home_production_id)])
 
         updated_lots = self.lot_repo.find_all(
             {"home_production_id": home_production_id})
-        self._update_hp_lots(home_production_id, updated_lots)
-        explosion.delay(home_production_id, int(lots.get('total', 0)))
+        delta = self._update_hp_lots(
+            home_production_id, updated_lots, lots.get('prototypes'))
+        schedule_explosion(home_production_id, delta)
         return {
             "success": LotSerializer(updated_lots, many=True).data,
             "errors": errors,
@@ -307,6 +326,7 @@ class LotService(BaseService):
 
         self.lot_repo.upsert_one(
             {'home_production_id': home_production_id}, data)
+        invalidate_cache(self.CACHE_PREFIX, [self._cache_tag(home_production_id)])
         updated_lots = self.lot_repo.find_all(
             {"home_production_id": home_production_id})
         self._update_hp_lots(home_production_id, updated_lots)
@@ -323,14 +343,19 @@ class LotService(BaseService):
         self._delete(
             repo=self.lot_repo,
             _id=lot_id,
-            cache_prefix=self.CACHE_PREFIX
+            cache_prefix=self.CACHE_PREFIX,
+            existing=lot,
+            tag_fields=self.TAG_FIELDS,
         )
 
         home_production_id = lot.get('home_production_id')
         updated_lots = self.lot_repo.find_all(
             {"home_production_id": home_production_id})
-        self._update_hp_lots(home_production_id, updated_lots)
-        explosion.delay(home_production_id, len(updated_lots) + 1)
+        # Conteo previo = lotes restantes + el eliminado
+        prev_prototypes = Counter(l['prototype'] for l in updated_lots)
+        prev_prototypes[lot.get('prototype')] += 1
+        delta = self._update_hp_lots(home_production_id, updated_lots, prev_prototypes)
+        schedule_explosion(home_production_id, delta)
 
         return 'Lote eliminado correctamente.'
 
@@ -340,6 +365,7 @@ class LotService(BaseService):
         lots = self._get_all_cached(
             repo=self.lot_repo,
             filters=filters,
-            prefix=self.CACHE_PREFIX
+            prefix=self.CACHE_PREFIX,
+            tag_fields=self.TAG_FIELDS,
         ) or []
         return LotSerializer(lots, many=True).data
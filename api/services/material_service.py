@@ -4,6 +4,8 @@ from typing import List, Tuple
 from django.conf import settings
 from openpyxl import load_workbook
 from api.services.base_service import BaseService
+from api.utils.cache_utils import cache_result
+from api.helpers.search import search_filter
 from api.repositories.material_repository import MaterialRepository
 from api.serializers.material_serializer import MaterialSerializer
 
@@ -14,6 +16,14 @@ class MaterialService(BaseService):
         Path(settings.BASE_DIR) / "media" / "materials" / "templates"
     )
 
+    SUGGEST_PROJECTION = {
+        "concept": 1, "sku": 1, "measurement": 1,
+        "supplier_code": 1, "supplier_id": 1,
+    }
+    SUGGEST_LIMIT = 10
+    STALE_TTL = 60 * 30
+    SUGGEST_MAX_LIMIT = 50
+
     def __init__(self):
         self.material_repo = MaterialRepository()
 
@@ -23,20 +33,60 @@ class MaterialService(BaseService):
             filters,
             prefix=self.CACHE_PREFIX,
             order_field=sort_by,
-            order=order_by
+            order=order_by,
+            # Lista completa y muy consultada: tras invalidar se sirve la
+            # copia anterior mientras un solo proceso la recalcula
+            stale_ttl=self.STALE_TTL,
+            early_refresh=1.0,
         )
 
         return MaterialSerializer(items, many=True).data
 
     def get_paginated(self, filters: dict, page: int, page_size: int, sort_by: str = 'concept', order_by: int = 1):
-        items = self._get_all_cached(
+        return self._paginate(
             self.material_repo,
             filters,
+            page,
+            page_size,
+            serializer=MaterialSerializer,
             prefix=self.CACHE_PREFIX,
             order_field=sort_by,
             order=order_by
         )
-        return self._paginate(items, page, page_size, serializer=MaterialSerializer)
+
+    def suggest(self, q, limit: int = SUGGEST_LIMIT, supplier_id: str = None, ttl: int = 60):
+        """
+        Autocompletado de materiales: prefijo sobre search_tokens (índice),
+        solo campos ligeros y sin serializer para responder rápido.
+        """
+        filters = search_filter(q)
+        if not filters:
+            return []
+        if supplier_id:
+            filters["supplier_id"] = supplier_id
+
+        try:
+            limit = int(limit or self.SUGGEST_LIMIT)
+        except (TypeError, ValueError):
+            limit = self.SUGGEST_LIMIT
+        limit = min(max(limit, 1), self.SUGGEST_MAX_LIMIT)
+
+        @cache_result(prefix=self.CACHE_PREFIX, ttl=ttl)
+        def _cached(repo_ref, filters_ref, limit_ref, kind):
+            # Orden en MongoDB: los primeros `limit` alfabéticamente, estables
+            docs = repo_ref.find_page(
+                filters_ref, sort=[("concept", 1), ("_id", 1)], page=1,
+                page_size=limit_ref, projection=self.SUGGEST_PROJECTION)
+            return [{
+                "id": str(d["_id"]),
+                "concept": d.get("concept"),
+                "sku": d.get("sku"),
+                "measurement": d.get("measurement"),
+                "supplier_code": d.get("supplier_code"),
+                "supplier_id": d.get("supplier_id"),
+            } for d in docs]
+
+        return _cached(self.material_repo, filters, limit, "suggest")
 
     def export_format(
         self,
@@ -1,6 +1,7 @@
 from api.serializers.notification_serializer import NotificationSerializer
 from api.services.base_service import BaseService
 from api.repositories.notification_repository import NotificationRepository
+from api.utils.pagination_utils import keyset_paginate
 
 
 class NotificationService(BaseService):
@@ -12,12 +13,21 @@ class NotificationService(BaseService):
         self.notification_repository = NotificationRepository()
 
     def get_paginated(self, filters: dict, page: int, page_size: int, sort_by: str = 'created_at', order_by: int = 1):
-        items = self._get_all_cached(
+        return self._paginate(
             self.notification_repository,
             filters,
+            page,
+            page_size,
+            serializer=NotificationSerializer,
             prefix=self.CACHE_PREFIX,
             order_field=sort_by,
             order=order_by
         )
 
-        return self._paginate(items, page, page_size, serializer=NotificationSerializer)
+    def get_cursor_page(self, filters: dict, after: str, page_size: int):
+        """Paginación por cursor (más recientes primero) sin cache."""
+        paginator, page = keyset_paginate(
+            self.notification_repository, filters, after, page_size)
+        page.object_list = NotificationSerializer(
+            page.object_list, many=True).data
+        return paginator, page
@@ -0,0 +1,108 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from api.services.base_service import BaseService
+from api.repositories.explosion_repository import ExplosionRepository
+from api.repositories.po_requirement_repository import PORequirementRepository
+from api.repositories.purchase_order_repository import PurchaseOrderRepository
+
+
+class PORequirementService(BaseService):
+    """
+    Mantiene el read model 'po_requirements' (ver PORequirementRepository).
+    Se recalcula por OD (y opcionalmente proveedor) cuando corre la
+    explosión o cambia una orden de compra; abrir el editor de OC es una
+    sola lectura indexada con el material resuelto por $lookup.
+    """
+    # Órdenes que ya descuentan lo pendiente (generadas / aprobadas)
+    ORDERED_STATUSES = [1, 2]
+    KEY_FIELDS = ["home_production_id", "supplier_id", "material_id"]
+
+    def __init__(self):
+        self.req_repo = PORequirementRepository()
+        self.exp_repo = ExplosionRepository()
+        self.po_repo = PurchaseOrderRepository()
+
+    def refresh(self, home_production_id: str, supplier_id: Optional[str] = None) -> int:
+        """Recalcula las filas de la OD (o de un proveedor); regresa cuántas quedan."""
+        if not home_production_id:
+            return 0
+        scope = {"home_production_id": home_production_id}
+        if supplier_id:
+            scope["supplier_id"] = supplier_id
+
+        explosion = self.exp_repo.find_all(
+            scope, order_field="_id",
+            projection={"material_id": 1, "supplier_id": 1, "gran_total": 1,
+                        "explosion": 1, "color": 1}) or []
+        orders = self.po_repo.find_all(
+            {**scope, "status": {"$in": self.ORDERED_STATUSES}},
+            projection={"supplier_id": 1, "items.material_id": 1,
+                        "items.total_quantity": 1}) or []
+
+        ordered: Dict[tuple, float] = defaultdict(float)
+        with_orders = set()
+        for order in orders:
+            with_orders.add(order.get("supplier_id"))
+            for item in order.get("items") or []:
+                ordered[(order.get("supplier_id"), item.get("material_id"))] += float(
+                    item.get("total_quantity") or 0)
+
+        docs: List[Dict[str, Any]] = []
+        positions: Dict[str, int] = defaultdict(int)
+        for item in explosion:
+            supplier = item.get("supplier_id")
+            material_id = item.get("material_id")
+            if not supplier or not material_id:
+                continue
+            required = item.get("gran_total") or 0
+            consumed = ordered.get((supplier, material_id), 0.0)
+            docs.append({
+                "home_production_id": home_production_id,
+                "supplier_id": supplier,
+                "material_id": material_id,
+                # Orden de la explosión: es el 'id' de la fila en el editor
+                "position": positions[supplier],
+                "required": required,
+                "ordered": consumed,
+                "pending": float(required) - consumed,
+                "has_orders": supplier in with_orders,
+                "quantities": item.get("explosion") or [],
+                "color": item.get("color"),
+            })
+            positions[supplier] += 1
+
+        self.req_repo.bulk_upsert(self.KEY_FIELDS, docs)
+
+        # Filas de materiales que ya no están en la explosión
+        keep: Dict[str, List[str]] = defaultdict(list)
+        for doc in docs:
+            keep[doc["supplier_id"]].append(doc["material_id"])
+        stale = dict(scope)
+        if keep:
+            stale["$nor"] = [
+                {"supplier_id": supplier, "material_id": {"$in": materials}}
+                for supplier, materials in keep.items()
+            ]
+        self.req_repo.delete_by_query(stale)
+        return len(docs)
+
+    def get(self, home_production_id: str, supplier_id: str,
+            divisions: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Filas del proveedor en la OD, en el orden de la explosión, con el
+        material en `material_id_ref`; solo las de materiales existentes y,
+        si se indican, de esas divisiones. Si aún no existen se construyen.
+        """
+        query = {"home_production_id": home_production_id, "supplier_id": supplier_id}
+        joined_match = {"material_id_ref": {"$ne": None}}
+        if divisions:
+            joined_match["material_id_ref.division"] = {"$in": divisions}
+
+        rows = self.req_repo.find_joined(
+            query, sort=[("position", 1)], joined_match=joined_match)
+        # Sin filas puede ser el filtro; solo se construye si no hay ninguna
+        if not rows and not self.req_repo.count(query) \
+                and self.refresh(home_production_id, supplier_id):
+            rows = self.req_repo.find_joined(
+                query, sort=[("position", 1)], joined_match=joined_match)
+        return rows
@@ -179,12 +179,14 @@ class ProjectService(BaseService):
 
         new_project_id = self.project_repo.insert(project_clone)
 
-        # Clonar conceptos
+        # Clonar conceptos (un solo insert_many)
         concepts = self.concept_repo.find_all({"project_id": project_id})
+        concept_copies = []
         for concept in concepts:
             concept_copy = {k: v for k, v in concept.items() if k not in [
                 "_id", "created_at", "updated_at"]}
             concept_copy["project_id"] = str(new_project_id)
-            self.concept_repo.insert(concept_copy)
+            concept_copies.append(concept_copy)
+        self.concept_repo.insert_many(concept_copies)
 
         return str(new_project_id)
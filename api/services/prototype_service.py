@@ -5,6 +5,7 @@ from api.repositories.prototype_repository import PrototypeRepository
 from api.repositories.client_repository import ClientRepository
 from api.services.catalog_service import CatalogService
 from api.serializers.prototype_serializer import PrototypeSerializer
+from api.helpers.search import apply_search
 
 
 class TendencyValidationError(Exception):
@@ -92,20 +93,18 @@ class PrototypeService(BaseService):
         if front:
             filters["front"] = front
         if q:
-            filters["$or"] = [
-                {"client_name": {"$regex": q, "$options": "i"}},
-                {"name": {"$regex": q, "$options": "i"}},
-                {"front": {"$regex": q, "$options": "i"}},
-            ]
+            apply_search(filters, q)
 
-        items = self._get_all_cached(
+        return self._paginate(
             self.prototype_repo,
             filters,
+            page,
+            page_size,
+            serializer=PrototypeSerializer,
             prefix=self.CACHE_PREFIX,
             order_field=sort_by,
             order=order_by
         )
-        return self._paginate(items, page, page_size, serializer=PrototypeSerializer)
 
     def get_by_id(self, prototype_id: str):
         return self._get_by_id(
@@ -5,24 +5,30 @@ from rest_framework.exceptions import ValidationError
 from openpyxl.utils.exceptions import InvalidFileException
 from api.helpers.formats import to_float, mongo_to_json, to_number, normalize_num
 from api.services.base_service import BaseService
-from api.utils.cache_utils import invalidate_cache
+from api.utils.cache_utils import invalidate_cache, cache_tag
 from api.repositories.client_repository import ClientRepository
 from api.repositories.volumetry_repository import VolumetryRepository
 from api.repositories.material_repository import MaterialRepository
 from api.serializers.file_serializer import FileUploadSerializer
-from api.functions.quantify import quantify
+from api.functions.quantify import schedule_quantify
 
 
 class VolumetryService(BaseService):
     """Lógica de negocio para la volumetría."""
 
     CACHE_PREFIX = "volumetries"
+    TAG_FIELDS = ["client_id", "front", "prototype"]
 
     def __init__(self):
         self.client_repo = ClientRepository()
         self.volumetry_repo = VolumetryRepository()
         self.material_repo = MaterialRepository()
 
+    def _cache_tag(self, client_id: str, front: str, prototype: str) -> Optional[str]:
+        return cache_tag(
+            {"client_id": client_id, "front": front, "prototype": prototype},
+            self.TAG_FIELDS)
+
     @staticmethod
     def validate_and_sum_volumetry(rows: Any) -> Tuple[List[Dict[str, Any]], float]:
         """
@@ -122,13 +128,17 @@ class VolumetryService(BaseService):
         return result
 
     def _process_data(self, client_id: str, front: str, prototype: str, data: Dict[str, List[Dict]]):
-        num_inserted = 0
-        num_updated = 0
         errors = []
-        processed_volumetry = []
+        upserts = []
+        key_fields = ["client_id", "front", "prototype", "material_id"]
+
+        # Prefetch de materiales en 1 query (antes: 1 find_one por SKU)
+        materials_by_sku: Dict[str, Dict[str, Any]] = {}
+        for m in self.material_repo.find_all({"sku": {"$in": list((data or {}).keys())}}):
+            materials_by_sku.setdefault(m.get("sku"), m)
 
         for sku, v in (data or {}).items():
-            material = self.material_repo.find_one({"sku": sku})
+            material = materials_by_sku.get(sku)
 
             if not material:
                 # Yo no lo silencaría: lo reporto
@@ -163,41 +173,48 @@ class VolumetryService(BaseService):
                 errors.append({"sku": sku, "message": str(e)})
                 continue
 
-            query = {
+            upserts.append({
                 "client_id": client_id,
                 "front": front,
                 "prototype": prototype,
                 "material_id": material_id,
-            }
-
-            set_data = {
-                **query,
                 "supplier_id": material.get("supplier_id"),
                 "volumetry": rows,
                 "total": round(total, 2),
-            }
+            })
 
-            # Ideal: que upsert_one te regrese inserted/updated
-            doc = self.volumetry_repo.upsert_one(query, set_data)
+        # Un solo bulk_write para todas las filas del archivo
+        result = self.volumetry_repo.bulk_upsert(key_fields, upserts)
+
+        materials_by_id = {str(m.get("_id")): m for m in materials_by_sku.values()}
+        docs = self.volumetry_repo.find_all({
+            "client_id": client_id,
+            "front": front,
+            "prototype": prototype,
+            "material_id": {"$in": [u["material_id"] for u in upserts]},
+        }) if upserts else []
+
+        # En el orden de las filas del archivo, como lo muestra el frontend
+        docs_by_material = {doc.get("material_id"): doc for doc in docs}
+        processed_volumetry = []
+        for upsert in upserts:
+            doc = docs_by_material.get(upsert["material_id"])
+            if not doc:
+                continue
+            material = materials_by_id.get(doc.get("material_id"), {})
             processed_volumetry.append({**doc,
-                                        'id': material_id,
+                                        'id': doc.get("material_id"),
                                         'concept': material.get('concept'),
                                         'sku': material.get('sku'),
                                         'division': material.get('division'),
                                         'measurement': material.get('measurement'),
                                         'presentation': material.get('presentation')})
-            created = doc.get("created_at")
-            updated = doc.get("updated_at")
-
-            if created and updated and created == updated:
-                num_inserted += 1
-            else:
-                num_updated += 1
 
-        invalidate_cache(self.CACHE_PREFIX)
+        invalidate_cache(self.CACHE_PREFIX, [
+                         self._cache_tag(client_id, front, prototype)])
         return {
-            "num_inserted": num_inserted,
-            "num_updated": num_updated,
+            "num_inserted": result["inserted"],
+            "num_updated": result["matched"],
             "errors": errors,
             "volumetry": [mongo_to_json(v) for v in processed_volumetry]}
 
@@ -265,10 +282,10 @@ class VolumetryService(BaseService):
             # Upsert atómico (reduce race conditions)
             self.volumetry_repo.upsert_one(query, set_data)
 
-        # Si tienes caché por prefijo y quieres invalidar todo lo de ese cliente/front/prototype,
-        # aquí podrías limpiar caché. Depende de cómo lo maneje BaseService.
-        invalidate_cache(self.CACHE_PREFIX)
-        quantify.delay(client_id, front, prototype)
+        # Solo se invalida la volumetría de ese cliente/front/prototype
+        invalidate_cache(self.CACHE_PREFIX, [
+                         self._cache_tag(client_id, front, prototype)])
+        schedule_quantify(client_id, front, prototype)
         return True
 
     def upload(self, client_id: str, front: str, prototype: str, data, request_file):
@@ -303,7 +320,7 @@ class VolumetryService(BaseService):
 
         summary = self._process_data(
             client_id, front, prototype, volumetry_data)
-        quantify.delay(client_id, front, prototype)
+        schedule_quantify(client_id, front, prototype)
         return summary
 
     def get(
@@ -326,6 +343,7 @@ class VolumetryService(BaseService):
             repo=self.volumetry_repo,
             filters=filters,
             prefix=self.CACHE_PREFIX,
+            tag_fields=self.TAG_FIELDS,
         ) or []
 
         # 1) Recolectar material_ids (strings)
@@ -360,6 +378,7 @@ class VolumetryService(BaseService):
             repo=self.volumetry_repo,
             _id=volumetry_id,
             cache_prefix=self.CACHE_PREFIX,
+            tag_fields=self.TAG_FIELDS,
         )
 
         client_id = existing.get("client_id")
@@ -370,6 +389,6 @@ class VolumetryService(BaseService):
             return True
 
         if client_id and front and prototype:
-            quantify.delay(client_id, front, prototype)
+            schedule_quantify(client_id, front, prototype)
 
         return True
@@ -1,50 +1,42 @@
+import io
 import os
-import shutil
 import zipfile
 from bson import json_util
 from celery import shared_task
-from pymongo import MongoClient
 from datetime import datetime
 from django.conf import settings
+from api_sataiga.handlers.mongo_client import get_mongo_client
+from api_sataiga.handlers.mongodb_handler import MongoDBHandler
+
+
+def _dump_collection(zipf, collection_name):
+    """
+    Escribe la colección como arreglo JSON directamente dentro del zip,
+    documento por documento, sin cargar la colección completa en memoria.
+    """
+    with zipf.open(f"{collection_name}.json", "w") as raw:
+        with io.TextIOWrapper(raw, encoding="utf-8") as f:
+            f.write("[")
+            with MongoDBHandler(collection_name) as db:
+                for idx, doc in enumerate(db.iter_extract()):
+                    f.write(",\n" if idx else "\n")
+                    f.write(json_util.dumps(doc, indent=2, ensure_ascii=False))
+            f.write("\n]")
 
 
 @shared_task
 def backup_mongodb():
-    uri = "mongodb://{}:{}@{}:{}?authSource=admin".format(
-        settings.MONGO_DB['USER'],
-        settings.MONGO_DB['PASS'],
-        settings.MONGO_DB['HOST'],
-        settings.MONGO_DB['PORT']
-    )
-    client = MongoClient(uri)
-    db = client["bellarti"]
-
     backup_dir = "backups/mongodb"
     os.makedirs(backup_dir, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_dir = os.path.join(backup_dir, f"temp_{timestamp}")
-    os.makedirs(temp_dir, exist_ok=True)
 
+    db = get_mongo_client()[settings.MONGO_DB['NAME']]
     collections = db.list_collection_names()
 
-    for collection_name in collections:
-        collection = db[collection_name]
-        data = list(collection.find({}))
-
-        file_path = os.path.join(temp_dir, f"{collection_name}.json")
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(json_util.dumps(data, indent=2, ensure_ascii=False))
-
     zip_filename = os.path.join(backup_dir, f"backup_{timestamp}.zip")
     with zipfile.ZipFile(zip_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, temp_dir)
-                zipf.write(file_path, arcname)
-
-    shutil.rmtree(temp_dir)
-    client.close()
+        for collection_name in collections:
+            _dump_collection(zipf, collection_name)
 
     return f"Respaldo creado: {zip_filename} con {len(collections)} colecciones."
@@ -1,3 +1,669 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+import bson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from django.core.cache import cache
+from django_redis.serializers.json import JSONSerializer
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from api.functions import explosion as explosion_module
+from api.functions.explosion import (
+    coalesced_explosion, compute_delta_explosion, compute_explosion)
+from api.functions.explosion_matrix import (
+    FIELDS, VolumetryMatrix, cents, from_cents, scale_documents, to_cents)
+from api.helpers.search import (
+    MATCH_NOTHING, MAX_QUERY_TOKENS, SEARCH_TOKENS_FIELD, apply_search,
+    build_search_tokens, fold, search_filter, tokenize)
+from api.services import lot_service
+from api.services.lot_service import LotService
+from api.use_cases import inbound_use_case
+from api.use_cases.inbound_use_case import InboundUseCase
+from api.utils import cache_utils
+from api.utils.cache_codec import JSON, RAW_BSON, ZLIB_BSON, BSONSerializer, decode, encode
+from api.utils.cache_metrics import payload_size
+from api.utils.cache_utils import cache_result, invalidate_cache, stale_served
+from api.utils import task_coalescing
+from api.utils.pagination_utils import decode_cursor, encode_cursor, keyset_paginate
+from api.utils.task_coalescing import KeyBusy, claim, schedule
 
-# Create your tests here.
+
+def _row(material_id, prototype, areas, supplier_id="s1"):
+    """Fila de volumetría: areas = {área: (factory, installation, delivery)}."""
+    return {
+        "material_id": material_id,
+        "supplier_id": supplier_id,
+        "prototype": prototype,
+        "volumetry": [
+            dict(zip(("area", *FIELDS), (area, *values)))
+            for area, values in areas.items()
+        ],
+    }
+
+
+VOLUMETRY = [
+    _row("m1", "P1", {"Cocina": (0.29, 1, 0), "Baño": (0.13, 0, 2.67)}),
+    _row("m1", "P2", {"Cocina": (1.5, 0.25, 0)}),
+    _row("m1", "P3", {"Closet": (2, 0, 0), "Cocina": (0.1, 0, 0)}),
+    _row("m2", "P2", {"Baño": (3, 0, 0)}),
+    _row("m2", "P3", {"Closet": (0, 0, 1.01)}),
+]
+
+
+def _quantities(doc):
+    """{(área, prototype): cantidades} de un documento de explosión."""
+    return {
+        (area["area"], p["prototype"]): p["quantities"]
+        for area in doc["explosion"] for p in area["prototypes"]
+    }
+
+
+class CentsTests(SimpleTestCase):
+    def test_half_up(self):
+        self.assertEqual(to_cents([0.125, 2.675, 1.005, 0.0]).tolist(), [13, 268, 101, 0])
+        self.assertEqual(from_cents(to_cents(0.125)), 0.13)
+        # Error de float: 0.29 * 3 = 0.8699999...
+        self.assertEqual(to_cents(0.29 * 3), 87)
+
+    def test_cents_of_quantities(self):
+        # Las cantidades ya vienen normalizadas a 2 decimales (to_float)
+        self.assertEqual(cents("2.67"), 267)
+        self.assertEqual(cents(8.01), 801)
+
+    def test_invalid_and_negative_are_zero(self):
+        self.assertEqual(cents(None), 0)
+        self.assertEqual(cents("abc"), 0)
+        self.assertEqual(cents(-3), 0)
+
+
+class VolumetryMatrixTests(SimpleTestCase):
+    lots = {"P1": 3, "P2": 2, "P3": 1}
+
+    def setUp(self):
+        self.matrix = VolumetryMatrix(VOLUMETRY)
+        self.docs = self.matrix.documents(self.matrix.explode(self.lots))
+
+    def assertTotalsMatchParts(self, doc):
+        area_cents = []
+        for area in doc["explosion"]:
+            parts = sum(cents(p["quantities"][f]) for p in area["prototypes"] for f in FIELDS)
+            self.assertEqual(cents(area["total"]), parts)
+            area_cents.append(parts)
+        self.assertEqual(cents(doc["gran_total"]), sum(area_cents))
+
+    def test_explode_multiplies_by_lots(self):
+        q = _quantities(self.docs[("m1", "s1")])
+        self.assertEqual(q[("Cocina", "P1")], {"factory": 0.87, "installation": 3.0, "delivery": 0.0})
+        self.assertEqual(q[("Baño", "P1")], {"factory": 0.39, "installation": 0.0, "delivery": 8.01})
+        self.assertEqual(q[("Cocina", "P2")], {"factory": 3.0, "installation": 0.5, "delivery": 0.0})
+
+    def test_totals_are_sum_of_parts(self):
+        for doc in self.docs.values():
+            self.assertTotalsMatchParts(doc)
+        self.assertEqual(self.docs[("m2", "s1")]["gran_total"], 7.01)
+
+    def test_gran_totals_match_documents(self):
+        exploded = self.matrix.explode(self.lots)
+        totals = dict(zip(self.matrix.keys, self.matrix.gran_totals(exploded).tolist()))
+        for key, doc in self.docs.items():
+            self.assertEqual(totals[key], cents(doc["gran_total"]))
+
+    def test_zero_lots_are_dropped(self):
+        docs = self.matrix.documents(self.matrix.explode({"P2": 1}))
+        self.assertEqual(set(_quantities(docs[("m1", "s1")])), {("Cocina", "P2")})
+        self.assertEqual([a["area"] for a in docs[("m2", "s1")]["explosion"]], ["Baño"])
+
+    def test_scale_documents_keeps_totals_consistent(self):
+        current = list(self.docs.values())
+        scaled = scale_documents(current, 5 / 3)
+        self.assertEqual(len(scaled), len(current))
+        for doc in scaled:
+            self.assertTotalsMatchParts(doc)
+        self.assertEqual(_quantities(scaled[0])[("Cocina", "P1")]["installation"], 5.0)
+
+    def test_scale_documents_rounds_half_up(self):
+        doc = {"explosion": [{"area": "Cocina", "prototypes": [{
+            "prototype": "P1",
+            "quantities": {"factory": 0.25, "installation": 5.35, "delivery": 0},
+        }]}]}
+        scaled = scale_documents([doc], 0.5)[0]
+        self.assertEqual(_quantities(scaled)[("Cocina", "P1")],
+                         {"factory": 0.13, "installation": 2.68, "delivery": 0.0})
+        self.assertEqual(scaled["explosion"][0]["total"], 2.81)
+        self.assertEqual(scaled["gran_total"], 2.81)
+
+    def test_state_round_trip(self):
+        restored = VolumetryMatrix.from_state(self.matrix.to_state())
+        self.assertEqual(restored.keys, self.matrix.keys)
+        self.assertEqual(restored.prototypes, self.matrix.prototypes)
+        self.assertEqual(restored.areas, self.matrix.areas)
+        self.assertEqual(restored.per_lot.tolist(), self.matrix.per_lot.tolist())
+        self.assertEqual(restored.documents(restored.explode(self.lots)), self.docs)
+
+
+class DeltaExplosionTests(SimpleTestCase):
+    def setUp(self):
+        hp = {"lots": {"total": 6, "prototypes": {"P1": 3, "P2": 2, "P3": 1}}}
+        docs = compute_explosion(hp, VOLUMETRY, [], prev_lots=0)
+        self.current = [
+            {"material_id": m, "supplier_id": s, **doc} for (m, s), doc in docs.items()]
+
+    def test_delta_only_touches_affected_prototypes(self):
+        # P1 baja a 0 lotes y P2 sube a 4; P3 no cambia
+        hp = {"lots": {"total": 5, "prototypes": {"P1": 0, "P2": 4, "P3": 1}}}
+        result = compute_delta_explosion(hp, VOLUMETRY, self.current, {"P1", "P2"})
+        before = _quantities(self.current[0])
+        after = _quantities(result[("m1", "s1")])
+
+        # Sin lotes: P1 desaparece, y con él el área que solo tenía P1
+        self.assertFalse(any(p == "P1" for _, p in after))
+        self.assertNotIn("Baño", [a["area"] for a in result[("m1", "s1")]["explosion"]])
+        # P3 (no afectado) queda igual; P2 se recalcula
+        for key in (("Closet", "P3"), ("Cocina", "P3")):
+            self.assertEqual(after[key], before[key])
+        self.assertEqual(after[("Cocina", "P2")], {"factory": 6.0, "installation": 1.0, "delivery": 0.0})
+
+        # Mismo resultado que recalcular toda la explosión con los lotes nuevos
+        full = compute_explosion(hp, VOLUMETRY, [], prev_lots=0)
+        for key, doc in result.items():
+            self.assertEqual(_quantities(doc), _quantities(full[key]))
+            self.assertEqual(doc["gran_total"], full[key]["gran_total"])
+
+    def test_delta_skips_materials_without_affected_volumetry(self):
+        hp = {"lots": {"total": 7, "prototypes": {"P1": 4, "P2": 2, "P3": 1}}}
+        result = compute_delta_explosion(hp, VOLUMETRY, self.current, {"P1"})
+        self.assertEqual(set(result), {("m1", "s1")})
+        after = _quantities(result[("m1", "s1")])
+        self.assertEqual(after[("Cocina", "P2")], _quantities(self.current[0])[("Cocina", "P2")])
+        self.assertEqual(after[("Cocina", "P1")]["installation"], 4.0)
+
+    def test_delta_removes_prototype_down_to_zero_lots(self):
+        # Se borra el último lote de P3
+        hp = {"lots": {"total": 5, "prototypes": {"P1": 3, "P2": 2}}}
+        result = compute_delta_explosion(hp, VOLUMETRY, self.current, {"P3"})
+        m1 = result[("m1", "s1")]
+        self.assertFalse(any(p == "P3" for _, p in _quantities(m1)))
+        self.assertNotIn("Closet", [a["area"] for a in m1["explosion"]])
+        self.assertEqual(_quantities(result[("m2", "s1")]), {
+            ("Baño", "P2"): {"factory": 6.0, "installation": 0.0, "delivery": 0.0}})
+        self.assertEqual(result[("m2", "s1")]["gran_total"], 6.0)
+
+    def test_delta_without_lots_empties_explosion(self):
+        hp = {"lots": {"total": 0, "prototypes": {}}}
+        result = compute_delta_explosion(hp, VOLUMETRY, self.current, {"P1", "P2", "P3"})
+        for doc in result.values():
+            self.assertEqual(doc, {"explosion": [], "gran_total": 0.0})
+
+
+class LotDeleteTests(SimpleTestCase):
+    def test_deleting_last_lot_resets_summary_and_schedules_negative_delta(self):
+        service = LotService()
+        lot = {"_id": ObjectId(), "home_production_id": "hp1", "prototype": "P3"}
+        service.lot_repo = mock.Mock(find_all=mock.Mock(return_value=[]))
+        with mock.patch.object(service, "_get_by_id", return_value=lot), \
+                mock.patch.object(service, "_delete"), \
+                mock.patch.object(service, "_update") as update, \
+                mock.patch.object(lot_service, "schedule_explosion") as schedule_explosion:
+            service.delete(str(lot["_id"]))
+        self.assertEqual(update.call_args.kwargs["data"],
+                         {"lots": {"total": 0, "prototypes": {}}, "progress": 0})
+        schedule_explosion.assert_called_once_with("hp1", {"P3": -1})
+
+
+class FakeCursorRepository:
+    """Repositorio en memoria con la misma semántica de find_after."""
+
+    def __init__(self, total):
+        start = datetime(2025, 1, 1)
+        self.docs = [
+            {"_id": ObjectId(), "created_at": start + timedelta(minutes=i)}
+            for i in range(total)
+        ]
+        self.count_calls = 0
+
+    def add(self):
+        doc = {"_id": ObjectId(), "created_at": datetime(2026, 1, 1)}
+        self.docs.append(doc)
+        return doc
+
+    def count(self, filters=None):
+        self.count_calls += 1
+        return len(self.docs)
+
+    def find_after(self, filters=None, after=None, limit=10, projection=None):
+        docs = sorted(self.docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+        if after:
+            last = (after["created_at"], after["_id"])
+            docs = [d for d in docs if (d["created_at"], d["_id"]) < last]
+        return docs[:limit]
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        doc = {"_id": ObjectId(), "created_at": datetime(2025, 3, 1, 12, 30)}
+        decoded = decode_cursor(encode_cursor(doc, 3))
+        self.assertEqual(decoded, {"created_at": doc["created_at"], "_id": doc["_id"], "page": 3})
+
+    def test_invalid_tokens(self):
+        # "e30" = {} (sin _id) y "WzFd" = [1] (no es un objeto)
+        for token in (None, "", "1", 1, "!!!", "e30", "WzFd"):
+            self.assertIsNone(decode_cursor(token), token)
+
+
+class KeysetPaginateTests(SimpleTestCase):
+    def setUp(self):
+        self.repo = FakeCursorRepository(25)
+
+    def test_first_page(self):
+        paginator, page = keyset_paginate(self.repo, {}, None, 10)
+        self.assertEqual(page.number, 1)
+        self.assertEqual(len(page), 10)
+        self.assertEqual(page.object_list[0], self.repo.docs[-1])
+        self.assertTrue(page.has_next())
+        self.assertEqual((paginator.count, paginator.num_pages), (25, 3))
+
+    def test_after_returns_next_page(self):
+        _, first = keyset_paginate(self.repo, {}, None, 10)
+        _, second = keyset_paginate(self.repo, {}, first.next_cursor, 10)
+        _, third = keyset_paginate(self.repo, {}, second.next_cursor, 10)
+        self.assertEqual([p.number for p in (first, second, third)], [1, 2, 3])
+        self.assertEqual(second.object_list[0], self.repo.docs[14])
+        self.assertEqual(len(third), 5)
+        self.assertFalse(third.has_next())
+        self.assertIsNone(third.next_cursor)
+        seen = [d["_id"] for p in (first, second, third) for d in p]
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_total_is_recomputed_each_page(self):
+        _, first = keyset_paginate(self.repo, {}, None, 10)
+        self.repo.add()
+        paginator, second = keyset_paginate(self.repo, {}, first.next_cursor, 10)
+        self.assertEqual(self.repo.count_calls, 2)
+        self.assertEqual(paginator.count, 26)
+        # El documento nuevo es más reciente: no se cuela en la página 2
+        self.assertEqual(second.object_list[0], self.repo.docs[14])
+
+    def test_malformed_after_is_rejected(self):
+        for token in ("1", "basura", "e30"):
+            with self.assertRaises(ValidationError):
+                keyset_paginate(self.repo, {}, token, 10)
+
+    def test_empty_after_is_first_page(self):
+        _, page = keyset_paginate(self.repo, {}, "", 10)
+        self.assertEqual(page.number, 1)
+
+
+class CursorQueryParamsTests(SimpleTestCase):
+    def setUp(self):
+        self.repo = FakeCursorRepository(15)
+        patches = [
+            mock.patch.object(inbound_use_case, "InboundRepository", return_value=self.repo),
+            mock.patch.object(
+                inbound_use_case, "InboundSerializer",
+                side_effect=lambda docs, many: SimpleNamespace(
+                    data=[str(d["_id"]) for d in docs])),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self, query):
+        request = SimpleNamespace(META={"QUERY_STRING": query})
+        response = InboundUseCase(request=request).get()
+        return response.status_code, json.loads(response.content)
+
+    def test_cursor_flag_returns_first_page(self):
+        status, body = self.get("cursor=1&itemsPerPage=10")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["page"], 1)
+        self.assertEqual(body["data"][0], str(self.repo.docs[-1]["_id"]))
+        self.assertIsNotNone(body["next_cursor"])
+
+    def test_after_returns_next_page(self):
+        _, first = self.get("cursor=1&itemsPerPage=10")
+        status, body = self.get(f"cursor=1&itemsPerPage=10&after={first['next_cursor']}")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["page"], 2)
+        self.assertEqual(len(body["data"]), 5)
+        self.assertTrue(body["last"])
+        self.assertIsNone(body["next_cursor"])
+
+    def test_malformed_after_is_400(self):
+        with self.assertRaises(ValidationError) as ctx:
+            self.get("cursor=1&after=1")
+        self.assertEqual(ctx.exception.status_code, 400)
+
+
+class CountingService:
+    """Servicio de prueba: cuenta cuántas veces se calcula cada consulta."""
+
+    def __init__(self):
+        self.calls = []
+
+    @cache_result("svc", tag=lambda self, client_id: f"client_id={client_id}")
+    def by_client(self, client_id):
+        self.calls.append(("by_client", client_id))
+        return {"client_id": client_id, "n": len(self.calls)}
+
+    @cache_result("svc")
+    def all(self):
+        self.calls.append(("all",))
+        return {"n": len(self.calls)}
+
+    @cache_result("svc_stale", stale_ttl=600)
+    def report(self):
+        self.calls.append(("report",))
+        return {"n": len(self.calls)}
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CACHE_METRICS_ENABLED=False,
+)
+class CacheResultTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(cache_utils, "publish_invalidation")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = CountingService()
+
+    def invalidate(self, prefix, tags=None):
+        # assertLogs además evita que el INFO llegue al archivo de logs
+        with self.assertLogs("api.utils.cache_utils", "INFO"):
+            invalidate_cache(prefix, tags=tags)
+
+    def warm(self):
+        self.service.by_client(1)
+        self.service.by_client(2)
+        self.service.all()
+        self.service.calls.clear()
+
+    def test_hit_does_not_recompute(self):
+        self.warm()
+        self.assertEqual(self.service.by_client(1)["client_id"], 1)
+        self.service.all()
+        self.assertEqual(self.service.calls, [])
+
+    def test_tag_invalidation_keeps_other_tags(self):
+        self.warm()
+        self.invalidate("svc", tags=["client_id=1"])
+        self.service.by_client(1)
+        self.service.by_client(2)
+        self.service.all()
+        # client 2 sigue en cache; la consulta sin tag (ANY_TAG) se descarta
+        self.assertEqual(self.service.calls, [("by_client", 1), ("all",)])
+
+    def test_prefix_invalidation_drops_everything(self):
+        self.warm()
+        self.invalidate("svc")
+        self.service.by_client(1)
+        self.service.by_client(2)
+        self.service.all()
+        self.assertEqual(
+            self.service.calls, [("by_client", 1), ("by_client", 2), ("all",)])
+
+    def test_none_tag_invalidates_whole_prefix(self):
+        self.warm()
+        self.invalidate("svc", tags=["client_id=1", None])
+        self.service.by_client(2)
+        self.assertEqual(self.service.calls, [("by_client", 2)])
+
+    def test_locked_miss_serves_stale_copy(self):
+        first = self.service.report()
+        self.invalidate("svc_stale")
+        token = stale_served.set(False)
+        self.addCleanup(stale_served.reset, token)
+        # Otro proceso tiene el lock de recálculo
+        with mock.patch.object(cache_utils, "_acquire_lock", return_value=None):
+            result = self.service.report()
+        self.assertEqual(result, first)
+        self.assertEqual(self.service.calls, [("report",)])
+        self.assertTrue(stale_served.get())
+
+    def test_lock_holder_recomputes_after_invalidation(self):
+        self.service.report()
+        self.invalidate("svc_stale")
+        token = stale_served.set(False)
+        self.addCleanup(stale_served.reset, token)
+        self.assertEqual(self.service.report(), {"n": 2})
+        self.assertFalse(stale_served.get())
+
+
+class FakeRedis:
+    """Lo mínimo de redis-py que usa task_coalescing (sin expiración real)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key, ttl):
+        return key in self.data
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+        return len(members)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+class FakeTask:
+    def __init__(self):
+        self.enqueued = []
+
+    def apply_async(self, args=(), countdown=None):
+        self.enqueued.append(args)
+
+
+class TaskCoalescingTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(task_coalescing, "_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.task = FakeTask()
+
+    def schedule(self, *members):
+        return schedule(self.task, "explosion", "hp1", ("hp1",), members)
+
+    def claim(self):
+        return claim(self.task, "explosion", "hp1", ("hp1",))
+
+    def test_burst_enqueues_once(self):
+        self.assertTrue(self.schedule("P1"))
+        self.assertFalse(self.schedule("P2"))
+        with self.claim() as members:
+            self.assertEqual(members, {"P1", "P2"})
+        self.assertEqual(self.task.enqueued, [("hp1",)])
+
+    def test_busy_run_is_requeued_when_lock_is_released(self):
+        self.schedule("P1")
+        with self.claim() as members:
+            self.assertEqual(members, {"P1"})
+            # Llega otra edición: se encola una ejecución que choca con el lock
+            self.assertTrue(self.schedule("P2"))
+            with self.assertRaises(KeyBusy):
+                with self.claim():
+                    pass
+            # La marca sigue puesta: no se encola nada más
+            self.assertFalse(self.schedule("P3"))
+        self.assertEqual(len(self.task.enqueued), 3)
+
+        with self.claim() as members:
+            self.assertEqual(members, {"P2", "P3"})
+        # Nada pendiente: no se vuelve a encolar
+        self.assertEqual(len(self.task.enqueued), 3)
+        self.assertTrue(self.schedule("P4"))
+
+    def test_failure_returns_members_without_requeue(self):
+        self.schedule("P1")
+        with self.assertRaises(RuntimeError):
+            with self.claim():
+                self.schedule("P2")
+                raise RuntimeError("boom")
+        self.assertEqual(len(self.task.enqueued), 2)
+        with self.claim() as members:
+            self.assertEqual(members, {"P1", "P2"})
+
+    def test_busy_task_does_not_use_celery_retry(self):
+        self.schedule("P1")
+        with mock.patch.object(explosion_module, "run_explosion") as run, \
+                mock.patch.object(coalesced_explosion, "retry") as retry, \
+                mock.patch.object(coalesced_explosion, "apply_async") as apply_async:
+            with claim(coalesced_explosion, "explosion", "hp1", ("hp1",)):
+                self.schedule("P2")
+                self.assertFalse(coalesced_explosion("hp1"))
+            retry.assert_not_called()
+            run.assert_not_called()
+            apply_async.assert_called_once_with(args=("hp1",), countdown=mock.ANY)
+
+            self.assertTrue(coalesced_explosion("hp1"))
+            run.assert_called_once_with("hp1", 0, {"P2": 1})
+
+
+def _prefix(term):
+    return {SEARCH_TOKENS_FIELD: {"$regex": f"^{term}"}}
+
+
+class SearchTests(SimpleTestCase):
+    def test_fold(self):
+        self.assertEqual(fold("Válvula Ñandú ÜBER"), "valvula nandu uber")
+        self.assertEqual(fold(None), "")
+        self.assertEqual(fold(500), "500")
+
+    def test_tokenize_accents_and_punctuation(self):
+        self.assertEqual(tokenize("Bisagra  cierre-lento, BISAGRA"), ["bisagra", "cierre", "lento"])
+        self.assertEqual(tokenize("Ángulo/Esquinero (cañón)"), ["angulo", "esquinero", "canon"])
+
+    def test_tokenize_splits_letters_and_digits(self):
+        self.assertEqual(tokenize("AB123"), ["ab123", "ab", "123"])
+        self.assertEqual(tokenize("tubo500mm 500"), ["tubo500mm", "tubo", "500", "mm"])
+
+    def test_build_search_tokens_nested_fields(self):
+        doc = {"material": {"concept": "Jaladera Níquel", "sku": "JN-10"}, "tags": None}
+        self.assertEqual(
+            build_search_tokens(doc, ("material.concept", "material.sku", "tags")),
+            ["10", "jaladera", "jn", "niquel"])
+
+    def test_search_filter_single_and_many_terms(self):
+        self.assertEqual(search_filter("Válv"), _prefix("valv"))
+        self.assertEqual(search_filter("ab123 niq"), {"$and": [_prefix("ab123"), _prefix("niq")]})
+
+    def test_search_filter_without_terms(self):
+        self.assertIsNone(search_filter(None))
+        self.assertIsNone(search_filter("   "))
+        self.assertEqual(search_filter("--- ¿?"), MATCH_NOTHING)
+
+    def test_search_filter_escapes_and_limits_terms(self):
+        q = " ".join(f"t{i}" for i in range(MAX_QUERY_TOKENS + 4))
+        clauses = search_filter(q)["$and"]
+        self.assertEqual(len(clauses), MAX_QUERY_TOKENS)
+        self.assertEqual(clauses[-1], _prefix(f"t{MAX_QUERY_TOKENS - 1}"))
+
+    def test_apply_search(self):
+        self.assertEqual(apply_search({"status": 1}, None), {"status": 1})
+        self.assertEqual(apply_search({"status": 1}, "tubo"),
+                         {"status": 1, **_prefix("tubo")})
+        self.assertEqual(apply_search({"status": 1}, "tubo 500"),
+                         {"status": 1, "$and": [_prefix("tubo"), _prefix("500")]})
+
+    def test_apply_search_merges_existing_and(self):
+        existing = {"supplier_id": "s1"}
+        filters = {"$and": [existing]}
+        self.assertEqual(apply_search(filters, "tubo"),
+                         {"$and": [existing, _prefix("tubo")]})
+        filters = {"$and": [existing]}
+        self.assertEqual(apply_search(filters, "tubo 500"),
+                         {"$and": [existing, _prefix("tubo"), _prefix("500")]})
+
+    def test_apply_search_without_terms_matches_nothing(self):
+        self.assertEqual(apply_search({"status": 1}, "!!"), {"status": 1, **MATCH_NOTHING})
+
+
+class CacheCodecTests(SimpleTestCase):
+    def test_round_trip_keeps_mongo_types(self):
+        value = {
+            "_id": ObjectId(),
+            "created_at": datetime(2025, 3, 1, 12, 30, 15, 123000),
+            "price": Decimal128("12.50"),
+            "blob": b"\x00\x01qr",
+            "items": [{"n": 1, "ok": True, "none": None}],
+        }
+        data = encode(value)
+        self.assertEqual(data[:1], RAW_BSON)
+        decoded = decode(data)
+        self.assertEqual(decoded, value)
+        self.assertIsInstance(decoded["_id"], ObjectId)
+        self.assertIsNone(decoded["created_at"].tzinfo)
+        self.assertIsInstance(decoded["blob"], bytes)
+
+    def test_python_types_without_bson_equivalent(self):
+        decoded = decode(encode({"price": Decimal("3.14"), "pair": (1, 2), "day": date(2025, 1, 2)}))
+        self.assertEqual(decoded["price"], Decimal128("3.14"))
+        self.assertEqual(decoded["price"].to_decimal(), Decimal("3.14"))
+        self.assertEqual(decoded["pair"], [1, 2])
+        self.assertEqual(decoded["day"], datetime(2025, 1, 2))
+
+    def test_scalars_and_lists(self):
+        for value in (None, 0, "texto", [1, "a", None], 1.5):
+            self.assertEqual(decode(encode(value)), value)
+
+    @override_settings(CACHE_COMPRESS_MIN_BYTES=1024)
+    def test_large_payload_is_compressed(self):
+        value = [{"_id": ObjectId(), "concept": "Bisagra cierre lento " * 4} for _ in range(50)]
+        data = encode(value)
+        self.assertEqual(data[:1], ZLIB_BSON)
+        self.assertLess(len(data), len(RAW_BSON) + len(bson.encode({"v": value})))
+        self.assertEqual(decode(data), value)
+        self.assertEqual(encode(value[:1])[:1], RAW_BSON)
+
+    def test_non_string_keys_fall_back_to_json(self):
+        _id = ObjectId()
+        data = encode({1: "uno", "id": _id})
+        self.assertEqual(data[:1], JSON)
+        self.assertEqual(decode(data), {"1": "uno", "id": str(_id)})
+
+    def test_reads_legacy_json_entries(self):
+        legacy = JSONSerializer({}).dumps({"count": 2, "results": [{"name": "A"}]})
+        self.assertEqual(decode(legacy), {"count": 2, "results": [{"name": "A"}]})
+        self.assertEqual(decode(JSONSerializer({}).dumps([1, 2])), [1, 2])
+
+    def test_serializer_records_payload_size(self):
+        serializer = BSONSerializer({})
+        data = serializer.dumps({"a": 1})
+        self.assertEqual(payload_size.get(), len(data))
+        self.assertEqual(serializer.loads(data), {"a": 1})
@@ -29,6 +29,8 @@ urlpatterns = [
     path('catalogs', CatalogView.as_view(), name="catalogs"),
     path('catalog/<str:id>', CatalogByIdView.as_view(), name='catalog'),
     path('materials', MaterialsView.as_view(), name='materials'),
+    path('materials/suggest', MaterialSuggestView.as_view(),
+         name='materials suggest'),
     path('material/<str:id>', MaterialByIdView.as_view(), name='material'),
     path('materials/download_format', DownloadFormatView.as_view(),
          name='decargar formato materials'),
@@ -56,6 +58,8 @@ urlpatterns = [
     path('explosion', ExplosionView.as_view(), name='explosion'),
     path('explosion/<str:home_production_id>',
          ExplosionView.as_view(), name='explosion'),
+    path('explosion/<str:home_production_id>/simulate',
+         ExplosionSimulateView.as_view(), name='explosion-simulate'),
     path('quantification', QuantificationView.as_view(), name='quantification'),
     path('quantification-filters', QuantificationFiltersView.as_view(),
          name='quantification-filters'),
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
 from api.helpers.http_responses import ok, bad_request
-from api.helpers.bcrypt import encrypt_password, verify_password
+from api.helpers.bcrypt import (
+    TooManyAttemptsError, account_slot, encrypt_password, encrypt_password_async,
+    needs_rehash, verify_password_async)
 from api.helpers.validations import email_validation
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from api.serializers.user_serializer import UserSerializer
@@ -56,29 +59,60 @@ class AuthUseCase:
             return NotificationSerializer(notifications, many=True).data
         return []
 
-    def login(self):
+    def __find_active_user(self, email):
         with MongoDBHandler('users') as db:
-            required_fields = ['email', 'password']
-            if all(i in self.data for i in required_fields):
-                user = db.extract(
-                    {'email': self.data['email'].lower(), 'status': 1})
-                if user:
-                    if verify_password(self.data['password'], user[0]['password']):
-                        user_ability_rules = self.__user_ability_rules(
-                            user[0]['permissions'])
-                        permissions = user[0]['permissions']
-                        user = UserSerializer(user[0]).data
-                        user.pop('permissions')
-                        return ok({
-                            'userAbilityRules': user_ability_rules,
-                            'notifications': self.__get_notifications(db, str(user['_id']), user['role']['value']),
-                            'accessToken': encode_user(user),
-                            'userData': user,
-                            'home': self.__set_home(permissions)
-                        })
-                return bad_request('Usuario o contraseña no son válidos.')
+            user = db.extract({'email': email, 'status': 1})
+            return user[0] if user else None
+
+    def __save_password(self, user_id, password):
+        with MongoDBHandler('users') as db:
+            db.update({'_id': ObjectId(user_id)}, {'password': password})
+
+    def __login_response(self, user):
+        with MongoDBHandler('users') as db:
+            user_ability_rules = self.__user_ability_rules(
+                user['permissions'])
+            permissions = user['permissions']
+            user = UserSerializer(user).data
+            user.pop('permissions')
+            return ok({
+                'userAbilityRules': user_ability_rules,
+                'notifications': self.__get_notifications(db, str(user['_id']), user['role']['value']),
+                'accessToken': encode_user(user),
+                'userData': user,
+                'home': self.__set_home(permissions)
+            })
+
+    async def alogin(self):
+        """
+        Login para la vista async: Mongo en hilos y bcrypt en su propio pool
+        acotado, así una ráfaga de logins no detiene al resto de requests.
+        """
+        required_fields = ['email', 'password']
+        if not all(i in self.data for i in required_fields):
             return bad_request('El correo electrónico y la contraseña son obligatorios.')
 
+        email = self.data['email'].lower()
+        try:
+            async with account_slot(email):
+                user = await sync_to_async(
+                    self.__find_active_user, thread_sensitive=False)(email)
+                if not user or not await verify_password_async(self.data['password'], user['password']):
+                    return bad_request('Usuario o contraseña no son válidos.')
+
+                # Migra el hash al costo configurado (BCRYPT_ROUNDS)
+                if needs_rehash(user['password']):
+                    password = await encrypt_password_async(self.data['password'])
+                    await sync_to_async(
+                        self.__save_password, thread_sensitive=False)(user['_id'], password)
+        except TooManyAttemptsError:
+            return bad_request(
+                'Hay un inicio de sesión en curso para esta cuenta. Intente de nuevo.',
+                status_code=429)
+
+        return await sync_to_async(
+            self.__login_response, thread_sensitive=False)(user)
+
     def password_request(self):
         with MongoDBHandler('password_request') as db:
             if 'email' in self.data and email_validation(self.data['email']):
@@ -6,6 +6,7 @@ from urllib.parse import parse_qs
 from api.constants import DEFAULT_PAGE_SIZE
 from bson import ObjectId
 from api.helpers.validations import objectid_validation
+from api.helpers.search import apply_search
 
 
 class CompanyUseCase:
@@ -31,14 +32,7 @@ class CompanyUseCase:
         with MongoDBHandler('companies') as db:
             filters = {}
             if self.q:
-                filters['$or'] = [
-                    {'name': {'$regex': self.q, '$options': 'i'}},
-                    {'rfc': {'$regex': self.q, '$options': 'i'}},
-                    {'address': {'$regex': self.q, '$options': 'i'}},
-                    {'city': {'$regex': self.q, '$options': 'i'}},
-                    {'state': {'$regex': self.q, '$options': 'i'}},
-                    {'email': {'$regex': self.q, '$options': 'i'}},
-                ]
+                apply_search(filters, self.q)
             companies = db.extract(filters)
             paginator = Paginator(companies, per_page=self.page_size)
             page = paginator.get_page(self.page)
@@ -5,6 +5,7 @@ from api.functions.assignments import assignments
 from api.services.explosion_service import ExplosionService
 from api.decorators.service_method import service_method
 from api.helpers.get_query_params import get_query_params
+from api.utils.cache_utils import cache_tag, invalidate_cache
 
 
 class ExplosionUseCase:
@@ -236,11 +237,17 @@ class ExplosionUseCase:
                         client_id=home_production['client_id'],
                         home_production_id=self.home_production_id,
                     )
+                invalidate_cache('explosion', [cache_tag(
+                    {'home_production_id': self.home_production_id}, ['home_production_id'])])
 
     @service_method()
     def get(self):
         return self.service.get(self.home_production_id, self.supplier_id, self.status)
 
+    @service_method()
+    def simulate(self):
+        return self.service.simulate(self.home_production_id, self.data)
+
     @service_method()
     def assign(self):
         self.service.assign(self.data.get('exp_data'))
@@ -7,6 +7,7 @@ from api.helpers.http_responses import ok_paginated, ok, not_found, bad_request
 from api.serializers.home_production_serializer import HomeProductionSerializer
 from api.services.home_production_service import HomeProductionService
 from api.utils.pagination_utils import DummyPaginator, DummyPage
+from api.helpers.search import apply_search
 
 
 class HomeProdcutionUseCase:
@@ -32,10 +33,7 @@ class HomeProdcutionUseCase:
             filters = {}
             if self.q:
                 q = str(self.q)
-                filters['$or'] = [
-                    {'front': {'$regex': q, '$options': 'i'}},
-                    {'od': {'$regex': q, '$options': 'i'}},
-                ]
+                apply_search(filters, q)
 
             result = self.service.get_paginated(
                 filters, self.page, self.page_size, self.sort_by, self.order_by
@@ -5,8 +5,11 @@ from urllib.parse import parse_qs
 from api.constants import DEFAULT_PAGE_SIZE
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from django.core.paginator import Paginator
+from api.repositories.inbound_repository import InboundRepository
+from api.utils.pagination_utils import keyset_paginate
 from api.helpers.http_responses import ok_paginated, ok, created, bad_request, not_found
 from api.serializers.inbound_serializer import InboundSerializer
+from api.utils.cache_utils import invalidate_cache
 from bson import ObjectId
 from api.helpers.validations import objectid_validation
 from datetime import datetime, timedelta
@@ -26,6 +29,8 @@ class InboundUseCase:
             self.supplier = params['supplier'][0] if 'supplier' in params else None
             self.created_at = params['created_at'][0] if 'created_at' in params else None
             self.idx = int(params['idx'][0]) if 'idx' in params else None
+            self.cursor = 'cursor' in params or 'after' in params
+            self.after = params['after'][0] if 'after' in params else None
         self.data = kwargs.get('data', None)
         self.id = kwargs.get('id', None)
         self.project_type = kwargs.get('project_type', None)
@@ -89,6 +94,8 @@ class InboundUseCase:
                     'material': material,
                     'quantity': round(delivered_qty, 2),
                 })
+                # El material ahora tiene inventory_id (ETag de materiales)
+                invalidate_cache('inventory')
 
             MongoDBHandler.record(db, 'inventory_quantity', {
                 'inventory_id': str(inventory_id),
@@ -278,6 +285,14 @@ class InboundUseCase:
         return expanded
 
     def get(self):
+        if self.cursor:
+            paginator, page = keyset_paginate(
+                InboundRepository(), {}, self.after, self.page_size)
+            return ok_paginated(
+                paginator,
+                page,
+                InboundSerializer(page.object_list, many=True).data
+            )
         with MongoDBHandler('inbounds') as db:
             # TODO - Add filters
             inbounds = db.extract()
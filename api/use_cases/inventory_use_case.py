@@ -1,7 +1,9 @@
 from urllib.parse import parse_qs
 from api.constants import DEFAULT_PAGE_SIZE
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
-from django.core.paginator import Paginator
+from api.repositories.inventory_repository import InventoryRepository
+from api.utils.cache_utils import invalidate_cache
+from api.utils.pagination_utils import joined_paginate
 from api.helpers.http_responses import ok, ok_paginated, not_found, bad_request
 from api.serializers.inventory_serializer import InventorySerializer
 from api.serializers.inventory_quantity_serializer import InventoryQuantitySerializer
@@ -9,6 +11,7 @@ from bson import ObjectId
 from api.helpers.validations import objectid_validation
 from openpyxl import Workbook
 from django.http import HttpResponse
+from api.helpers.search import apply_search
 
 
 class InventoryUseCase:
@@ -49,9 +52,9 @@ class InventoryUseCase:
 
     def __export_materials(self, inventory):
         suppliers_list = self.__suppliers_list()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Inventario"
+        # write_only: las filas se escriben al vuelo sin mantener el libro en memoria
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Inventario")
 
         headers = [
             'RACK', 'NIVEL', 'MÓDULO', 'PROVEEDOR', 'CÓDIGO PROVEEDOR',
@@ -118,34 +121,25 @@ class InventoryUseCase:
                                   'inventory_id': self.id})
 
     def get(self):
-        with MongoDBHandler('inventory') as db:
-            filters = {}
-            if self.q:
-                filters['$or'] = [
-                    {'material.concept': {'$regex': self.q, '$options': 'i'}},
-                    {'material.measurement': {'$regex': self.q, '$options': 'i'}},
-                    {'material.supplier_code': {'$regex': self.q, '$options': 'i'}},
-                    {'material.sku': {'$regex': self.q, '$options': 'i'}},
-                    {'material.presentation': {'$regex': self.q, '$options': 'i'}},
-                    {'material.reference': {'$regex': self.q, '$options': 'i'}},
-                ]
-            if self.available:
-                filters['quantity'] = {'$gt': 0}
-            if self.supplier:
-                filters['material.supplier_id'] = self.supplier
-            items = db.extract(filters, 'material.concept', self.order_by)
-            materials = []
-            for item in items:
-                item['availability'] = InventoryUseCase.get_material_availability(
-                    item['material']['id'])
-                materials.append(item)
-            paginator = Paginator(materials, per_page=self.page_size)
-            page = paginator.get_page(self.page)
-            return ok_paginated(
-                paginator,
-                page,
-                InventorySerializer(page.object_list, many=True).data
-            )
+        filters = {}
+        if self.q:
+            apply_search(filters, self.q)
+        if self.available:
+            filters['quantity'] = {'$gt': 0}
+        if self.supplier:
+            filters['material.supplier_id'] = self.supplier
+        # Read model: disponibilidad, última entrada y salida vía $lookup
+        paginator, page = joined_paginate(
+            InventoryRepository(), filters, self.page, self.page_size,
+            sort=[('material.concept', self.order_by), ('_id', self.order_by)])
+        for item in page.object_list:
+            item['availability'] = InventoryQuantitySerializer(
+                item.pop('availability_ref', []), many=True).data
+        return ok_paginated(
+            paginator,
+            page,
+            InventorySerializer(page.object_list, many=True).data
+        )
 
     def get_by_id(self):
         with MongoDBHandler('inventory') as db:
@@ -159,12 +153,12 @@ class InventoryUseCase:
         return ok(InventoryUseCase.get_material_availability(self.material_id))
 
     def download(self):
-        with MongoDBHandler('inventory') as db:
-            filters = {}
-            if self.supplier:
-                filters['material.supplier_id'] = self.supplier
-            materials = db.extract(filters)
-            return self.__export_materials(materials)
+        filters = {}
+        if self.supplier:
+            filters['material.supplier_id'] = self.supplier
+        materials = InventoryRepository().iter_all(
+            filters, projection={'material': 1})
+        return self.__export_materials(materials)
 
     def delete(self):
         with MongoDBHandler('inventory') as db:
@@ -173,6 +167,8 @@ class InventoryUseCase:
             if material:
                 self.__remove_quantities(db)
                 db.delete({'_id': ObjectId(self.id)})
+                # El material pierde su inventory_id (ETag de materiales)
+                invalidate_cache('inventory')
                 return ok(f'El material: {material[0]['material']['concept']} fue eliminado correctamente del inventario.')
             return bad_request('El material no existe en el inventario.')
 
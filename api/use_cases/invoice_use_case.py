@@ -3,6 +3,7 @@ from api.helpers.get_query_params import get_query_params
 from api.helpers.http_responses import ok, ok_paginated, bad_request
 from api.decorators.service_method import service_method
 from api.services.invoice_service import InvoiceService
+from api.helpers.search import apply_search
 
 
 class InvoiceUseCase:
@@ -26,10 +27,7 @@ class InvoiceUseCase:
                 po_filters['supplier_id'] = self.supplier_id
             if self.q:
                 q = str(self.q)
-                po_filters['$or'] = [
-                    {'number': {'$regex': q, '$options': 'i'}},
-                    {'project': {'$regex': q, '$options': 'i'}},
-                ]
+                apply_search(po_filters, q)
 
             purchase_orders_ids = self.service.get_purchaseorder_list(
                 po_filters)
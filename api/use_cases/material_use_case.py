@@ -17,13 +17,22 @@ from PIL import Image
 from django.conf import settings
 from api.functions.concept_n_sku import generate_concept_and_sku
 from api.services.material_service import MaterialService
+from api.repositories.material_repository import MaterialRepository
 from api.services.catalog_service import CatalogService
 from api.utils.pagination_utils import DummyPaginator, DummyPage
 from api.helpers.get_query_params import get_query_params
 from api.helpers.sku import normalize_sku, with_unique_sku
+from api.helpers.search import apply_search
 
 
 class MaterialUseCase:
+    EXPORT_PROJECTION = {
+        'supplier_id': 1, 'concept': 1, 'measurement': 1, 'supplier_code': 1,
+        'sku': 1, 'presentation': 1, 'area': 1, 'reference': 1,
+        'minimum': 1, 'maximum': 1, 'unit_price': 1, 'invetory_price': 1,
+        'market_price': 1, 'price_difference': 1,
+    }
+
     def __init__(self, request=None, **kwargs):
         params = get_query_params(request)
         self.request = request
@@ -179,6 +188,7 @@ class MaterialUseCase:
                             raise exceptions.ValidationError(str(e))
                     else:
                         db_doc = db.update({'_id': ObjectId(doc['_id'])}, item)
+                        invalidate_cache("materials")
 
                     updated.append(item.get('concept') or doc.get('concept'))
 
@@ -224,9 +234,9 @@ class MaterialUseCase:
 
     def __export_materials(self, materials):
         suppliers_list = self.__suppliers_list()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Materiales"
+        # write_only: las filas se escriben al vuelo sin mantener el libro en memoria
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Materiales")
 
         headers = [
             'PROVEEDOR', 'CONCEPTO', 'UNIDAD DE MEDIDA', 'CÓDIGO PROVEEDOR',
@@ -297,14 +307,7 @@ class MaterialUseCase:
         # 🔹 Búsqueda libre
         if self.q:
             q = str(self.q)
-            filters['$or'] = [
-                {'concept': {'$regex': q, '$options': 'i'}},
-                {'measurement': {'$regex': q, '$options': 'i'}},
-                {'supplier_code': {'$regex': q, '$options': 'i'}},
-                {'sku': {'$regex': q, '$options': 'i'}},
-                {'presentation': {'$regex': q, '$options': 'i'}},
-                {'reference': {'$regex': q, '$options': 'i'}},
-            ]
+            apply_search(filters, q)
 
         # 🔹 Filtro de proveedor (prioriza el override si se pasa explícito)
         if self.supplier_id:
@@ -413,6 +416,11 @@ class MaterialUseCase:
         except Exception as e:
             return bad_request(f"Error al obtener prototipos: {e}")
 
+    def suggest(self):
+        params = get_query_params(self.request)
+        return ok(self.service.suggest(
+            self.q, params.get('limit'), self.supplier_id))
+
     def get_by_id(self):
         with MongoDBHandler('materials') as db:
             material = db.extract(
@@ -475,6 +483,7 @@ class MaterialUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if material:
                 db.delete({'_id': ObjectId(self.id)})
+                invalidate_cache("materials")
                 return ok('Material eliminado correctamente.')
             return bad_request('El material no existe.')
 
@@ -501,17 +510,17 @@ class MaterialUseCase:
         return bad_request('El proveedor así como el archivo en formato Excel son requeridos.')
 
     def download(self):
-        with MongoDBHandler('materials') as db:
-            # Convertir divisiones separadas por coma a lista
-            division_list = None
-            if self.division and len(self.division) > 0:
-                division_list = self.division.split(',')
-
-            # Reutilizamos la misma lógica de construcción de filtros
-            filter_query = self.__build_material_filters(
-                division_list=division_list)
-            materials = db.extract(filter_query)
-            return self.__export_materials(materials)
+        # Convertir divisiones separadas por coma a lista
+        division_list = None
+        if self.division and len(self.division) > 0:
+            division_list = self.division.split(',')
+
+        # Reutilizamos la misma lógica de construcción de filtros
+        filter_query = self.__build_material_filters(
+            division_list=division_list)
+        materials = MaterialRepository().iter_all(
+            filter_query, projection=self.EXPORT_PROJECTION)
+        return self.__export_materials(materials)
 
     def upload_image(self):
         with MongoDBHandler('materials') as db:
@@ -541,6 +550,7 @@ class MaterialUseCase:
                 images.append(relative_path)
 
                 db.update({'_id': ObjectId(self.id)}, {'images': images})
+                invalidate_cache("materials")
 
                 return ok(images)
             return bad_request('El material no existe.')
@@ -566,6 +576,7 @@ class MaterialUseCase:
                                       ['images'] if url not in deleted]
                         db.update({'_id': ObjectId(self.id)}, {
                             'images': new_images})
+                        invalidate_cache("materials")
                         return ok(new_images)
                     return bad_request('No existen imágenes en el material seleccionado y/o las imágenes seleccionadas para eliminar.')
                 return bad_request('El material no existe.')
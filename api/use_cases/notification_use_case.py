@@ -18,6 +18,8 @@ class NotificationUseCase:
         self.user_id = params.get('user_id')
         self.role = params.get('role')
         self.today = params.get('today')
+        self.cursor = 'cursor' in params or 'after' in params
+        self.after = params.get('after')
         self.data = data
         self.service = NotificationService()
 
@@ -31,6 +33,10 @@ class NotificationUseCase:
                     {"roles": {"$in": roles}},
                 ]
             }
+            if self.cursor:
+                paginator, page = self.service.get_cursor_page(
+                    filters, self.after, self.page_size)
+                return ok_paginated(paginator, page, page.object_list)
             result = self.service.get_paginated(
                 filters, self.page, self.page_size, self.sort_by, self.order_by
             )
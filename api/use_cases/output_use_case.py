@@ -3,6 +3,8 @@ from api.helpers.http_responses import bad_request, created, ok_paginated, ok, n
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from api.serializers.output_serializer import OutputSerializer
 from django.core.paginator import Paginator
+from api.repositories.output_repository import OutputRepository
+from api.utils.pagination_utils import keyset_paginate
 from urllib.parse import parse_qs
 from api.constants import DEFAULT_PAGE_SIZE
 from bson import ObjectId
@@ -19,6 +21,8 @@ class OutputUseCase:
                 if 'itemsPerPage' in params else DEFAULT_PAGE_SIZE
             self.q = params['q'][0] if 'q' in params else None
             self.created_at = params['created_at'][0] if 'created_at' in params else None
+            self.cursor = 'cursor' in params or 'after' in params
+            self.after = params['after'][0] if 'after' in params else None
         self.data = kwargs.get('data', [])
         self.id = kwargs.get('id', None)
         self.material_id = kwargs.get('material', None)
@@ -117,6 +121,14 @@ class OutputUseCase:
         return bad_request('Algunos campos requeridos no han sido completados.')
 
     def get(self):
+        if self.cursor:
+            paginator, page = keyset_paginate(
+                OutputRepository(), {}, self.after, self.page_size)
+            return ok_paginated(
+                paginator,
+                page,
+                OutputSerializer(page.object_list, many=True).data
+            )
         with MongoDBHandler('outputs') as db:
             # TODO - Add filters
             outputs = db.extract()
@@ -1,16 +1,16 @@
 import copy
 import math
-import re
 import traceback
 import os
-from collections import defaultdict
 from urllib.parse import parse_qs
-from api.constants import DEFAULT_PAGE_SIZE, SUPPLIER_ID_TREND, FIXED_PRESENTATIONS
+from api.constants import DEFAULT_PAGE_SIZE, SUPPLIER_ID_TREND
 from api_sataiga.handlers.mongodb_handler import MongoDBHandler
 from bson import ObjectId
 from api.helpers.validations import objectid_validation
 from api.helpers.http_responses import created, bad_request, ok_paginated, ok, not_found
-from django.core.paginator import Paginator
+from api.repositories.purchase_order_repository import PurchaseOrderRepository
+from api.repositories.po_requirement_repository import PORequirementRepository
+from api.utils.pagination_utils import keyset_paginate, joined_paginate
 from api.serializers.purchase_order_serializer import PurchaseOrderSerializer
 from datetime import datetime
 from django.conf import settings
@@ -25,6 +25,9 @@ from api_sataiga.settings import BASE_URL
 from rest_framework import exceptions
 from api.serializers.supplier_serializer import SupplierSerializer
 from api.functions.email_notifications import notify_email
+from api.helpers.search import apply_search
+from api.helpers.presentation import presentation_amount
+from api.services.po_requirement_service import PORequirementService
 
 
 class PurchaseOrderUseCase:
@@ -41,6 +44,8 @@ class PurchaseOrderUseCase:
             self.division = params['division'][0] if 'division' in params else None
             self.type_project = params['type'][0] if 'type' in params else None
             self.project_id = params['project_id'][0] if 'project_id' in params else None
+            self.cursor = 'cursor' in params or 'after' in params
+            self.after = params['after'][0] if 'after' in params else None
         self.data = kwargs.get('data', None)
         self.id = kwargs.get('id', None)
         self.supplier_id = kwargs.get('supplier_id', None)
@@ -67,12 +72,8 @@ class PurchaseOrderUseCase:
         return False
 
     def __extract_material_fields(self, material):
-        fields = [
-            "concept", "measurement", "supplier_code", "unit_price",
-            "inventory_price", "market_price", "price_difference",
-            "automation", "images", "sku", "presentation",
-            "reference", "division",
-        ]
+        # Mismos campos que trae el $lookup del read model
+        fields = PORequirementRepository.MATERIAL_PROJECTION
 
         retult = {}
 
@@ -83,27 +84,7 @@ class PurchaseOrderUseCase:
         return retult
 
     def __get_amount_presentation(self, presentation):
-        if not presentation or presentation.strip() == "":
-            return None
-
-        presentation = presentation.upper()
-        results = []
-        for key, value in FIXED_PRESENTATIONS.items():
-            if key == presentation:
-                results.append(value)
-
-        numbers = re.findall(r'\d+(?:\.\d+)?', presentation)
-        if numbers:
-            results.extend(float(n) if '.' in n else int(n) for n in numbers)
-
-        results = sorted(set(results), key=lambda x: float(x))
-
-        if not results:
-            return 1
-        elif len(results) == 1:
-            return results[0]
-        else:
-            return results
+        return presentation_amount(presentation)
 
     def __get_total_automation(self, presentation, total, price):
         if not isinstance(presentation, list):
@@ -151,14 +132,13 @@ class PurchaseOrderUseCase:
             },
         }
 
-    def __process_material(self, db, item):
-        material = MongoDBHandler.find(db, 'materials', {'_id': ObjectId(
-            item['material_id'])}) if objectid_validation(item['material_id']) else None
-        if material and (self.division is None or material[0].get('division') in self.division.split(',')):
+    def __process_material(self, row):
+        material = row.get('material_id_ref')
+        if material:
             return {
-                'material_id': item['material_id'],
-                **self.__extract_material_fields(material[0]),
-                **self.__process_material_quantities(item, material[0]),
+                'material_id': row['material_id'],
+                **self.__extract_material_fields(material),
+                **self.__process_material_quantities({'gran_total': row['required']}, material),
             }
         return None
 
@@ -268,32 +248,27 @@ class PurchaseOrderUseCase:
 
         return data
 
-    def __check_materials(self, db, materials):
-        purchase_orders = MongoDBHandler.find(db, 'purchase_orders', {
-                                              'home_production_id': self.project_id, 'supplier_id': self.supplier_id, 'status': {'$in': [1, 2]}})
-        if purchase_orders:
-            total_quantity_sum = defaultdict(float)
-
-            for purchase_order in purchase_orders:
-                for item in purchase_order['items']:
-                    mat_id = item['material_id']
-                    total_quantity_sum[mat_id] += float(
-                        item.get('total_quantity', 0))
-
-            result = []
-            for material in materials:
-                mat_id = material['material_id']
-                required = float(material.get('required', 0))
-                consumed = total_quantity_sum.get(mat_id, 0.0)
-                diff = required - consumed
-
-                if diff > 0:
-                    new_item = copy.deepcopy(material)
-                    new_item['total_quantity'] = diff
-                    result.append(new_item)
-
-            return result
-        return materials
+    def __check_materials(self, rows, materials):
+        """Si ya hay órdenes del proveedor, solo lo pendiente por ordenar."""
+        if not any(row.get('has_orders') for row in rows):
+            return materials
+
+        pending = {row['material_id']: row.get('pending', 0) for row in rows}
+        result = []
+        for material in materials:
+            diff = pending.get(material['material_id'], 0)
+            if diff > 0:
+                new_item = copy.deepcopy(material)
+                new_item['total_quantity'] = diff
+                result.append(new_item)
+        return result
+
+    def __refresh_requirements(self, *orders):
+        """Actualiza po_requirements de cada (OD, proveedor) tocado."""
+        service = PORequirementService()
+        for pair in {(o.get('home_production_id'), o.get('supplier_id')) for o in orders if o}:
+            if all(pair):
+                service.refresh(*pair)
 
     def __upload_file(self, invoice_file, ext):
         fs = FileSystemStorage(
@@ -329,6 +304,7 @@ class PurchaseOrderUseCase:
                     data['invoiced_status'] = 0
                     data['delivered_status'] = 0
                     id = db.insert(data)
+                    self.__refresh_requirements(data)
                     if data['status'] == 1:
                         message = get_message(
                             'purchase_order_generated',
@@ -342,36 +318,39 @@ class PurchaseOrderUseCase:
             return bad_request('Algunos campos requeridos no han sido completados.')
 
     def get(self):
-        with MongoDBHandler('purchase_orders') as db:
-            filters = {}
-            if self.supplier:
-                filters['supplier_id'] = self.supplier
-            if self.type_project:
-                filters['type'] = self.type_project
-            if self.status:
-                filters['status'] = int(
-                    self.status) if self.status.isdigit() else self.status
-                if self.status == 'processed':
-                    filters['status'] = {"$gt": 1}
-            if self.q:
-                filters['$or'] = [
-                    {'project': {'$regex': self.q, '$options': 'i'}},
-                    {'subject': {'$regex': self.q, '$options': 'i'}},
-                    {'request_by_name': {'$regex': self.q, '$options': 'i'}},
-                    {'approved_by_name': {'$regex': self.q, '$options': 'i'}},
-                ]
-            if self.supplier:
-                filters['supplier_id'] = self.supplier
-            if self.project:
-                filters['home_production_id'] = self.project
-            purchase_orders = db.extract(filters)
-            paginator = Paginator(purchase_orders, per_page=self.page_size)
-            page = paginator.get_page(self.page)
+        filters = {}
+        if self.supplier:
+            filters['supplier_id'] = self.supplier
+        if self.type_project:
+            filters['type'] = self.type_project
+        if self.status:
+            filters['status'] = int(
+                self.status) if self.status.isdigit() else self.status
+            if self.status == 'processed':
+                filters['status'] = {"$gt": 1}
+        if self.q:
+            apply_search(filters, self.q)
+        if self.supplier:
+            filters['supplier_id'] = self.supplier
+        if self.project:
+            filters['home_production_id'] = self.project
+        if self.cursor:
+            paginator, page = keyset_paginate(
+                PurchaseOrderRepository(), filters, self.after, self.page_size)
             return ok_paginated(
                 paginator,
                 page,
                 PurchaseOrderSerializer(page.object_list, many=True).data
             )
+        # Read model: proveedor y usuarios resueltos con $lookup
+        paginator, page = joined_paginate(
+            PurchaseOrderRepository(), filters, self.page, self.page_size,
+            sort=[('_id', 1)])
+        return ok_paginated(
+            paginator,
+            page,
+            PurchaseOrderSerializer(page.object_list, many=True).data
+        )
 
     def get_by_id(self):
         with MongoDBHandler('purchase_orders') as db:
@@ -434,39 +413,40 @@ class PurchaseOrderUseCase:
             return ok(db.get_next_folio('purchase_order'))
 
     def get_materials(self):
-        with MongoDBHandler('explosion') as db:
-            data = []
-            costs = {}
-            items = db.extract(
-                {'home_production_id': self.project_id, 'supplier_id': self.supplier_id})
-            for i, item in enumerate(items):
-                material = self.__process_material(db, item)
-                if item and material:
-                    data.append({
-                        'id': i,
-                        'supplier_id': item['supplier_id'],
-                        'required': item['gran_total'],
-                        'quantities': item['explosion'],
-                        'color': item.get('color', None),
-                        'source': 'volumetry',
-                        **material,
-                    })
-            materials = self.__check_materials(db, data)
-            if len(materials) > 0:
-                subtotal = sum(item['total'] for item in materials)
-                costs = {
-                    'subtotal': subtotal,
-                    'iva': round(subtotal*.16, 2),
-                    'total': round(subtotal*1.16, 2),
-                }
-            else:
-                costs = {
-                    'subtotal': 0,
-                    'iva': 0,
-                    'total': 0,
-                }
+        data = []
+        costs = {}
+        # Read model: lo requerido / ordenado con el material ya resuelto
+        # (un solo $lookup) y la división filtrada en MongoDB
+        divisions = self.division.split(',') if self.division else None
+        rows = PORequirementService().get(self.project_id, self.supplier_id, divisions)
+        for row in rows:
+            material = self.__process_material(row)
+            if material:
+                data.append({
+                    'id': row['position'],
+                    'supplier_id': row['supplier_id'],
+                    'required': row['required'],
+                    'quantities': row['quantities'],
+                    'color': row.get('color', None),
+                    'source': 'volumetry',
+                    **material,
+                })
+        materials = self.__check_materials(rows, data)
+        if len(materials) > 0:
+            subtotal = sum(item['total'] for item in materials)
+            costs = {
+                'subtotal': subtotal,
+                'iva': round(subtotal*.16, 2),
+                'total': round(subtotal*1.16, 2),
+            }
+        else:
+            costs = {
+                'subtotal': 0,
+                'iva': 0,
+                'total': 0,
+            }
 
-            return ok({'costs': costs, 'items': materials})
+        return ok({'costs': costs, 'items': materials})
 
     def update(self):
         with MongoDBHandler('purchase_orders') as db:
@@ -495,6 +475,7 @@ class PurchaseOrderUseCase:
                             notify_email('purchase_order_created',
                                          {'id': self.id, **data})
                         db.update({'_id': ObjectId(self.id)}, data)
+                        self.__refresh_requirements(purchase_order[0], data)
                         message_status = 'guardada' if data['status'] == 0 else 'generada'
                         return ok(f'Orden de compra {message_status} correctamente.')
                     return bad_request('El proveedor seleccionado no existe.')
@@ -532,6 +513,7 @@ class PurchaseOrderUseCase:
                     self.data['pdf_file'] = f"{settings.BASE_URL}{settings.MEDIA_URL}{pdf_path}"
 
                 db.update({'_id': ObjectId(self.id)}, self.data)
+                self.__refresh_requirements(purchase_order[0])
                 message_status = 'aprobada' if self.data['status'] == 2 else 'rechazada'
                 return ok(f'Orden de compra {message_status} correctamente.')
             return not_found('La orden de compra no existe.')
@@ -542,6 +524,7 @@ class PurchaseOrderUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if purchase_order:
                 db.delete({'_id': ObjectId(self.id)})
+                self.__refresh_requirements(purchase_order[0])
                 return ok('Orden de compra eliminada correctamente.')
             return not_found('La orden de compra no existe.')
 
@@ -556,6 +539,7 @@ class PurchaseOrderUseCase:
                     self.data['delivered_status'] = InboundUseCase.check_quantities(
                         self.data['items'])
                     db.update({'_id': ObjectId(self.id)}, self.data)
+                    self.__refresh_requirements(purchase_order[0])
                     fields = ["color", "source", "material_id", "concept", "measurement", "supplier_id", "supplier_code",
                               "inventory_price", "market_price", "sku", "presentation", "reference", "delivered", "total_quantity", "division"]
                     items = [{k: d[k] for k in fields if k in d}
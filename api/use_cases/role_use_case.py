@@ -8,6 +8,8 @@ from bson import ObjectId
 from pymongo import errors
 from django.core.paginator import Paginator
 from api.helpers.resolve_permissions import resolve_permissions
+from api.utils.cache_utils import invalidate_cache
+from api.middlewares.authentication import invalidate_auth_user
 
 
 class RoleUseCase:
@@ -42,9 +44,9 @@ class RoleUseCase:
             required_fields = ['name', 'value', 'permissions']
             if all(i in self.data for i in required_fields):
                 try:
-                    db.create_unique_index('value')
                     self.data['status'] = 1
                     db.insert(self.data)
+                    invalidate_cache('roles')
                     return created('Función creada correctamente.')
                 except errors.DuplicateKeyError:
                     return bad_request('El valor de la función ya existe.')
@@ -78,6 +80,8 @@ class RoleUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if role:
                 db.update({'_id': ObjectId(self.id)}, self.data)
+                invalidate_cache('roles')
+                invalidate_auth_user()
                 return ok('Rol actualizado correctamente.')
             return bad_request('La función no existe.')
 
@@ -85,7 +89,10 @@ class RoleUseCase:
         with MongoDBHandler('roles') as db:
             permissions = resolve_permissions(self.data)
             db.update({'_id': ObjectId(self.id)}, {'permissions': permissions})
+            invalidate_cache('roles')
             modified_users = self.__update_user_permissions(db, permissions)
+            # Los permisos se copiaron a los usuarios del rol
+            invalidate_auth_user()
             return ok(f'Función actualizada correctamente, {modified_users} usuario(s) modificado(s).')
 
     def delete(self):
@@ -94,5 +101,7 @@ class RoleUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if role:
                 db.delete({'_id': ObjectId(self.id)})
+                invalidate_cache('roles')
+                invalidate_auth_user()
                 return ok('Función eliminada correctamente.')
             return bad_request('La función no existe.')
@@ -9,6 +9,8 @@ from django.core.paginator import Paginator
 from api.serializers.section_serializer import SectionSerializer
 from bson import ObjectId
 from api.helpers.validations import objectid_validation
+from api.helpers.search import apply_search
+from api.utils.cache_utils import cache_result, invalidate_cache
 
 
 class SectionUseCase:
@@ -27,8 +29,8 @@ class SectionUseCase:
             required_fields = ['parent', 'value']
             if all(i in self.data for i in required_fields):
                 try:
-                    db.create_unique_index('value')
                     db.insert(self.data)
+                    invalidate_cache('sections')
                     return created('Sección creada correctamente.')
                 except errors.DuplicateKeyError:
                     return bad_request('El nombre de la sección proporcionado ya ha sido registrado. Por favor, utilice un nombre diferente.')
@@ -38,11 +40,7 @@ class SectionUseCase:
         with MongoDBHandler('sections') as db:
             filters = {}
             if self.q:
-                filters['$or'] = [
-                    {'parent': {'$regex': self.q, '$options': 'i'}},
-                    {'level_1': {'$regex': self.q, '$options': 'i'}},
-                    {'value': {'$regex': self.q, '$options': 'i'}},
-                ]
+                apply_search(filters, self.q)
             sections = db.extract(filters)
             paginator = Paginator(sections, per_page=self.page_size)
             page = paginator.get_page(self.page)
@@ -58,6 +56,7 @@ class SectionUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if section:
                 db.update({'_id': ObjectId(self.id)}, self.data)
+                invalidate_cache('sections')
                 return ok('Sección actualizada correctamente.')
             return bad_request('La sección no existe')
 
@@ -67,25 +66,29 @@ class SectionUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if section:
                 db.delete({'_id': ObjectId(self.id)})
+                invalidate_cache('sections')
                 return ok('sección eliminada correctamente.')
             return not_found('La sección no existe.')
 
-    def tree_view(self):
+    @cache_result(prefix='sections', ttl=300, local_ttl=30)
+    def _tree_sections(self):
         with MongoDBHandler('sections') as db:
             sections = db.extract()
 
-            tree_sections = {}
-            for section in sections:
-                if section['parent'] not in ['Historial', 'Logs']:
-                    if section['parent'] not in tree_sections:
-                        tree_sections[section['parent']] = []
-                    tree_sections[section['parent']].append({
-                        '_id': str(section['_id']),
-                        'name': self.__set_name_section(section),
-                        'value': section['value'],
-                    })
+        tree_sections = {}
+        for section in sections:
+            if section['parent'] not in ['Historial', 'Logs']:
+                if section['parent'] not in tree_sections:
+                    tree_sections[section['parent']] = []
+                tree_sections[section['parent']].append({
+                    '_id': str(section['_id']),
+                    'name': self.__set_name_section(section),
+                    'value': section['value'],
+                })
+        return tree_sections
 
-            return HttpResponse(json.dumps(tree_sections), content_type='application/json')
+    def tree_view(self):
+        return HttpResponse(json.dumps(self._tree_sections()), content_type='application/json')
 
     def __set_name_section(self, section):
         name = section['parent']
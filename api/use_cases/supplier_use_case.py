@@ -7,6 +7,8 @@ from django.core.paginator import Paginator
 from api.serializers.supplier_serializer import SupplierSerializer
 from bson import ObjectId
 from api.helpers.validations import objectid_validation
+from api.helpers.search import apply_search
+from api.utils.cache_utils import invalidate_cache
 
 
 class SupplierUseCase:
@@ -29,6 +31,7 @@ class SupplierUseCase:
             required_fields = ['name']
             if all(i in self.data for i in required_fields):
                 db.insert(self.data)
+                invalidate_cache('suppliers')
                 return created('Proveedor creado correctamente.')
             return bad_request('Algunos campos requeridos no han sido completados.')
 
@@ -38,11 +41,7 @@ class SupplierUseCase:
             if self.exclude_trend:
                 filters['_id'] = {'$ne': ObjectId(SUPPLIER_ID_TREND)}
             if self.q:
-                filters['$or'] = [
-                    {'name': {'$regex': self.q, '$options': 'i'}},
-                    {'address': {'$regex': self.q, '$options': 'i'}},
-                    {'email': {'$regex': self.q, '$options': 'i'}},
-                ]
+                apply_search(filters, self.q)
             suppliers = db.extract(filters, 'name', self.order_by)
             paginator = Paginator(suppliers, per_page=self.page_size)
             page = paginator.get_page(self.page)
@@ -66,6 +65,7 @@ class SupplierUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if supplier:
                 db.update({'_id': ObjectId(self.id)}, self.data)
+                invalidate_cache('suppliers')
                 return ok('Proveedor actualizado correctamente.')
             return not_found('El proveedor no existe.')
 
@@ -75,5 +75,6 @@ class SupplierUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if supplier:
                 db.delete({'_id': ObjectId(self.id)})
+                invalidate_cache('suppliers')
                 return ok('Proveedor eliminado correctamente.')
             return not_found('El proveedor no existe.')
@@ -9,9 +9,12 @@ from api.helpers.http_responses import *
 from django.core.paginator import Paginator
 from bson import ObjectId
 from pymongo import errors
-from api.helpers.bcrypt import encrypt_password, verify_password
+from asgiref.sync import sync_to_async
+from api.helpers.bcrypt import encrypt_password, encrypt_password_async, verify_password
 from django.conf import settings
 from api.helpers.resolve_permissions import resolve_permissions
+from api.helpers.search import apply_search
+from api.middlewares.authentication import invalidate_auth_user
 
 
 class UserUseCase:
@@ -59,7 +62,6 @@ class UserUseCase:
             if all(i in self.data for i in required_fields):
                 self.__validate_params(db)
                 try:
-                    db.create_unique_index('email')
                     self.data['email'] = self.data['email'].lower()
                     self.data['status'] = 0
                     self.data['permissions'] = self.__assign_permissions(db)
@@ -88,11 +90,7 @@ class UserUseCase:
         with MongoDBHandler('users') as db:
             filters = {'status': {'$lt': 3}}
             if self.q:
-                filters['$or'] = [
-                    {'name': {'$regex': self.q, '$options': 'i'}},
-                    {'lastname': {'$regex': self.q, '$options': 'i'}},
-                    {'email': {'$regex': self.q, '$options': 'i'}},
-                ]
+                apply_search(filters, self.q)
             if self.role:
                 filters['role_id'] = self.role
             if self.status:
@@ -107,31 +105,48 @@ class UserUseCase:
                 UserSerializer(page.object_list, many=True).data
             )
 
-    def register(self):
+    def __pending_user(self):
         with MongoDBHandler('users') as db:
             user = db.extract(
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
-            if user and user[0]['status'] == 0:
-                required_fields = ['password', 'confirm_password']
-                if all(i in self.data for i in required_fields):
-                    if self.data['password'] == self.data['confirm_password']:
-                        password = encrypt_password(self.data['password'])
-                        db.update({'_id': ObjectId(self.id)}, {
-                            'password': password, 'status': 1})
-                        send_email(
-                            template="mail_templated/activated.html",
-                            context={
-                                'subject': '¡Registro Completo! Bienvenido al Sistema Bellarti',
-                                'full_name': user[0]['name'] + f' {user[0]['lastname']}' if 'lastname' in user[0] and user[0]['lastname'] != '' else '',
-                                'link_href': settings.ADMIN_URL,
-                                'link_label': 'INICIAR SESIÓN'
-                            },
-                            to=[user[0]['email']],
-                        )
-                        return ok('Registro realizado exitosamente.')
-                    return bad_request('Las contraseñas no coinciden.')
-                return bad_request('Algunos campos requeridos no han sido completados.')
+            return user[0] if user and user[0]['status'] == 0 else None
+
+    def __register_error(self, user):
+        if not user:
             return bad_request('El usaurio no existe o ya se encuentra registrado.')
+        required_fields = ['password', 'confirm_password']
+        if not all(i in self.data for i in required_fields):
+            return bad_request('Algunos campos requeridos no han sido completados.')
+        if self.data['password'] != self.data['confirm_password']:
+            return bad_request('Las contraseñas no coinciden.')
+        return None
+
+    def __activate(self, user, password):
+        with MongoDBHandler('users') as db:
+            db.update({'_id': ObjectId(self.id)}, {
+                'password': password, 'status': 1})
+        invalidate_auth_user(self.id)
+        send_email(
+            template="mail_templated/activated.html",
+            context={
+                'subject': '¡Registro Completo! Bienvenido al Sistema Bellarti',
+                'full_name': user['name'] + f' {user['lastname']}' if 'lastname' in user and user['lastname'] != '' else '',
+                'link_href': settings.ADMIN_URL,
+                'link_label': 'INICIAR SESIÓN'
+            },
+            to=[user['email']],
+        )
+        return ok('Registro realizado exitosamente.')
+
+    async def aregister(self):
+        """Activa al usuario pendiente; bcrypt fuera del event loop (ver alogin)."""
+        user = await sync_to_async(self.__pending_user, thread_sensitive=False)()
+        error = self.__register_error(user)
+        if error:
+            return error
+        password = await encrypt_password_async(self.data['password'])
+        return await sync_to_async(
+            self.__activate, thread_sensitive=False)(user, password)
 
     def get_by_id(self):
         with MongoDBHandler('users') as db:
@@ -157,6 +172,8 @@ class UserUseCase:
                     if 'AccountSettings' not in self.data['permissions']:
                         self.data['permissions']['AccountSettings'] = ['read']
                 updated_user = db.update({'_id': ObjectId(self.id)}, self.data)
+                # Estatus, rol o permisos pudieron cambiar
+                invalidate_auth_user(self.id)
                 return ok(UserSerializer(updated_user).data)
             return bad_request('El usaurio no existe.')
 
@@ -184,5 +201,6 @@ class UserUseCase:
                 {'_id': ObjectId(self.id)}) if objectid_validation(self.id) else None
             if user:
                 db.delete({'_id': ObjectId(self.id)})
+                invalidate_auth_user(self.id)
                 return ok('Usuario eliminado correctamente.')
             return bad_request('El usaurio no existe o ya se encuentra eliminado.')
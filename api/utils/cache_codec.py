@@ -0,0 +1,77 @@
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+import bson
+from bson.codec_options import CodecOptions, TypeRegistry
+from bson.decimal128 import Decimal128
+from bson.errors import InvalidDocument
+from django.conf import settings
+from django_redis.serializers.base import BaseSerializer
+from api.utils.cache_utils import _safe_json
+from api.utils.cache_metrics import payload_size
+
+# Formato: 1 byte de encabezado + payload
+RAW_BSON = b"B"
+ZLIB_BSON = b"Z"
+JSON = b"J"
+
+
+def _fallback_encoder(value: Any) -> Any:
+    """Tipos de Python que BSON no conoce."""
+    if isinstance(value, Decimal):
+        return Decimal128(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, (set, tuple, frozenset)):
+        return list(value)
+    raise TypeError(f"Tipo no serializable en BSON: {type(value).__name__}")
+
+
+# Mismas opciones de decodificación que el MongoClient (datetimes naive en
+# UTC, dict): un hit regresa exactamente los tipos que regresó Mongo.
+CODEC_OPTIONS = CodecOptions(
+    type_registry=TypeRegistry(fallback_encoder=_fallback_encoder))
+
+
+def encode(value: Any) -> bytes:
+    """
+    Serializa a BSON (preserva ObjectId, datetime, Decimal128, bytes) y
+    comprime con zlib si supera CACHE_COMPRESS_MIN_BYTES. Lo que BSON no
+    acepta (ej. llaves no string) se guarda como JSON seguro.
+    """
+    try:
+        payload = bson.encode({"v": value}, codec_options=CODEC_OPTIONS)
+    except (InvalidDocument, TypeError, OverflowError):
+        return JSON + json.dumps(_safe_json(value)).encode()
+
+    threshold = getattr(settings, "CACHE_COMPRESS_MIN_BYTES", 16 * 1024)
+    if threshold and len(payload) >= threshold:
+        return ZLIB_BSON + zlib.compress(payload, 1)
+    return RAW_BSON + payload
+
+
+def decode(data: bytes) -> Any:
+    header, payload = data[:1], data[1:]
+    if header == RAW_BSON:
+        return bson.decode(payload, codec_options=CODEC_OPTIONS)["v"]
+    if header == ZLIB_BSON:
+        return bson.decode(zlib.decompress(payload), codec_options=CODEC_OPTIONS)["v"]
+    if header == JSON:
+        return json.loads(payload)
+    # Entradas escritas antes del codec (JSONSerializer de django-redis)
+    return json.loads(data)
+
+
+class BSONSerializer(BaseSerializer):
+    """Serializer de django-redis (OPTIONS.SERIALIZER) basado en encode/decode."""
+
+    def dumps(self, value: Any) -> bytes:
+        data = encode(value)
+        payload_size.set(len(data))
+        return data
+
+    def loads(self, value: bytes) -> Any:
+        payload_size.set(len(value))
+        return decode(value)
@@ -0,0 +1,188 @@
+import atexit
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Límites (ms) de los histogramas de latencia; el último bucket es +inf
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+COUNTERS = (
+    "local_hits", "hits", "misses", "stale", "sets", "invalidations",
+    "bytes_read", "bytes_written", "compute_ms",
+)
+
+_STATS_KEY = "bellarti_api:cache_stats"
+
+# Tamaño en bytes del último valor (de)serializado por cache_codec
+payload_size: ContextVar[int] = ContextVar("cache_payload_size", default=0)
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def _bucket(ms: float) -> str:
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+
+class CacheMetrics:
+    """
+    Contadores por prefijo de cache_result / invalidate_cache. Se acumulan
+    en memoria del proceso y se suman en Redis (un hash por prefijo) cada
+    CACHE_METRICS_FLUSH_SECONDS, para que Daphne y Celery reporten juntos.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, defaultdict] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "CACHE_METRICS_ENABLED", True)
+
+    def incr(self, prefix: str, field: str, amount: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending.setdefault(prefix, defaultdict(float))[field] += amount
+        self._maybe_flush()
+
+    def observe(self, prefix: str, op: str, ms: float):
+        """Registra una latencia (op = 'get' | 'set') en su bucket."""
+        if not self.enabled:
+            return
+        with self._lock:
+            pending = self._pending.setdefault(prefix, defaultdict(float))
+            pending[f"{op}_count"] += 1
+            pending[f"{op}_ms"] += ms
+            pending[f"{op}_{_bucket(ms)}"] += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        interval = getattr(settings, "CACHE_METRICS_FLUSH_SECONDS", 10)
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            pipe = _redis().pipeline(transaction=False)
+            for prefix, fields in pending.items():
+                pipe.sadd(f"{_STATS_KEY}:prefixes", prefix)
+                for field, value in fields.items():
+                    pipe.hincrbyfloat(f"{_STATS_KEY}:{prefix}", field, value)
+            pipe.execute()
+        except Exception as e:
+            # Las métricas nunca deben tirar un request
+            logger.warning(f"[cache_metrics] No se pudieron guardar métricas: {e}")
+
+    def snapshot(self, prefix: Optional[str] = None) -> dict[str, dict]:
+        """Métricas agregadas (todos los procesos) por prefijo."""
+        self.flush()
+        r = _redis()
+        prefixes = [prefix] if prefix else sorted(
+            p.decode() if isinstance(p, bytes) else p
+            for p in r.smembers(f"{_STATS_KEY}:prefixes"))
+        pipe = r.pipeline(transaction=False)
+        for p in prefixes:
+            pipe.hgetall(f"{_STATS_KEY}:{p}")
+        return {p: _summarize(raw) for p, raw in zip(prefixes, pipe.execute())}
+
+    def reset(self, prefix: Optional[str] = None):
+        with self._lock:
+            if prefix:
+                self._pending.pop(prefix, None)
+            else:
+                self._pending = {}
+        r = _redis()
+        prefixes = [prefix] if prefix else [
+            p.decode() if isinstance(p, bytes) else p
+            for p in r.smembers(f"{_STATS_KEY}:prefixes")]
+        for p in prefixes:
+            r.delete(f"{_STATS_KEY}:{p}")
+            r.srem(f"{_STATS_KEY}:prefixes", p)
+
+
+def _percentile(fields: dict, op: str, q: float) -> Optional[float]:
+    """Percentil aproximado: límite superior del bucket que lo contiene."""
+    total = fields.get(f"{op}_count", 0)
+    if not total:
+        return None
+    seen = 0
+    for bound in LATENCY_BUCKETS_MS:
+        seen += fields.get(f"{op}_le_{bound}", 0)
+        if seen >= total * q:
+            return bound
+    # Más lento que el último bucket (inf no es JSON válido)
+    return f">{LATENCY_BUCKETS_MS[-1]}"
+
+
+def _summarize(raw: dict) -> dict:
+    fields = {
+        (k.decode() if isinstance(k, bytes) else k): float(v)
+        for k, v in raw.items()
+    }
+    summary = {name: int(fields.get(name, 0)) for name in COUNTERS}
+    lookups = summary["local_hits"] + summary["hits"] + summary["misses"]
+    summary["hit_ratio"] = round(
+        (summary["local_hits"] + summary["hits"]) / lookups, 4) if lookups else None
+    summary["avg_compute_ms"] = round(
+        fields.get("compute_ms", 0) / summary["sets"], 2) if summary["sets"] else None
+    for op in ("get", "set"):
+        count = fields.get(f"{op}_count", 0)
+        summary[f"{op}_latency_ms"] = {
+            "count": int(count),
+            "avg": round(fields.get(f"{op}_ms", 0) / count, 3) if count else None,
+            "p50": _percentile(fields, op, 0.5),
+            "p95": _percentile(fields, op, 0.95),
+            "p99": _percentile(fields, op, 0.99),
+            "buckets": {
+                b: int(fields.get(f"{op}_le_{b}", 0))
+                for b in [*LATENCY_BUCKETS_MS, "inf"]
+            },
+        }
+    return summary
+
+
+metrics = CacheMetrics()
+atexit.register(metrics.flush)
+
+
+def print_cache_stats(prefix: Optional[str] = None, stream=None):
+    """
+    Resumen legible para `python manage.py shell`:
+        from api.utils.cache_metrics import print_cache_stats
+        print_cache_stats()
+    `stream` es cualquier objeto con write() (por defecto sys.stdout).
+    """
+    stream = stream or sys.stdout
+    stats = metrics.snapshot(prefix)
+    header = f"{'prefix':<20}{'hit%':>8}{'local':>8}{'hits':>8}{'miss':>8}" \
+             f"{'stale':>7}{'sets':>7}{'inval':>7}{'KB read':>10}{'compute':>10}{'get p95':>9}"
+    stream.write(header + "\n")
+    stream.write("-" * len(header) + "\n")
+    for name, s in stats.items():
+        ratio = f"{s['hit_ratio'] * 100:.1f}" if s["hit_ratio"] is not None else "-"
+        compute = f"{s['avg_compute_ms']:.1f}" if s["avg_compute_ms"] is not None else "-"
+        p95 = s["get_latency_ms"]["p95"]
+        stream.write(
+            f"{name:<20}{ratio:>8}{s['local_hits']:>8}{s['hits']:>8}{s['misses']:>8}"
+            f"{s['stale']:>7}{s['sets']:>7}{s['invalidations']:>7}"
+            f"{s['bytes_read'] / 1024:>10.1f}{compute:>10}{p95 if p95 is not None else '-':>9}\n")
+    return stats
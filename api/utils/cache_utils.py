@@ -1,11 +1,20 @@
 import hashlib
 import json
+import math
+import random
+import time
+import uuid
+from contextvars import ContextVar
 from functools import wraps
+from django.conf import settings
 from django.core.cache import cache
 from bson import ObjectId
 from datetime import datetime, date
 from decimal import Decimal
 import logging
+from typing import Optional
+from api.utils.local_cache import MISS, ensure_listener, local_cache, publish_invalidation
+from api.utils.cache_metrics import metrics, payload_size
 
 logger = logging.getLogger(__name__)
 
@@ -36,15 +45,196 @@ def _safe_json(obj):
     return obj
 
 
+# -------------------------------------------------------------
+# Generación por prefijo (invalidación = un INCR)
+# -------------------------------------------------------------
+# Scope de las entradas sin tag: cambia con cualquier invalidación por tag
+ANY_TAG = "*"
+
+
+def _generation_key(prefix: str, tag: Optional[str] = None) -> str:
+    if tag is None:
+        return f"cache_gen:{prefix}"
+    return f"cache_gen:{prefix}#{tag}"
+
+
+def _initial_generation() -> int:
+    # Si el contador se pierde (evicción/flush) se reinicia con un valor
+    # nuevo para no volver a apuntar a entradas viejas aún vivas.
+    return int(time.time() * 1000)
+
+
+def _get_generations(keys: list[str]) -> list[int]:
+    """Lee varios contadores en un viaje; crea los que falten."""
+    found = cache.get_many(keys)
+    for key in keys:
+        if found.get(key) is None:
+            cache.add(key, _initial_generation(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def get_generation(prefix: str) -> int:
+    """Generación vigente del prefijo (se crea si no existe)."""
+    return _get_generations([_generation_key(prefix)])[0]
+
+
+def build_cache_key(prefix: str, hash_key: str, tag: Optional[str] = None) -> str:
+    """
+    La clave depende de la generación del prefijo y de la del tag (o de
+    ANY_TAG si la consulta no está acotada a un tag).
+    """
+    generation, tag_generation = _get_generations([
+        _generation_key(prefix),
+        _generation_key(prefix, tag or ANY_TAG),
+    ])
+    scope = f"{tag}@{tag_generation}" if tag else f"{ANY_TAG}@{tag_generation}"
+    return f"{prefix}:g{generation}:{scope}:{hash_key}"
+
+
+def cache_version(scopes: list[tuple[str, Optional[str]]]) -> str:
+    """
+    Versión combinada de varios (prefix, tag) en un solo viaje a Redis.
+    Cambia cada vez que alguno se invalida; sirve como validador HTTP.
+    """
+    keys = []
+    for prefix, tag in scopes:
+        keys += [_generation_key(prefix), _generation_key(prefix, tag or ANY_TAG)]
+    return ".".join(str(g) for g in _get_generations(keys))
+
+
+def cache_tag(values: Optional[dict], fields: Optional[list[str]]) -> Optional[str]:
+    """
+    Tag a partir de los filtros, ej. 'client_id=1|front=A|prototype=P'.
+    Solo si todos los campos vienen con un valor simple; si no, la
+    consulta abarca varios tags y regresa None.
+    """
+    if not values or not fields:
+        return None
+    parts = []
+    for field in fields:
+        value = values.get(field)
+        if value is None or isinstance(value, (dict, list, tuple, set)):
+            return None
+        parts.append(f"{field}={value}")
+    return "|".join(parts)
+
+
+# -------------------------------------------------------------
+# Protección contra estampidas (single-flight + stale + refresh anticipado)
+# -------------------------------------------------------------
+# Las entradas se guardan en un sobre con el costo del cálculo y su
+# expiración para poder refrescarlas antes de tiempo (XFetch).
+_ENVELOPE = "__cached__"
+# Cada cuánto revisa un proceso en espera si ya hay resultado (segundos)
+LOCK_POLL_INTERVAL = 0.05
+# Se marca cuando se sirvió una copia anterior a la última invalidación;
+# conditional_get no debe asociarla a un ETag nuevo
+stale_served: ContextVar[bool] = ContextVar("cache_stale_served", default=False)
+
+
+def _envelope(value, delta: float, ttl: int) -> dict:
+    return {_ENVELOPE: 1, "value": value, "delta": delta, "expires": time.time() + ttl}
+
+
+def _unwrap(entry):
+    """Regresa el sobre o None si no existe / tiene otro formato."""
+    if isinstance(entry, dict) and entry.get(_ENVELOPE) == 1:
+        return entry
+    return None
+
+
+def _should_refresh_early(entry: dict, beta: float) -> bool:
+    # XFetch: la probabilidad de recalcular crece al acercarse la expiración
+    # y con el costo del cálculo; evita que todos expiren al mismo tiempo.
+    delta = entry.get("delta") or 0
+    if not beta or not delta:
+        return False
+    return time.time() - delta * beta * math.log(random.random() or 1e-12) >= entry["expires"]
+
+
+def _stale_key(prefix: str, hash_key: str, tag: Optional[str]) -> str:
+    # Sin generación: sobrevive a la invalidación para servir la última copia
+    return f"{prefix}:stale:{tag or ANY_TAG}:{hash_key}"
+
+
+def _acquire_lock(lock_key: str, timeout: int) -> Optional[str]:
+    token = uuid.uuid4().hex
+    try:
+        return token if cache.add(lock_key, token, timeout) else None
+    except Exception:
+        return None
+
+
+def _release_lock(lock_key: str, token: str):
+    try:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    except Exception:
+        pass
+
+
+def _wait_for(cache_key: str, timeout: float) -> Optional[dict]:
+    """Espera a que quien tiene el lock publique el resultado."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = _unwrap(cache.get(cache_key))
+        if entry is not None:
+            return entry
+    return None
+
+
 # -------------------------------------------------------------
 # Decorador de cache con hash dinámico + serialización segura
 # -------------------------------------------------------------
-def cache_result(prefix: str, ttl: int = 300):
+def cache_result(
+    prefix: str,
+    ttl: int = 300,
+    tag=None,
+    local_ttl: Optional[int] = None,
+    stale_ttl: int = 0,
+    early_refresh: float = 0,
+    lock_timeout: Optional[int] = None,
+):
     """
-    Crea una clave de cache única basada en los args/kwargs y serializa
-    los resultados de forma segura (para evitar errores con ObjectId, etc.).
+    Crea una clave de cache única basada en los args/kwargs y guarda el
+    resultado con el codec BSON de cache_codec (tipos de Mongo intactos).
+    `tag` (str o función que recibe los mismos args) acota la entrada para
+    que invalidate_cache(prefix, tags=[...]) solo descarte ese tag.
+    `local_ttl` agrega una copia en memoria del proceso (datos de referencia):
+    se sirve sin ir a Redis y se descarta vía pub/sub al invalidar.
+
+    Contra estampidas, en un miss solo un proceso recalcula (lock corto en
+    Redis); los demás esperan el resultado o, con `stale_ttl`, sirven la
+    última copia conocida aunque el prefijo se haya invalidado.
+    `early_refresh` (beta de XFetch, ej. 1.0) recalcula antes de expirar.
     """
+    lock_ttl = lock_timeout or getattr(settings, "CACHE_LOCK_TIMEOUT", 10)
+
     def decorator(func):
+        def compute(cache_key, stale_key, local_key, use_local, args, kwargs):
+            started = time.monotonic()
+            result = func(*args, **kwargs)
+            delta = time.monotonic() - started
+            metrics.incr(prefix, "compute_ms", delta * 1000)
+            try:
+                # El codec (cache_codec) conserva ObjectId/datetime: un hit
+                # regresa los mismos tipos que el cálculo original
+                set_started = time.perf_counter()
+                cache.set(cache_key, _envelope(result, delta, ttl), ttl)
+                metrics.observe(prefix, "set", (time.perf_counter() - set_started) * 1000)
+                metrics.incr(prefix, "sets")
+                metrics.incr(prefix, "bytes_written", payload_size.get())
+                if stale_ttl:
+                    cache.set(stale_key, result, stale_ttl)
+                if use_local:
+                    local_cache.set(local_key, result, local_ttl)
+            except Exception as e:
+                logger.warning(
+                    f"[cache_result] No se pudo cachear resultado: {e}")
+            return result
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             # 🔹 Generar clave hash única basada en args/kwargs
@@ -60,23 +250,71 @@ def cache_result(prefix: str, ttl: int = 300):
                 key_data = str(args[1:]) + str(kwargs)
 
             hash_key = hashlib.md5(key_data.encode()).hexdigest()
-            cache_key = f"{prefix}:{hash_key}"
+            entry_tag = tag(*args, **kwargs) if callable(tag) else tag
 
-            # 🔹 Intentar leer del cache
-            cached_data = cache.get(cache_key)
-            if cached_data is not None:
-                return cached_data
+            # 🔹 Primer nivel: memoria del proceso
+            local_key = (prefix, entry_tag, hash_key)
+            use_local = bool(local_ttl) and ensure_listener()
+            if use_local:
+                local_data = local_cache.get(local_key)
+                if local_data is not MISS:
+                    metrics.incr(prefix, "local_hits")
+                    return local_data
 
-            # 🔹 Ejecutar función y serializar el resultado
-            result = func(*args, **kwargs)
             try:
-                json_safe_result = _safe_json(result)
-                cache.set(cache_key, json_safe_result, ttl)
+                cache_key = build_cache_key(prefix, hash_key, entry_tag)
+                get_started = time.perf_counter()
+                entry = _unwrap(cache.get(cache_key))
+                metrics.observe(prefix, "get", (time.perf_counter() - get_started) * 1000)
             except Exception as e:
+                # Sin Redis no hay cache: se ejecuta directo
                 logger.warning(
-                    f"[cache_result] No se pudo cachear resultado: {e}")
+                    f"[cache_result] No se pudo leer la generación de '{prefix}': {e}")
+                return func(*args, **kwargs)
 
-            return result
+            stale_key = _stale_key(prefix, hash_key, entry_tag)
+            lock_key = f"lock:{cache_key}"
+            key_args = (cache_key, stale_key, local_key, use_local, args, kwargs)
+
+            # 🔹 Hit: se sirve, salvo que toque refrescar anticipadamente
+            if entry is not None:
+                metrics.incr(prefix, "hits")
+                metrics.incr(prefix, "bytes_read", payload_size.get())
+                if _should_refresh_early(entry, early_refresh):
+                    token = _acquire_lock(lock_key, lock_ttl)
+                    if token:
+                        try:
+                            return compute(*key_args)
+                        finally:
+                            _release_lock(lock_key, token)
+                if use_local:
+                    local_cache.set(local_key, entry["value"], local_ttl)
+                return entry["value"]
+
+            # 🔹 Miss: un solo proceso recalcula
+            metrics.incr(prefix, "misses")
+            token = _acquire_lock(lock_key, lock_ttl)
+            if token:
+                try:
+                    return compute(*key_args)
+                finally:
+                    _release_lock(lock_key, token)
+
+            if stale_ttl:
+                stale = cache.get(stale_key)
+                if stale is not None:
+                    metrics.incr(prefix, "stale")
+                    stale_served.set(True)
+                    return stale
+
+            entry = _wait_for(cache_key, lock_ttl)
+            if entry is not None:
+                return entry["value"]
+
+            # El lock expiró sin resultado: se recalcula aquí
+            logger.warning(
+                f"[cache_result] Timeout esperando '{prefix}', se recalcula")
+            return compute(*key_args)
 
         return wrapper
     return decorator
@@ -85,16 +323,43 @@ def cache_result(prefix: str, ttl: int = 300):
 # -------------------------------------------------------------
 # Invalida cache (por prefijo)
 # -------------------------------------------------------------
-def invalidate_cache(prefix: str):
+def _bump(key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # No existía el contador: cualquier valor nuevo invalida
+        generation = _initial_generation()
+        cache.set(key, generation, timeout=None)
+        return generation
+
+
+def invalidate_cache(prefix: str, tags: Optional[list[Optional[str]]] = None):
     """
-    Elimina todas las claves de cache que comiencen con el prefijo.
+    Invalida incrementando generaciones: las claves nuevas ya no coinciden
+    y las viejas expiran por TTL. La copia en memoria de cada proceso se
+    descarta con un mensaje pub/sub.
+    - Sin tags: todo el prefijo.
+    - Con tags: solo esos tags y las consultas sin tag (ANY_TAG); si algún
+      tag es None se invalida todo el prefijo.
     Ejemplo:
         invalidate_cache('catalog')
+        invalidate_cache('explosion', tags=[cache_tag(doc, ['home_production_id'])])
     """
+    metrics.incr(prefix, "invalidations")
     try:
-        deleted = cache.delete_pattern(f"{prefix}:*")
+        if not tags or any(t is None for t in tags):
+            generation = _bump(_generation_key(prefix))
+            publish_invalidation(prefix)
+            logger.info(
+                f"[invalidate_cache] Prefix '{prefix}' now at generation {generation}")
+            return
+
+        for tag in set(tags):
+            _bump(_generation_key(prefix, tag))
+        _bump(_generation_key(prefix, ANY_TAG))
+        publish_invalidation(prefix, tags)
         logger.info(
-            f"[invalidate_cache] Cleared cache for prefix '{prefix}' ({deleted} keys)")
+            f"[invalidate_cache] Prefix '{prefix}' invalidated for tags {sorted(set(tags))}")
     except Exception as e:
         logger.warning(
-            f"[invalidate_cache] Error clearing prefix '{prefix}': {e}")
+            f"[invalidate_cache] Error invalidating prefix '{prefix}': {e}")
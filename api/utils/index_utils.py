@@ -0,0 +1,79 @@
+import importlib
+import logging
+import pkgutil
+import threading
+import api.repositories
+from pymongo.errors import PyMongoError
+from api.repositories.base_repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------
+# Registro de índices declarados en cada repositorio (INDEXES)
+# -------------------------------------------------------------
+def get_indexed_repositories():
+    """
+    Importa todos los módulos de api.repositories y regresa una instancia
+    por cada subclase de BaseRepository que declare INDEXES.
+    """
+    for module in pkgutil.iter_modules(api.repositories.__path__):
+        importlib.import_module(f"api.repositories.{module.name}")
+
+    repositories = {}
+    pending = list(BaseRepository.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if cls.COLLECTION and cls.INDEXES:
+            repositories.setdefault(cls.COLLECTION, cls)
+    return [repositories[name]() for name in sorted(repositories)]
+
+
+def ensure_indexes(repositories=None):
+    """
+    Construye los índices declarados (idempotente: create_indexes no hace
+    nada si el índice ya existe). Regresa {colección: [nombres] | error}.
+    """
+    results = {}
+    for repo in repositories or get_indexed_repositories():
+        try:
+            results[repo.COLLECTION] = repo.ensure_indexes()
+        except PyMongoError as e:
+            logger.warning(
+                f"[ensure_indexes] Error en '{repo.COLLECTION}': {e}")
+            results[repo.COLLECTION] = e
+    return results
+
+
+def find_missing_indexes(repositories=None):
+    """Regresa {colección: [nombres de índices faltantes]}."""
+    missing = {}
+    for repo in repositories or get_indexed_repositories():
+        names = repo.missing_indexes()
+        if names:
+            missing[repo.COLLECTION] = names
+    return missing
+
+
+def report_missing_indexes():
+    """Revisión de arranque: solo registra en log los índices faltantes."""
+    try:
+        missing = find_missing_indexes()
+    except PyMongoError as e:
+        logger.warning(f"[index_check] No se pudo revisar índices: {e}")
+        return
+
+    for collection, names in missing.items():
+        logger.warning(
+            f"[index_check] Faltan índices en '{collection}': {', '.join(names)}. "
+            "Ejecuta `python manage.py ensure_indexes`.")
+
+
+def start_index_check():
+    """Lanza la revisión en segundo plano para no retrasar el arranque."""
+    threading.Thread(
+        target=report_missing_indexes,
+        name="mongo-index-check",
+        daemon=True,
+    ).start()
@@ -0,0 +1,149 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Marca de "no está en cache" (None es un valor válido)
+MISS = object()
+
+
+class LocalLRU:
+    """
+    Cache en memoria del proceso (LRU acotado + TTL corto) para datos de
+    referencia que se leen en casi todos los requests. Las llaves son
+    (prefix, tag, hash) para poder descartar por prefijo o por tag.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return MISS
+            self._data.move_to_end(key)
+        # Copia: los servicios suelen modificar lo que regresa el cache
+        return copy.deepcopy(value)
+
+    def set(self, key: tuple, value: Any, ttl: int):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def drop(self, prefix: str, tags: Optional[Iterable[str]] = None):
+        """Sin tags descarta todo el prefijo; con tags, esos y los que no tienen tag."""
+        tags = set(tags) if tags else None
+        with self._lock:
+            for key in [k for k in self._data if k[0] == prefix]:
+                if tags is None or key[1] is None or key[1] in tags:
+                    del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LocalLRU(getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 1024))
+
+
+# -------------------------------------------------------------
+# Invalidación entre procesos (Daphne / workers Celery) vía pub/sub
+# -------------------------------------------------------------
+def _channel() -> str:
+    return getattr(settings, 'LOCAL_CACHE_CHANNEL', 'cache_invalidation')
+
+
+_listener_lock = threading.Lock()
+_listener_pid: Optional[int] = None
+# Solo se confía en la copia local mientras estamos suscritos al canal
+_subscribed = threading.Event()
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _handle(message: dict):
+    try:
+        payload = json.loads(message['data'])
+        local_cache.drop(payload['prefix'], payload.get('tags'))
+    except Exception as e:
+        logger.warning(f"[local_cache] Mensaje de invalidación inválido: {e}")
+
+
+def _listen():
+    delay = 1
+    while True:
+        pubsub = None
+        try:
+            pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(_channel())
+            # Lo que se cacheó sin suscripción pudo perder invalidaciones
+            local_cache.clear()
+            _subscribed.set()
+            delay = 1
+            for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    _handle(message)
+        except Exception as e:
+            logger.warning(f"[local_cache] Suscripción perdida: {e}")
+        finally:
+            _subscribed.clear()
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+        time.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+def ensure_listener() -> bool:
+    """
+    Arranca (una vez por proceso, también después de un fork de Celery) el
+    hilo que escucha invalidaciones. Regresa si la copia local es confiable.
+    """
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid != pid:
+        with _listener_lock:
+            if _listener_pid != pid:
+                # Un proceso hijo no hereda el hilo ni la suscripción
+                local_cache.clear()
+                _subscribed.clear()
+                threading.Thread(
+                    target=_listen, name='local-cache-invalidation', daemon=True).start()
+                _listener_pid = pid
+    return _subscribed.is_set()
+
+
+def publish_invalidation(prefix: str, tags: Optional[Iterable[str]] = None):
+    """Descarta localmente y avisa al resto de los procesos."""
+    tags = sorted(set(tags)) if tags else None
+    local_cache.drop(prefix, tags)
+    try:
+        _redis().publish(_channel(), json.dumps({'prefix': prefix, 'tags': tags}))
+    except Exception as e:
+        logger.warning(
+            f"[local_cache] No se pudo publicar la invalidación de '{prefix}': {e}")
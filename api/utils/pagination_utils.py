@@ -1,4 +1,14 @@
 # api/utils/pagination_utils.py
+import base64
+import json
+import math
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from rest_framework.exceptions import ValidationError
+from api.constants import DEFAULT_PAGE_SIZE
+
+
 class DummyPaginator:
     """
     Simula el comportamiento mínimo del Paginator de Django
@@ -40,3 +50,121 @@ class DummyPage:
 
     def __iter__(self):
         return iter(self.object_list)
+
+
+# -------------------------------------------------------------
+# Paginación por cursor (keyset) sobre (created_at, _id)
+# -------------------------------------------------------------
+class CursorPage(DummyPage):
+    """
+    Página obtenida por cursor. `has_next()` depende de si MongoDB
+    regresó más documentos, no del número de página.
+    """
+
+    def __init__(self, number, paginator, object_list, next_cursor=None):
+        super().__init__(number, paginator, object_list)
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(doc, page):
+    """
+    Genera un cursor opaco a partir del último documento de la página
+    y su número de página.
+    """
+    created_at = doc.get("created_at")
+    payload = {
+        "c": created_at.isoformat() if isinstance(created_at, datetime) else None,
+        "i": str(doc.get("_id")),
+        "p": page,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Decodifica un cursor; regresa None si es inválido o no viene."""
+    if not token or not isinstance(token, str):
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            return None
+        return {
+            "created_at": datetime.fromisoformat(payload["c"]) if payload.get("c") else None,
+            "_id": ObjectId(payload["i"]),
+            "page": int(payload.get("p", 1)),
+        }
+    except (ValueError, TypeError, KeyError, InvalidId):
+        return None
+
+
+def keyset_paginate(repo, filters=None, after=None, page_size=DEFAULT_PAGE_SIZE, projection=None):
+    """
+    Pagina del más reciente al más antiguo usando (created_at, _id) como llave.
+    El costo de cada página es constante sin importar qué tan profunda sea.
+    `after` es el `next_cursor` de la página anterior; sin él se regresa la
+    primera página. Un `after` que no se puede decodificar es un
+    ValidationError (400).
+    Regresa (paginator, page) compatibles con build_response_with_pagination().
+    """
+    try:
+        page_size = max(int(page_size), 1)
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+
+    if after is None or after == "":
+        after = None
+    else:
+        after = decode_cursor(after)
+        if not after:
+            # Regresar la primera página haría que el cliente la repita sin fin
+            raise ValidationError("El cursor de paginación no es válido.")
+    number = after["page"] + 1 if after else 1
+    # El total se recalcula en cada página (mismo índice que el filtro): en
+    # estas colecciones llegan documentos nuevos todo el tiempo
+    total = repo.count(filters or {})
+
+    docs = repo.find_after(filters, after, page_size + 1, projection)
+    next_cursor = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_cursor = encode_cursor(docs[-1], number)
+
+    total_pages = max(math.ceil(total / page_size), 1)
+    paginator = DummyPaginator(total, total_pages)
+    return paginator, CursorPage(number, paginator, docs, next_cursor)
+
+
+# -------------------------------------------------------------
+# Paginación del read model ($facet: página + total en un viaje)
+# -------------------------------------------------------------
+def joined_paginate(repo, filters=None, page=1, page_size=DEFAULT_PAGE_SIZE, sort=None):
+    """
+    Página de repo.find_joined_page con la semántica de Paginator.get_page
+    (la misma de BaseService._paginate): página no numérica => 1, menor a 1
+    o mayor al total => la última.
+    Regresa (paginator, page) compatibles con build_response_with_pagination().
+    """
+    try:
+        number = int(page)
+    except (TypeError, ValueError):
+        number = 1
+    try:
+        page_size = max(int(page_size), 1)
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+
+    fetched = max(number, 1)
+    rows, total = repo.find_joined_page(filters, sort, fetched, page_size)
+    total_pages = max(math.ceil(total / page_size), 1)
+    if number < 1 or number > total_pages:
+        number = total_pages
+        if number != fetched:
+            rows, total = repo.find_joined_page(filters, sort, number, page_size)
+
+    paginator = DummyPaginator(total, total_pages)
+    return paginator, DummyPage(number, paginator, rows)
@@ -0,0 +1,109 @@
+import logging
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Set
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "bellarti_api:task_pending"
+
+
+class KeyBusy(Exception):
+    """Otra ejecución de la misma tarea/llave sigue corriendo."""
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def debounce_seconds() -> int:
+    return getattr(settings, "TASK_DEBOUNCE_SECONDS", 5)
+
+
+def _keys(name: str, key: str) -> tuple[str, str, str]:
+    base = f"{_PENDING_KEY}:{name}:{key}"
+    return f"{base}:marker", f"{base}:members", f"{base}:lock"
+
+
+def _pending_ttl(countdown: int) -> int:
+    return countdown + getattr(settings, "TASK_PENDING_TTL", 600)
+
+
+def schedule(task, name: str, key: str, args: tuple = (),
+             members: Iterable[str] = ()) -> bool:
+    """
+    Marca `key` como pendiente y encola `task(*args)` con countdown solo si
+    no había ya una ejecución encolada; los `members` (ej. prototypes
+    afectados) se acumulan para la siguiente ejecución.
+    Regresa si se encoló una tarea nueva.
+    """
+    countdown = debounce_seconds()
+    ttl = _pending_ttl(countdown)
+    marker, members_key, _ = _keys(name, key)
+    members = sorted(set(members))
+
+    pipe = _redis().pipeline(transaction=True)
+    if members:
+        pipe.sadd(members_key, *members)
+        pipe.expire(members_key, ttl)
+    pipe.set(marker, 1, nx=True, ex=ttl)
+    enqueued = bool(pipe.execute()[-1])
+    if enqueued:
+        task.apply_async(args=args, countdown=countdown)
+    return enqueued
+
+
+@contextmanager
+def claim(task, name: str, key: str, args: tuple = ()) -> Iterator[Set[str]]:
+    """
+    Dentro de la tarea: toma el lock de la llave (KeyBusy si otra ejecución
+    sigue corriendo) y reclama lo pendiente. Lo que llegue después vuelve a
+    marcar la llave y encola otra ejecución, que leerá el estado más nuevo.
+    Una ejecución que encontró el lock ocupado no se reintenta: al liberar
+    el lock, si la llave quedó marcada, se vuelve a encolar `task(*args)`.
+    Si la tarea falla, los members se devuelven para el reintento.
+    """
+    r = _redis()
+    marker, members_key, lock = _keys(name, key)
+    token = uuid.uuid4().hex
+    if not r.set(lock, token, nx=True, ex=getattr(settings, "TASK_LOCK_TIMEOUT", 600)):
+        raise KeyBusy(f"{name}:{key}")
+
+    failed = False
+    try:
+        pipe = r.pipeline(transaction=True)
+        pipe.smembers(members_key)
+        pipe.delete(members_key, marker)
+        raw, _ = pipe.execute()
+        members = {m.decode() if isinstance(m, bytes) else m for m in raw}
+        try:
+            yield members
+        except Exception:
+            failed = True
+            if members:
+                r.sadd(members_key, *members)
+            raise
+    finally:
+        try:
+            current = r.get(lock)
+            if (current.decode() if isinstance(current, bytes) else current) == token:
+                r.delete(lock)
+        except Exception as e:
+            logger.warning(f"[task_coalescing] No se pudo liberar {lock}: {e}")
+        if not failed:
+            _requeue_pending(r, task, marker, args)
+
+
+def _requeue_pending(r, task, marker: str, args: tuple):
+    """
+    La ejecución encolada mientras se tenía el lock terminó en KeyBusy sin
+    consumir la marca: se encola de nuevo (la marca sigue evitando duplicados).
+    """
+    countdown = debounce_seconds()
+    try:
+        if r.expire(marker, _pending_ttl(countdown)):
+            task.apply_async(args=args, countdown=countdown)
+    except Exception as e:
+        logger.warning(f"[task_coalescing] No se pudo reencolar {marker}: {e}")
@@ -7,7 +7,7 @@ from .client import ClientView, ClientByTypeView, ClientByIdView
 from .supplier import SupplierView, SupplierByIdView
 from .prototype import PrototypeView, PrototypeByIdView
 from .catalog import CatalogView, CatalogByIdView
-from .material import MaterialsView, MaterialByIdView, DownloadMaterialsView, ImagesMaterialView, DownloadFormatView
+from .material import MaterialsView, MaterialSuggestView, MaterialByIdView, DownloadMaterialsView, ImagesMaterialView, DownloadFormatView
 from .volumetry import VolumetryView, VolumetryByIdView, VolumetryUploadView
 from .tax_data import TaxDataSupplierView, TaxDataClientView
 from .bank_data import BankDataView
@@ -15,7 +15,7 @@ from .refresh_rate import RefreshRateView, RefreshRatesView
 from .notification import NotificationsView
 from .home_production import HomeProductionView, HomeProductionByIdView
 from .lot import LotsView, LotView
-from .explosion import ExplosionView
+from .explosion import ExplosionView, ExplosionSimulateView
 from .quantification import QuantificationView, QuantificationFiltersView, QuantificationByIdView
 from .contact import ContactsView, ContactsByClientView, ContactByIdView
 from .purchase_order import PurchaseOrdersView, PurchaseOrderView, PurchaseOrderSuppliersView, PurchaseOrderMaterialsView, PurchaseOrderLastConsecutiveView, VSProjectsView, InputRegisterView, InvoiceView
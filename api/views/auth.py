@@ -1,11 +1,19 @@
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import views
 from api.use_cases.auth_use_case import AuthUseCase
+from api.helpers.get_body_data import get_body_data
 
 
-class AuthView(views.APIView):
-    def post(self, request):
-        use_case = AuthUseCase(data=request.data)
-        return use_case.login()
+@method_decorator(csrf_exempt, name='dispatch')
+class AuthView(View):
+    """Vista async: bcrypt no bloquea el hilo compartido de las vistas síncronas."""
+    http_method_names = ['post']
+
+    async def post(self, request):
+        use_case = AuthUseCase(data=get_body_data(request))
+        return await use_case.alogin()
 
 
 class PasswordRequestView(views.APIView):
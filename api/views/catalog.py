@@ -1,6 +1,7 @@
 from rest_framework import views
 from api.use_cases.catalog_use_case import CatalogUseCase
 from api.middlewares import BellartiAuthenticationMiddleware
+from api.decorators.conditional_get import conditional_get
 
 
 class CatalogView(views.APIView):
@@ -10,6 +11,7 @@ class CatalogView(views.APIView):
         use_case = CatalogUseCase(data=request.data)
         return use_case.save()
 
+    @conditional_get('catalogs', 'catalog')
     def get(self, request):
         use_case = CatalogUseCase(request=request)
         return use_case.get()
@@ -18,6 +20,7 @@ class CatalogView(views.APIView):
 class CatalogByIdView(views.APIView):
     authentication_classes = [BellartiAuthenticationMiddleware]
 
+    @conditional_get('catalogs')
     def get(self, request, id):
         use_case = CatalogUseCase(id=id)
         return use_case.get_by_id()
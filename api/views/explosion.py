@@ -1,6 +1,7 @@
 from rest_framework import views
 from api.use_cases.explosion_use_case import ExplosionUseCase
 from api.middlewares import BellartiAuthenticationMiddleware
+from api.decorators.conditional_get import conditional_get
 
 
 class ExplosionView(views.APIView):
@@ -10,7 +11,17 @@ class ExplosionView(views.APIView):
         use_case = ExplosionUseCase(data=request.data)
         return use_case.assign()
 
+    @conditional_get(('explosion', ['home_production_id']), 'materials', 'home_production')
     def get(self, request, home_production_id):
         use_case = ExplosionUseCase(
             request=request, home_production_id=home_production_id)
         return use_case.get()
+
+
+class ExplosionSimulateView(views.APIView):
+    authentication_classes = [BellartiAuthenticationMiddleware]
+
+    def post(self, request, home_production_id):
+        use_case = ExplosionUseCase(
+            data=request.data, home_production_id=home_production_id)
+        return use_case.simulate()
@@ -1,6 +1,7 @@
 from rest_framework import views
 from api.use_cases.lot_use_case import LotUseCase
 from api.middlewares import BellartiAuthenticationMiddleware
+from api.decorators.conditional_get import conditional_get
 
 
 class LotsView(views.APIView):
@@ -19,6 +20,7 @@ class LotsView(views.APIView):
         )
         return use_case.upload()
 
+    @conditional_get(('lots', ['home_production_id']))
     def get(self, request, home_production_id):
         use_case = LotUseCase(home_production_id=home_production_id)
         return use_case.get()
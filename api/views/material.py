@@ -1,6 +1,10 @@
 from rest_framework import views
 from api.use_cases.material_use_case import MaterialUseCase
 from api.middlewares import BellartiAuthenticationMiddleware
+from api.decorators.conditional_get import conditional_get
+
+# Prefijos de cache de los que depende la representación de un material
+MATERIAL_SCOPES = ('materials', 'suppliers', 'catalogs', 'inventory')
 
 
 class MaterialsView(views.APIView):
@@ -10,6 +14,7 @@ class MaterialsView(views.APIView):
         use_case = MaterialUseCase(data=request.data)
         return use_case.save()
 
+    @conditional_get(*MATERIAL_SCOPES)
     def get(self, request):
         use_case = MaterialUseCase(request=request)
         return use_case.get()
@@ -19,9 +24,18 @@ class MaterialsView(views.APIView):
         return use_case.upload()
 
 
+class MaterialSuggestView(views.APIView):
+    authentication_classes = [BellartiAuthenticationMiddleware]
+
+    def get(self, request):
+        use_case = MaterialUseCase(request=request)
+        return use_case.suggest()
+
+
 class MaterialByIdView(views.APIView):
     authentication_classes = [BellartiAuthenticationMiddleware]
 
+    @conditional_get(*MATERIAL_SCOPES)
     def get(self, request, id):
         use_case = MaterialUseCase(id=id)
         return use_case.get_by_id()
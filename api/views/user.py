@@ -1,4 +1,8 @@
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import views
+from api.helpers.get_body_data import get_body_data
 from api.use_cases.user_use_case import UserUseCase
 from api.middlewares import BellartiAuthenticationMiddleware
 
@@ -31,10 +35,14 @@ class UserByIdView(views.APIView):
         return use_case.delete()
 
 
-class RegisterView(views.APIView):
-    def post(self, request, id):
-        use_case = UserUseCase(data=request.data, id=id)
-        return use_case.register()
+@method_decorator(csrf_exempt, name='dispatch')
+class RegisterView(View):
+    """Vista async (ver AuthView)."""
+    http_method_names = ['post']
+
+    async def post(self, request, id):
+        use_case = UserUseCase(data=get_body_data(request), id=id)
+        return await use_case.aregister()
 
 
 class UpdatePasswordView(views.APIView):
@@ -0,0 +1,28 @@
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api.middlewares import BellartiAuthenticationMiddleware
+from api.middlewares.authentication import AuthenticatedUser
+from api.utils.cache_metrics import metrics
+
+
+class HasAllPermissions(BasePermission):
+    """Solo usuarios con el permiso 'all' (administradores)."""
+
+    def has_permission(self, request, view):
+        return isinstance(request.user, AuthenticatedUser) \
+            and 'all' in request.user.permissions
+
+
+class CacheStatsView(APIView):
+    """Métricas de cache por prefijo (hits, misses, bytes, latencias)."""
+    authentication_classes = [BellartiAuthenticationMiddleware]
+    permission_classes = [HasAllPermissions]
+
+    def get(self, request):
+        prefix = request.query_params.get('prefix')
+        return Response(metrics.snapshot(prefix))
+
+    def delete(self, request):
+        metrics.reset(request.query_params.get('prefix'))
+        return Response({'reset': True})
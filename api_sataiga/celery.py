@@ -1,6 +1,9 @@
 from __future__ import absolute_import
 import os
+import logging
 from celery import Celery
+from celery.signals import task_prerun, task_postrun
+from api_sataiga.handlers.mongo_monitor import begin, end
 
 # Establece el settings de Django por defecto
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_sataiga.settings')
@@ -14,6 +17,27 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+log = logging.getLogger(__name__)
+_mongo_scopes = {}
+
+
+@task_prerun.connect
+def _start_mongo_scope(task_id=None, task=None, **kwargs):
+    # Atribuye a la tarea los comandos Mongo que ejecute (ver mongo_monitor)
+    _mongo_scopes[task_id] = begin(f"task {task.name}")
+
+
+@task_postrun.connect
+def _end_mongo_scope(task_id=None, task=None, **kwargs):
+    token = _mongo_scopes.pop(task_id, None)
+    if token is None:
+        return
+    stats = end(token)
+    if stats and stats.count:
+        log.info("[mongo] %s: %d comandos en %.1f ms",
+                 stats.label, stats.count, stats.duration_ms)
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
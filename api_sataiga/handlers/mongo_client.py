@@ -1,6 +1,7 @@
 # mongo_client.py
 from pymongo import MongoClient
 from django.conf import settings
+from .mongo_monitor import CommandMonitor
 
 _client = None
 
@@ -14,5 +15,5 @@ def get_mongo_client():
             settings.MONGO_DB['HOST'],
             settings.MONGO_DB['PORT']
         )
-        _client = MongoClient(uri)
+        _client = MongoClient(uri, event_listeners=[CommandMonitor()])
     return _client
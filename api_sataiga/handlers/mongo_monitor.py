@@ -0,0 +1,131 @@
+# mongo_monitor.py
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+from django.conf import settings
+from pymongo import monitoring
+
+log = logging.getLogger(__name__)
+
+# Comandos internos del driver (handshake, auth, sesiones) que no se cuentan
+IGNORED_COMMANDS = {
+    'hello', 'ismaster', 'isMaster', 'ping', 'buildinfo', 'buildInfo',
+    'saslStart', 'saslContinue', 'authenticate', 'getnonce', 'endSessions',
+}
+
+
+class QueryStats:
+    """Comandos Mongo atribuidos a un request HTTP o a una tarea Celery."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.duration_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, duration_ms: float):
+        with self._lock:
+            self.count += 1
+            self.duration_ms += duration_ms
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar('mongo_query_stats', default=None)
+
+
+def begin(label: str):
+    """Abre un ámbito de conteo; regresa el token para end()."""
+    return _current.set(QueryStats(label))
+
+
+def end(token) -> Optional[QueryStats]:
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+@contextmanager
+def track(label: str):
+    token = begin(label)
+    try:
+        yield _current.get()
+    finally:
+        end(token)
+
+
+def redact(value: Any) -> Any:
+    """Conserva llaves y operadores del filtro; reemplaza los valores por '?'."""
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(value[0])] if value else []
+    return '?'
+
+
+def filter_shape(command_name: str, command: dict) -> Any:
+    """Forma (sin valores) del filtro de un comando find/update/delete/aggregate."""
+    for key in ('filter', 'query', 'q'):
+        if key in command:
+            return redact(command[key])
+    if command_name == 'aggregate':
+        return redact([stage for stage in command.get('pipeline', [])
+                       if '$match' in stage][:1])
+    for key in ('updates', 'deletes'):
+        if command.get(key):
+            return redact(command[key][0].get('q', {}))
+    return None
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    Cuenta los comandos del ámbito actual (ver MongoQueryMiddleware y las
+    señales de Celery) y registra en log los que superan MONGO_SLOW_QUERY_MS.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _key(event):
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get(event.command_name)
+        self._pending[self._key(event)] = (
+            collection if isinstance(collection, str) else None,
+            command,
+        )
+
+    def _finish(self, event, failed=False):
+        pending = self._pending.pop(self._key(event), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+
+        stats = _current.get()
+        if stats is not None:
+            stats.add(duration_ms)
+
+        threshold = getattr(settings, 'MONGO_SLOW_QUERY_MS', 0)
+        if threshold and duration_ms >= threshold:
+            collection, command = pending
+            log.warning(
+                "[mongo] %s lento%s: %s.%s %.1f ms filtro=%s origen=%s",
+                event.command_name,
+                " (falló)" if failed else "",
+                event.database_name,
+                collection,
+                duration_ms,
+                filter_shape(event.command_name, command),
+                stats.label if stats else "-",
+            )
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
@@ -1,7 +1,38 @@
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
 from django.conf import settings
 from datetime import datetime
 from .mongo_client import get_mongo_client
+from api.helpers.search import (
+    SEARCH_FIELDS, SEARCH_TOKENS_FIELD, build_search_tokens, touches_fields)
+
+
+def _stamp_search_tokens(collection_name, doc):
+    # Calcula los tokens de búsqueda antes de insertar (sin viaje extra)
+    fields = SEARCH_FIELDS.get(collection_name)
+    if fields:
+        doc[SEARCH_TOKENS_FIELD] = build_search_tokens(doc, fields)
+    return doc
+
+
+def _refresh_search_tokens(collection, queries):
+    """
+    Recalcula los tokens de los documentos que cumplen `queries` tras un
+    update parcial. Solo escribe los que cambiaron, en un bulk_write.
+    """
+    fields = SEARCH_FIELDS.get(collection.name)
+    if not fields or not queries:
+        return
+    projection = {f: 1 for f in fields}
+    projection[SEARCH_TOKENS_FIELD] = 1
+    query = queries[0] if len(queries) == 1 else {'$or': queries}
+    ops = []
+    for doc in collection.find(query, projection):
+        tokens = build_search_tokens(doc, fields)
+        if doc.get(SEARCH_TOKENS_FIELD) != tokens:
+            ops.append(UpdateOne({'_id': doc['_id']},
+                                 {'$set': {SEARCH_TOKENS_FIELD: tokens}}))
+    if ops:
+        collection.bulk_write(ops, ordered=False)
 
 
 class MongoDBHandler:
@@ -22,6 +53,7 @@ class MongoDBHandler:
         collection = self.db[self.collection_name]
         data['created_at'] = datetime.now()
         data['updated_at'] = datetime.now()
+        _stamp_search_tokens(self.collection_name, data)
         result = collection.insert_one(data)
         return result.inserted_id
 
@@ -35,10 +67,44 @@ class MongoDBHandler:
             result = result.sort(order_field, order)
         return list(result)
 
-    def update(self, query, update_data, upsert=False):
+    def iter_extract(self, query=None, projection=None, sort=None, batch_size=500):
+        """
+        Igual que extract pero como generador: recorre el cursor por lotes
+        de `batch_size` sin cargar el resultado completo en memoria.
+        """
         collection = self.db[self.collection_name]
-        now = datetime.now()
+        cursor = collection.find(
+            query or {}, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        with cursor:
+            for doc in cursor:
+                yield doc
 
+    def extract_page(self, query=None, sort=None, skip=0, limit=0, projection=None):
+        collection = self.db[self.collection_name]
+        if projection:
+            result = collection.find(query, projection)
+        else:
+            result = collection.find(query)
+        if sort:
+            result = result.sort(sort)
+        if skip:
+            result = result.skip(skip)
+        if limit:
+            result = result.limit(limit)
+        return list(result)
+
+    def aggregate(self, pipeline, allow_disk_use=False):
+        collection = self.db[self.collection_name]
+        return list(collection.aggregate(pipeline, allowDiskUse=allow_disk_use))
+
+    def count(self, query=None):
+        collection = self.db[self.collection_name]
+        return collection.count_documents(query or {})
+
+    @staticmethod
+    def _normalize_update(update_data, now, upsert=False):
         # Normalizar a operadores
         if any(k.startswith('$') for k in update_data.keys()):
             ops = update_data
@@ -53,6 +119,11 @@ class MongoDBHandler:
         if upsert:
             ops.setdefault('$setOnInsert', {})
             ops['$setOnInsert']['created_at'] = now
+        return ops
+
+    def update(self, query, update_data, upsert=False):
+        collection = self.db[self.collection_name]
+        ops = self._normalize_update(update_data, datetime.now(), upsert)
 
         # Doc final
         doc = collection.find_one_and_update(
@@ -61,13 +132,101 @@ class MongoDBHandler:
             upsert=upsert,
             return_document=ReturnDocument.AFTER,
         )
+
+        # Mantener tokens de búsqueda si el update tocó campos indexados
+        fields = SEARCH_FIELDS.get(self.collection_name)
+        if doc and fields and touches_fields(ops, fields):
+            tokens = build_search_tokens(doc, fields)
+            if doc.get(SEARCH_TOKENS_FIELD) != tokens:
+                collection.update_one(
+                    {'_id': doc['_id']}, {'$set': {SEARCH_TOKENS_FIELD: tokens}})
+                doc[SEARCH_TOKENS_FIELD] = tokens
         return doc
 
+    def insert_many(self, docs, ordered=False):
+        """Inserta varios documentos en un solo viaje a MongoDB."""
+        collection = self.db[self.collection_name]
+        docs = list(docs)
+        if not docs:
+            return {'inserted': 0, 'updated': 0, 'matched': 0, 'inserted_ids': []}
+        now = datetime.now()
+        for doc in docs:
+            doc['created_at'] = now
+            doc['updated_at'] = now
+            _stamp_search_tokens(self.collection_name, doc)
+        result = collection.insert_many(docs, ordered=ordered)
+        return {
+            'inserted': len(result.inserted_ids),
+            'updated': 0,
+            'matched': 0,
+            'inserted_ids': result.inserted_ids,
+        }
+
+    def bulk_upsert(self, key_fields, docs, ordered=False, on_insert=None):
+        """
+        Upsert en lote: cada doc se busca por `key_fields` y se aplica $set
+        con el resto de campos (created_at y `on_insert` solo al insertar).
+        """
+        collection = self.db[self.collection_name]
+        now = datetime.now()
+        ops = []
+        for doc in docs:
+            query = {k: doc.get(k) for k in key_fields}
+            set_data = {k: v for k, v in doc.items()
+                        if k not in ('_id', 'created_at', 'updated_at')}
+            _stamp_search_tokens(self.collection_name, set_data)
+            update_ops = {'$set': set_data}
+            if on_insert:
+                update_ops['$setOnInsert'] = dict(on_insert)
+            ops.append(UpdateOne(
+                query,
+                self._normalize_update(update_ops, now, upsert=True),
+                upsert=True,
+            ))
+        return self._bulk_write(collection, ops, ordered)
+
+    def bulk_update(self, updates, ordered=False):
+        """
+        Actualización en lote. `updates` es una lista de (query, update_data)
+        con la misma normalización que update() (operadores o doc simple).
+        """
+        collection = self.db[self.collection_name]
+        now = datetime.now()
+        updates = [(query, self._normalize_update(update_data, now))
+                   for query, update_data in updates]
+        ops = [UpdateOne(query, update_ops) for query, update_ops in updates]
+        result = self._bulk_write(collection, ops, ordered)
+        fields = SEARCH_FIELDS.get(self.collection_name)
+        if fields:
+            _refresh_search_tokens(collection, [
+                query for query, update_ops in updates
+                if touches_fields(update_ops, fields)])
+        return result
+
+    @staticmethod
+    def _bulk_write(collection, ops, ordered):
+        if not ops:
+            return {'inserted': 0, 'updated': 0, 'matched': 0}
+        result = collection.bulk_write(ops, ordered=ordered)
+        return {
+            'inserted': result.upserted_count,
+            'updated': result.modified_count,
+            'matched': result.matched_count,
+        }
+
     def delete(self, query):
         collection = self.db[self.collection_name]
         result = collection.delete_many(query)
         return result.deleted_count
 
+    def create_indexes(self, indexes):
+        collection = self.db[self.collection_name]
+        return collection.create_indexes(indexes)
+
+    def index_information(self):
+        collection = self.db[self.collection_name]
+        return collection.index_information()
+
     def create_unique_index(self, field):
         collection = self.db[self.collection_name]
         collection.create_index([(field, 1)], unique=True)
@@ -105,6 +264,7 @@ class MongoDBHandler:
         collection = inst.db[collection_name]
         data['created_at'] = datetime.now()
         data['updated_at'] = datetime.now()
+        _stamp_search_tokens(collection_name, data)
         result = collection.insert_one(data)
         return result.inserted_id
 
@@ -113,6 +273,9 @@ class MongoDBHandler:
         collection = inst.db[collection_name]
         modify_data['updated_at'] = datetime.now()
         result = collection.update_one(query, {'$set': modify_data})
+        fields = SEARCH_FIELDS.get(collection_name)
+        if fields and touches_fields(modify_data, fields):
+            _refresh_search_tokens(collection, [query])
         return result.modified_count
 
     @staticmethod
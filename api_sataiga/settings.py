@@ -74,6 +74,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middlewares.MongoQueryMiddleware',
     'api.middlewares.ExceptionMiddleware',
 ]
 
@@ -88,6 +89,8 @@ if DEBUG:
         'http://160.153.176.228:8080',
     ]
 CORS_ALLOW_CREDENTIALS = True
+# Métricas de Mongo por request (MongoQueryMiddleware) visibles desde el front
+CORS_EXPOSE_HEADERS = ['X-Mongo-Queries', 'X-Mongo-Time-ms', 'ETag']
 
 ROOT_URLCONF = 'api_sataiga.urls'
 
@@ -177,6 +180,27 @@ MONGO_DB = {
     'USER': config('DATABASE_USERNAME'),
     'PASS': config('DATABASE_PASSWORD'),
 }
+# Al arrancar daphne/celery se reportan en log los índices faltantes
+MONGO_INDEX_CHECK = config('MONGO_INDEX_CHECK', default=True, cast=bool)
+# Comandos Mongo que tarden más (ms) se registran en log; 0 lo desactiva
+MONGO_SLOW_QUERY_MS = config('MONGO_SLOW_QUERY_MS', default=100, cast=int)
+# Cache en memoria por proceso (catálogos, roles, proveedores) frente a Redis
+LOCAL_CACHE_MAX_ENTRIES = config('LOCAL_CACHE_MAX_ENTRIES', default=1024, cast=int)
+LOCAL_CACHE_CHANNEL = 'bellarti_api:cache_invalidation'
+# Segundos que un proceso retiene el lock de recálculo de una entrada de cache
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=10, cast=int)
+# Valores de cache mayores a esto (bytes BSON) se comprimen con zlib; 0 no comprime
+CACHE_COMPRESS_MIN_BYTES = config('CACHE_COMPRESS_MIN_BYTES', default=16 * 1024, cast=int)
+# Métricas por prefijo (hits/misses/latencia); se suman en Redis cada N segundos
+CACHE_METRICS_ENABLED = config('CACHE_METRICS_ENABLED', default=True, cast=bool)
+CACHE_METRICS_FLUSH_SECONDS = config('CACHE_METRICS_FLUSH_SECONDS', default=10, cast=int)
+# Usuario autenticado (token -> usuario con permisos) en Redis / memoria, en segundos
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+AUTH_USER_LOCAL_TTL = config('AUTH_USER_LOCAL_TTL', default=15, cast=int)
+# bcrypt: costo de los hashes nuevos, hilos del pool y verificaciones simultáneas por cuenta
+BCRYPT_ROUNDS = config('BCRYPT_ROUNDS', default=12, cast=int)
+BCRYPT_MAX_WORKERS = config('BCRYPT_MAX_WORKERS', default=4, cast=int)
+BCRYPT_PER_ACCOUNT = config('BCRYPT_PER_ACCOUNT', default=1, cast=int)
 
 os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
 LOGGING = {
@@ -248,6 +272,11 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 CELERY_TIMEZONE = 'America/Mexico_City'
 CELERY_ENABLE_UTC = False
+# Tareas con debounce (explosión / cuantificación): espera antes de correr,
+# vida máxima de la marca de pendiente y del lock por llave
+TASK_DEBOUNCE_SECONDS = config('TASK_DEBOUNCE_SECONDS', default=5, cast=int)
+TASK_PENDING_TTL = config('TASK_PENDING_TTL', default=600, cast=int)
+TASK_LOCK_TIMEOUT = config('TASK_LOCK_TIMEOUT', default=600, cast=int)
 
 CACHES = {
     "default": {
@@ -255,7 +284,7 @@ CACHES = {
         "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            "SERIALIZER": "api.utils.cache_codec.BSONSerializer",
         },
         "KEY_PREFIX": "bellarti_api",
         "TIMEOUT": 60 * 10,
@@ -19,11 +19,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from .health import HealthCheckView
+from .cache_stats import CacheStatsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('health/', HealthCheckView.as_view(), name='health'),
+    path('internal/cache-stats/', CacheStatsView.as_view(), name='cache stats'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 if settings.DEBUG: